@@ -0,0 +1,64 @@
+"""
+Compare SoftixCore and AsyncSoftixCore throughput against the simulator.
+
+    python -m benchmarks.bench_async [--requests 300] [--latency 0.01]
+"""
+import argparse
+import time
+
+from concurrent import futures
+
+import softix
+from benchmarks.simulator import Simulator, SimulatorServer
+
+CONCURRENCY = (1, 10, 100)
+
+
+def new_client():
+    """A client whose identical calls each reach the simulator."""
+    return softix.SoftixCore(flights=None)
+
+
+def bench_sync(base_url, requests):
+    client = new_client()
+    client.session.base_url = base_url
+    start = time.time()
+    for _ in range(requests):
+        client.performance_prices('ANMFZ1', 'ETES2JN')
+    return requests / (time.time() - start)
+
+
+def bench_async(base_url, requests, concurrency):
+    with softix.AsyncSoftixCore(max_workers=concurrency,
+                                core=new_client()) as client:
+        client.session.base_url = base_url
+        start = time.time()
+        calls = [client.performance_prices('ANMFZ1', 'ETES2JN')
+                 for _ in range(requests)]
+        for call in futures.as_completed(calls):
+            call.result()
+        return requests / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    server = SimulatorServer(Simulator(latency=args.latency)).start()
+    try:
+        sync_rate = bench_sync(server.base_url, args.requests)
+        print('{0:>12} {1:>12} {2:>12}'.format('concurrency', 'sync req/s',
+                                               'async req/s'))
+        for concurrency in CONCURRENCY:
+            async_rate = bench_async(server.base_url, args.requests,
+                                     concurrency)
+            print('{0:>12} {1:>12.1f} {2:>12.1f}'.format(
+                concurrency, sync_rate, async_rate))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare building a create_basket payload by re-encoding every model with
+splicing the models' cached JSON fragments.
+
+    python -m benchmarks.bench_payloads [--number 100000]
+"""
+import argparse
+import json
+import timeit
+
+from softix import models
+
+DEMANDS = [models.Demand(code, 1, 1) for code in 'AQGK']
+FEES = [models.Fee('5', 'W'), models.Fee('1', 'E')]
+SEAT = models.Seat('SGA', 'GA', '154')
+
+
+def payload():
+    return {
+        'Channel': 'W',
+        'Seller': 'ANMFZ1',
+        'Performancecode': 'ETES0000004EL',
+        'Area': 'SGA',
+        'holdcode': '',
+    }
+
+
+def rebuild():
+    data = payload()
+    data['Demand'] = [demand.to_request() for demand in DEMANDS]
+    data['Fees'] = [fee.to_request() for fee in FEES]
+    data['Seats'] = SEAT.to_request()
+    return json.dumps(data)
+
+
+def splice():
+    return models.dumps(payload(), Demand=DEMANDS, Fees=FEES, Seats=SEAT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    assert json.loads(rebuild()) == json.loads(splice())
+    for name, build in (('rebuild', rebuild), ('splice', splice)):
+        seconds = min(timeit.repeat(build, number=args.number, repeat=3))
+        print('{0:>8} {1:>8.2f} us/payload'.format(
+            name, seconds / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
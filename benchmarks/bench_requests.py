@@ -0,0 +1,72 @@
+"""
+Compare per request allocations of building the URL and headers from
+scratch with the URL templates and prebuilt headers of SoftixCore.
+
+    python -m benchmarks.bench_requests [--number 100000]
+
+Allocations are measured with tracemalloc, on Python 3 only.
+"""
+import argparse
+import gc
+import timeit
+
+from softix import models
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+CLIENT = models.SoftixCore()
+TOKEN = '6636f872898c49ff9f62dca86fe89ec4'
+
+
+def rebuild():
+    url = CLIENT.session.build_url('performances', 'ETES0000004EL', 'prices')
+    headers = {
+        'Authorization': 'Bearer {0}'.format(TOKEN),
+        'Content-Type': 'application/json'
+    }
+    return url, headers
+
+
+def prebuilt():
+    return (CLIENT.session.url('performance_prices', 'ETES0000004EL'),
+            CLIENT._headers(TOKEN))
+
+
+def allocations(build, number):
+    """Return the blocks and bytes allocated per call to ``build``."""
+    kept = [None] * number
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index in range(number):
+        kept[index] = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return float(blocks) / number, float(size) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    assert rebuild() == prebuilt()
+    for name, build in (('rebuild', rebuild), ('prebuilt', prebuilt)):
+        seconds = min(timeit.repeat(build, number=args.number, repeat=3))
+        line = '{0:>8} {1:>8.3f} us/request'.format(
+            name, seconds / args.number * 1e6)
+        if tracemalloc is not None:
+            blocks, size = allocations(build, args.number // 10)
+            line += ' {0:>6.1f} blocks {1:>7.1f} B/request'.format(
+                blocks, size)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Drive realistic flows through SoftixCore against the local simulator.
+
+For every flow, reports requests per second, p50/p99 latency, CPU time per
+operation and, on Python 3, the peak memory allocated by one operation.
+The simulator runs in a separate process so its CPU time is not counted.
+
+    python -m benchmarks.run [--iterations 200] [--concurrency 10]
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+
+from concurrent import futures
+
+import softix
+from benchmarks.simulator import Simulator, SimulatorServer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+SELLER_CODE = 'ANMFZ1'
+DEMANDS = [softix.Demand('A', 2, 2)]
+FEES = [softix.Fee('5', 'W')]
+
+
+def performance_prices(client):
+    client.performance_prices(SELLER_CODE, 'ETES2JN')
+
+
+def view_order(client):
+    softix.models.Order(client.order(SELLER_CODE, '20161116,1023')).total
+
+
+def checkout(client):
+    basket = client.create_basket(SELLER_CODE, 'ETES0000004EL', 'SGA',
+                                  DEMANDS, FEES)
+    basket = client.add_offer(SELLER_CODE, basket['Id'], 'ETES0000004EL',
+                              'SGB', DEMANDS, FEES)
+    client.purchase_basket(SELLER_CODE, basket['Id'], basket=basket)
+
+
+def transaction_sync(client):
+    client.transaction_sync(SELLER_CODE, '2016-11-01', '2016-11-01')
+
+
+FLOWS = (
+    ('performance_prices', performance_prices),
+    ('order', view_order),
+    ('checkout', checkout),
+    ('transaction_sync', transaction_sync),
+)
+
+
+def serve(options, ready):
+    server = SimulatorServer(Simulator(**options))
+    ready.put(server.base_url)
+    server.serve_forever()
+
+
+def start_simulator(**options):
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(options, ready))
+    process.daemon = True
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def peak_allocated(flow, client):
+    """Peak bytes allocated while running ``flow`` once."""
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        flow(client)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_flow(flow, client, iterations, concurrency):
+    latencies = []
+    lock = threading.Lock()
+
+    def timed(_):
+        started = time.time()
+        flow(client)
+        elapsed = time.time() - started
+        with lock:
+            latencies.append(elapsed)
+
+    flow(client)
+    cpu_started = cpu_time()
+    started = time.time()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(iterations)))
+    wall = time.time() - started
+    cpu = cpu_time() - cpu_started
+    return {
+        'ops': iterations / wall,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+        'cpu': cpu / iterations,
+        'peak': peak_allocated(flow, client),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--line-items', type=int, default=50)
+    parser.add_argument('--transactions', type=int, default=1000)
+    parser.add_argument('--flow', action='append',
+                        choices=[name for name, _ in FLOWS])
+    args = parser.parse_args()
+
+    process, base_url = start_simulator(
+        latency=args.latency, error_rate=args.error_rate,
+        line_items=args.line_items, transactions=args.transactions)
+    # No flights: identical lookups would be collapsed into one request
+    client = softix.SoftixCore(flights=None)
+    client.session.base_url = base_url
+    client.session.mount_pool(args.concurrency)
+    client.authenticate('client-id', 'secret')
+    try:
+        print('{0:<20} {1:>9} {2:>9} {3:>9} {4:>11} {5:>10}'.format(
+            'flow', 'ops/s', 'p50 ms', 'p99 ms', 'cpu ms/op', 'peak KiB'))
+        for name, flow in FLOWS:
+            if args.flow and name not in args.flow:
+                continue
+            result = run_flow(flow, client, args.iterations,
+                              args.concurrency)
+            peak = result['peak']
+            print('{0:<20} {1:>9.1f} {2:>9.2f} {3:>9.2f} {4:>11.3f} '
+                  '{5:>10}'.format(
+                      name, result['ops'], result['p50'] * 1000,
+                      result['p99'] * 1000, result['cpu'] * 1000,
+                      '{0:.1f}'.format(peak / 1024.0) if peak else 'n/a'))
+    finally:
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Local HTTP simulator of the Softix API.
+
+Serves the endpoints used by ``SoftixCore`` with canned responses shaped
+like the real API, with configurable latency, error rate and payload sizes,
+so flows can be driven end to end without network access.
+
+    python -m benchmarks.simulator --port 8080 --latency 0.01
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+
+def price(net):
+    return {'Id': None, 'SheetId': 0, 'Net': net, 'Fees': [
+        {'Id': None, 'Code': None, 'SheetId': 0, 'Type': '1',
+         'TypeName': 'BookingFee', 'Name': None, 'Total': 0, 'Bucket': None,
+         'Inside': False, 'FinanceCode': None},
+    ]}
+
+
+def offer(index, performance_code, section, demands):
+    return {
+        'Id': str(index),
+        'DateTime': '0001-01-01T00:00:00',
+        'PerformanceCode': performance_code,
+        'PriceCategoryCode': '1',
+        'Channel': 'W',
+        'Demand': [
+            dict(demand, Prices=[price(10000 * demand.get('Quantity', 1))])
+            for demand in demands
+        ],
+        'Seats': [{'Section': section, 'Row': 'GA', 'Seats': str(index),
+                   'RzStr': 'RGA/Q{0}-'.format(index)}],
+        'Fees': [],
+    }
+
+
+def line_item(index):
+    return {
+        'Id': index,
+        'DateTime': '0001-01-01T00:00:00',
+        'PerformanceCode': 'ETES0000004EL',
+        'PriceCategoryCode': '1',
+        'Seller': 'ANMFZ1',
+        'Channel': 'W',
+        'PriceTypeCode': 'G',
+        'Barcode': str(29263242296862 + index),
+        'Customer': {'Id': None, 'AFile': 'tel', 'Account': '101'},
+        'Price': price(8000),
+        'Seat': {'Section': 'SGA', 'Row': 'GA', 'Seats': str(index),
+                 'RzStr': 'RGA/G{0}-'.format(index)},
+    }
+
+
+class Simulator(object):
+    """
+    State and canned responses of the simulated API.
+
+    ``latency`` is the mean delay of every response in seconds, with
+    ``jitter`` as the fraction it may vary by. A share of ``error_rate``
+    requests fail with a 503. ``line_items`` and ``transactions`` size the
+    order and transaction sync payloads.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0,
+                 line_items=6, transactions=100, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.line_items = line_items
+        self.transactions = transactions
+        self.random = random.Random(seed)
+        self.baskets = {}
+        self.basket_ids = 34721586
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.routes = [
+            ('POST', r'oauth2/accesstoken$', self.accesstoken),
+            ('POST', r'baskets$', self.create_basket),
+            ('GET', r'baskets/([^/]+)$', self.basket),
+            ('POST', r'baskets/([^/]+)/offers$', self.add_offer),
+            ('POST', r'baskets/([^/]+)/purchase$', self.purchase),
+            ('POST', r'customers$', self.create_customer),
+            ('GET', r'customers/([^/]+)$', self.customer),
+            ('GET', r'orders/([^/]+)$', self.order),
+            ('POST', r'orders/([^/]+)/reverse$', self.reverse),
+            ('GET', r'performances/([^/]+)/prices$', self.prices),
+            ('GET', r'performances/([^/]+)/availabilities$',
+             self.availabilities),
+            ('GET', r'dcal/transync/([^/]+)/([^/]+)$', self.transync),
+        ]
+        self.routes = [(method, re.compile(pattern, re.IGNORECASE), handler)
+                       for method, pattern, handler in self.routes]
+
+    def delay(self):
+        spread = self.latency * self.jitter
+        return max(0.0, self.random.uniform(self.latency - spread,
+                                            self.latency + spread))
+
+    def handle(self, method, path, body):
+        """Return the status code and JSON body for a request."""
+        with self._lock:
+            self.requests += 1
+            failing = self.random.random() < self.error_rate
+        time.sleep(self.delay())
+        if failing:
+            return 503, {'Message': 'Service unavailable'}
+        path = path.split('?', 1)[0].lstrip('/')
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                payload = json.loads(body) if body[:1] in (b'{', b'[') else {}
+                return handler(payload, *match.groups())
+        return 404, {'Message': 'Not found'}
+
+    def accesstoken(self, payload):
+        return 200, {'access_token': '6636f872898c49ff9f62dca86fe89ec4',
+                     'token_type': 'Bearer', 'expires_in': 86399}
+
+    def create_basket(self, payload):
+        with self._lock:
+            self.basket_ids += 1
+            basket_id = '4904-{0}'.format(self.basket_ids)
+            basket = self.baskets[basket_id] = {
+                'Id': basket_id, 'Expiry': None, 'Offers': [], 'Fees': []}
+        return self.add_offer(payload, basket_id)
+
+    def basket(self, payload, basket_id):
+        basket = self.baskets.get(basket_id)
+        if basket is None:
+            return 400, {'Message':
+                         'No basket found for the requested basket id'}
+        return 200, basket
+
+    def add_offer(self, payload, basket_id):
+        basket = self.baskets.get(basket_id)
+        if basket is None:
+            return 400, {'Message':
+                         'No basket found for the requested basket id'}
+        with self._lock:
+            basket['Offers'].append(offer(
+                len(basket['Offers']) + 1, payload.get('Performancecode'),
+                payload.get('Area'), payload.get('Demand', [])))
+        return 201, basket
+
+    def purchase(self, payload, basket_id):
+        if self.baskets.pop(basket_id, None) is None:
+            return 400, {'Message':
+                         'No basket found for the requested basket id'}
+        return 201, {'OrderId': '20161121,{0}'.format(basket_id[-3:])}
+
+    def create_customer(self, payload):
+        return 200, {'ID': 1768618, 'Account': 1753759, 'AFile': 'tel'}
+
+    def customer(self, payload, customer_id):
+        return 200, {'ID': int(customer_id), 'Account': 1753759,
+                     'AFile': 'tel'}
+
+    def order(self, payload, order_id):
+        items = [line_item(index + 1) for index in range(self.line_items)]
+        return 200, {
+            'Id': order_id,
+            'DateTime': '0001-01-01T00:00:00',
+            'Payments': [{'Id': order_id}],
+            'OrderItems': [{'Id': order_id, 'OrderLineItems': items}],
+        }
+
+    def reverse(self, payload, order_id):
+        return 204, None
+
+    def prices(self, payload, performance_code):
+        return 200, {
+            'PriceCategories': [
+                {'PriceCategoryId': 1, 'PriceCategoryCode': '1',
+                 'PriceCategoryName': 'Reserved Seating'},
+            ],
+            'PriceTypes': [
+                {'PriceTypeId': 1, 'PriceTypeCode': 'A',
+                 'PriceTypeName': 'ADULT', 'AdmitCount': 1},
+            ],
+            'TicketPrices': {'Prices': [
+                {'PriceId': 1, 'PriceCategoryId': 1,
+                 'PriceCategoryCode': '1', 'PriceTypeId': 1,
+                 'PriceTypeCode': 'A', 'PriceNet': 10000},
+            ]},
+        }
+
+    def availabilities(self, payload, performance_code):
+        return 200, {'PriceCategories': [
+            {'Availability': {'SoldOut': False, 'StatusCode': 'Ok'},
+             'PriceCategoryId': 1, 'PriceCategoryCode': '1',
+             'PriceCategoryName': 'Reserved Seating'},
+        ]}
+
+    def transync(self, payload, from_date, to_date):
+        return 201, [
+            {'OrderId': '{0},{1}'.format(from_date.replace('-', ''), index),
+             'PerformanceCode': 'ETES0000004EL', 'Net': 8000,
+             'DateTime': '{0}T00:00:00'.format(from_date)}
+            for index in range(self.transactions)
+        ]
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def do_GET(self):
+        self.respond(b'')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.respond(self.rfile.read(length))
+
+    def respond(self, body):
+        status, data = self.server.simulator.handle(self.command, self.path,
+                                                    body)
+        content = json.dumps(data).encode('utf-8') if data is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class SimulatorServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, simulator=None, port=0):
+        HTTPServer.__init__(self, ('127.0.0.1', port), SimulatorHandler)
+        self.simulator = simulator or Simulator()
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}/'.format(self.server_address[1])
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--line-items', type=int, default=6)
+    parser.add_argument('--transactions', type=int, default=100)
+    args = parser.parse_args()
+    simulator = Simulator(latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate,
+                          line_items=args.line_items,
+                          transactions=args.transactions)
+    server = SimulatorServer(simulator, port=args.port)
+    print('Simulating the Softix API on {0}'.format(server.base_url))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
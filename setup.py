@@ -1,6 +1,9 @@
 from setuptools import setup
 
-requirements = ('requests')
+requirements = [
+    'requests',
+    'futures; python_version < "3"',
+]
 setup(
     name='softix',
     packages=['softix'],
@@ -9,4 +12,7 @@ setup(
     author_email='matt@itsmemattchung.com',
     description='Python client library to interface with Dubai ticketing API',
     install_requires=requirements,
+    extras_require={
+        'numpy': ['numpy'],
+    },
 )
@@ -1 +1,9 @@
-from .models import SoftixCore, Demand, Fee, Seat
+from .models import SoftixCore, Demand, Fee, Offer, Seat
+from .asynchronous import AsyncSoftixCore
+from .authentication import TokenProvider
+from .baskets import BasketMirror
+from .cache import ResponseCache
+from .offload import ProcessOffload
+from .ratelimit import RateLimiter
+from . import backends
+from . import batch
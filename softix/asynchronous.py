@@ -0,0 +1,82 @@
+import functools
+
+from concurrent import futures
+
+from .models import SoftixCore
+
+
+def _deferred(name):
+    """Wrap ``SoftixCore.<name>`` so it is submitted to the pool."""
+    method = getattr(SoftixCore, name)
+
+    @functools.wraps(method)
+    def submit(self, *args, **kwargs):
+        return self.executor.submit(getattr(self.core, name), *args, **kwargs)
+    return submit
+
+
+class AsyncSoftixCore(object):
+    """Concurrent counterpart to :class:`SoftixCore`.
+
+    Every API method returns a :class:`concurrent.futures.Future` instead of
+    blocking the caller. Calls are delegated to a wrapped ``SoftixCore`` so
+    payload building and response validation are shared with the sync
+    client, and run on a bounded pool of workers over a keep-alive
+    connection pool of the same size.
+
+    On Python 3 the futures can be awaited with ``asyncio.wrap_future``.
+    """
+
+    methods = (
+        'add_offer',
+        'add_offer_with_seats',
+        'add_offers',
+        'authenticate',
+        'basket',
+        'checkout',
+        'create_basket',
+        'create_basket_with_seat',
+        'create_baskets',
+        'create_customer',
+        'customer',
+        'order',
+        'performance_availabilities',
+        'performance_prices',
+        'purchase_basket',
+        'reverse_order',
+        'transaction_columns',
+        'transaction_sync',
+    )
+
+    def __init__(self, max_workers=10, core=None):
+        self.core = core or SoftixCore()
+        self.core.session.mount_pool(max_workers)
+        self.executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    @property
+    def access_token(self):
+        return self.core.access_token
+
+    @access_token.setter
+    def access_token(self, access_token):
+        self.core.access_token = access_token
+
+    @property
+    def session(self):
+        return self.core.session
+
+    def close(self, wait=True):
+        """Shut down the worker pool and release pooled connections."""
+        self.executor.shutdown(wait=wait)
+        self.core.close(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+for _name in AsyncSoftixCore.methods:
+    setattr(AsyncSoftixCore, _name, _deferred(_name))
+del _name
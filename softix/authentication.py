@@ -0,0 +1,107 @@
+import datetime
+import threading
+
+from .helpers import Flight
+
+
+class TokenProvider(object):
+    """
+    Cache an access token and refresh it before it expires.
+
+    The provider is plugged into ``SoftixCore.token_provider`` so ``_get``
+    and ``_post`` pick up the current token themselves. A timer refreshes
+    the token ``refresh_margin`` seconds before its ``expiration_date`` and
+    concurrent refreshes are coalesced into a single OAuth request.
+
+    The margin is capped at ``max_margin_ratio`` of the token's lifetime,
+    so a token that expires sooner than the margin is still used for most
+    of its lifetime instead of being refreshed on every call.
+    """
+
+    def __init__(self, client, username, password, refresh_margin=60,
+                 max_margin_ratio=0.5):
+        self.client = client
+        self.username = username
+        self.password = password
+        self.refresh_margin = datetime.timedelta(seconds=refresh_margin)
+        self.max_margin_ratio = max_margin_ratio
+        self.authentication = None
+        self._lock = threading.Lock()
+        self._flight = None
+        self._timer = None
+
+    @property
+    def access_token(self):
+        authentication = self.authentication
+        if authentication is None or self.is_stale(authentication):
+            authentication = self.refresh()
+        return authentication.access_token
+
+    def is_stale(self, authentication):
+        return datetime.datetime.utcnow() >= self.refresh_at(authentication)
+
+    def refresh_at(self, authentication):
+        """Return when ``authentication`` should be refreshed."""
+        lifetime = authentication.get('expires_in') or 0
+        margin = min(self.refresh_margin, datetime.timedelta(
+            seconds=lifetime * self.max_margin_ratio))
+        return authentication.expires_at - margin
+
+    def refresh(self, stale_token=None):
+        """
+        Fetch a new token.
+
+        Callers that race each other share the same request. Passing the
+        ``stale_token`` that was rejected skips the request when another
+        caller has already replaced it.
+        """
+        with self._lock:
+            current = self.authentication
+            if (stale_token is not None and current is not None and
+                    current.access_token != stale_token):
+                return current
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = Flight()
+        if not leader:
+            return flight.wait()
+        try:
+            return flight.run(self._authenticate)
+        finally:
+            with self._lock:
+                self._flight = None
+
+    def close(self):
+        """Stop refreshing in the background."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _authenticate(self):
+        authentication = self.client.authenticate(self.username,
+                                                  self.password)
+        self.authentication = authentication
+        self._schedule(authentication)
+        return authentication
+
+    def _schedule(self, authentication):
+        delay = (self.refresh_at(authentication) -
+                 datetime.datetime.utcnow()).total_seconds()
+        if delay <= 0:
+            return
+        timer = threading.Timer(delay, self._refresh_in_background)
+        timer.daemon = True
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = timer
+        timer.start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            # The next caller retries synchronously once the token is stale.
+            pass
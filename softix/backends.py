@@ -0,0 +1,242 @@
+import abc
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from . import lazy
+from .lazy import LazyJSON
+
+#: Wrappers restored by name from shared storage, see :func:`register`
+MODELS = {'LazyJSON': LazyJSON}
+
+
+def approximate_size(value):
+    """Size of ``value`` once encoded, used against ``max_bytes``."""
+    if isinstance(value, LazyJSON):
+        return value.size
+    return len(json.dumps(value))
+
+
+def register(*models):
+    """Let shared backends restore ``models`` by their class name."""
+    for model in models:
+        MODELS[model.__name__] = model
+
+
+def dumps(value):
+    """
+    Encode ``value`` as the name of its wrapper, a newline and its JSON.
+
+    Lazy documents keep their raw body. Values are never pickled, so
+    whoever can write to a shared store cannot run code in its readers.
+    """
+    name = type(value).__name__
+    if MODELS.get(name) is not type(value):
+        name = ''
+    if isinstance(value, LazyJSON):
+        content = value.content
+    else:
+        content = json.dumps(value)
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    return name.encode('ascii') + b'\n' + content
+
+
+def loads(data):
+    """Decode what :func:`dumps` encoded."""
+    name, _, content = bytes(data).partition(b'\n')
+    model = MODELS.get(name.decode('ascii'))
+    if model is not None and issubclass(model, LazyJSON):
+        return model(content)
+    value = lazy.loads(content)
+    return model(value) if model is not None else value
+
+
+_ABC = abc.ABCMeta('_ABC', (object,), {'__slots__': ()})
+
+
+class CacheBackend(_ABC):
+    """
+    Storage used by :class:`softix.cache.ResponseCache`.
+
+    Keys are strings and values are the parsed responses (including the
+    ``Customer`` and ``Order`` wrappers).
+    """
+
+    evictions = 0
+
+    @abc.abstractmethod
+    def get(self, key):
+        """Return the value of ``key``, ``None`` if missing or expired."""
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl):
+        """Store ``value`` under ``key`` for ``ttl`` seconds."""
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """Drop ``key`` if it is stored."""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Drop every key."""
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Per-process LRU storage.
+
+    The least recently used entries are evicted once ``max_entries`` or
+    ``max_bytes`` is exceeded. Values are stored as is, without encoding.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None,
+                 sizeof=approximate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.evictions = 0
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.time():
+                self.size -= size
+                return None
+            self._entries[key] = entry
+            return value
+
+    def set(self, key, value, ttl):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.time() + ttl, size, value)
+            self.size += size
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def _evict(self):
+        while self._entries and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes is not None and self.size > self.max_bytes)):
+            _, entry = self._entries.popitem(last=False)
+            self.size -= entry[1]
+            self.evictions += 1
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Storage shared by every process on a host through a SQLite file.
+
+    The database runs in WAL mode so readers in other workers are not
+    blocked by writes. Values are stored as JSON with the name of their
+    wrapper (see :func:`dumps`), and lazy documents as their raw body so
+    they are only parsed when read.
+    """
+
+    purge_every = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS softix_cache ('
+            'key TEXT PRIMARY KEY, value BLOB, expires_at REAL)'
+        )
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM softix_cache WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        return loads(row[0]) if row is not None else None
+
+    def set(self, key, value, ttl):
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO softix_cache VALUES (?, ?, ?)',
+                (key, sqlite3.Binary(dumps(value)), now + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                connection.execute(
+                    'DELETE FROM softix_cache WHERE expires_at <= ?', (now,))
+
+    def delete(self, key):
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM softix_cache WHERE key = ?',
+                               (key,))
+
+    def clear(self):
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM softix_cache')
+
+    def _connect(self):
+        # Connections can neither be shared between threads nor survive a
+        # fork, so keep one per thread and per process.
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+
+class RedisBackend(CacheBackend):
+    """
+    Storage shared across hosts through a Redis compatible client.
+
+    ``client`` only needs ``get``, ``setex(name, time, value)``, ``delete``
+    and ``scan_iter`` as provided by ``redis.StrictRedis``. Values are
+    encoded as in :class:`SQLiteBackend`.
+    """
+
+    def __init__(self, client, prefix='softix:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        return loads(data) if data is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.setex(self.prefix + key, max(int(ttl), 1), dumps(value))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
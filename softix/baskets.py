@@ -0,0 +1,124 @@
+"""
+Local mirror of the baskets created by this client.
+
+Every basket response returned by ``create_basket`` and ``add_offer`` is the
+full basket, so the mirror can answer ``SoftixCore.basket`` without a round
+trip and detect expired baskets before they are purchased.
+"""
+import calendar
+import collections
+import re
+import threading
+import time
+
+from . import exceptions
+from .models import Basket, as_model
+
+EXPIRED = 'No basket found for the requested basket id'
+
+_EXPIRY = re.compile(r'^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.\d+)?'
+                     r'(?:(Z)|([+-])(\d\d):?(\d\d))$')
+
+
+def parse_expiry(expiry):
+    """
+    Return a basket ``Expiry`` as a UTC timestamp, or ``None``.
+
+    Only timestamps with a ``Z`` or ``+HH:MM`` offset are understood; the
+    time zone of any other timestamp is unknown, so it is not guessed.
+    """
+    match = _EXPIRY.match(expiry or '')
+    if match is None:
+        return None
+    timestamp, utc, sign, hours, minutes = match.groups()
+    expires_at = calendar.timegm(time.strptime(timestamp,
+                                               '%Y-%m-%dT%H:%M:%S'))
+    if utc:
+        return expires_at
+    offset = int(hours) * 3600 + int(minutes) * 60
+    return expires_at - offset if sign == '+' else expires_at + offset
+
+
+class BasketMirror(object):
+    """
+    Baskets by ``(seller_code, basket_id)`` with their expiry.
+
+    A basket with an ``Expiry`` is reported expired once it has passed.
+    The API usually leaves ``Expiry`` empty; such a basket is never
+    assumed expired, it is re-read from the API once it has been mirrored
+    for ``hold`` seconds, so the API decides. Baskets not updated for
+    ``max_age`` seconds are also considered stale and re-read.
+
+    Abandoned baskets are dropped on update once neither ``hold`` nor
+    ``max_age`` could still make them fresh, and at most ``max_size``
+    baskets are kept, the least recently updated being dropped first.
+    """
+
+    def __init__(self, hold=900, max_age=300, max_size=10000):
+        self.hold = hold
+        self.max_age = max_age
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._baskets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._baskets)
+
+    def update(self, seller_code, basket):
+        """Mirror a basket response and return it as a ``Basket``."""
+        basket = as_model(Basket, basket)
+        now = time.time()
+        key = (seller_code, basket['Id'])
+        with self._lock:
+            entry = self._baskets.pop(key, None)
+            expires_at = parse_expiry(basket.get('Expiry'))
+            held_at = entry[3] if entry else now
+            self._baskets[key] = (basket, expires_at, now, held_at)
+            self._prune(now)
+        return basket
+
+    def get(self, seller_code, basket_id):
+        """
+        Return the mirrored basket, or ``None`` if unknown or stale.
+
+        Raises :class:`softix.exceptions.BasketExpiredError` for a basket
+        whose ``Expiry`` has passed, like the API would.
+        """
+        key = (seller_code, basket_id)
+        now = time.time()
+        with self._lock:
+            entry = self._baskets.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            basket, expires_at, updated_at, held_at = entry
+            if expires_at is not None and now >= expires_at:
+                del self._baskets[key]
+                raise exceptions.BasketExpiredError(EXPIRED)
+            if ((expires_at is None and now - held_at >= self.hold) or
+                    (self.max_age is not None and
+                     now - updated_at >= self.max_age)):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return basket
+
+    def _prune(self, now):
+        # Entries are ordered by update time, so stale ones come first
+        max_age = max(self.hold, self.max_age or 0)
+        while self._baskets:
+            key, entry = next(iter(self._baskets.items()))
+            if (len(self._baskets) <= self.max_size and
+                    now - entry[2] < max_age):
+                break
+            del self._baskets[key]
+
+    def forget(self, seller_code, basket_id):
+        with self._lock:
+            self._baskets.pop((seller_code, basket_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._baskets.clear()
@@ -0,0 +1,70 @@
+import collections
+
+from concurrent import futures
+
+
+class BatchResult(collections.namedtuple('BatchResult',
+                                         'item result error')):
+    """Outcome of one item of a batch: a ``result`` or the ``error``."""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def attempt(func, item):
+    """Call ``func(item)`` and capture its outcome instead of raising."""
+    try:
+        return BatchResult(item, func(item), None)
+    except Exception as error:
+        return BatchResult(item, None, error)
+
+
+def run_batch(func, items, max_workers=4, key=None, executor=None):
+    """
+    Call ``func`` on every item with at most ``max_workers`` in flight.
+
+    Items sharing the same ``key`` are processed one after the other, in
+    the order given, while different keys run concurrently. A failing item
+    does not abort the batch; results are returned in the order of
+    ``items``.
+
+    Pass a long lived ``executor`` to run on it instead of a pool started
+    for this batch; ``func`` must then not wait on that executor itself.
+    """
+    items = list(items)
+    groups = collections.OrderedDict()
+    for index, item in enumerate(items):
+        group = key(item) if key is not None else index
+        groups.setdefault(group, []).append(index)
+
+    def run_group(indexes):
+        return [(index, attempt(func, items[index])) for index in indexes]
+
+    results = [None] * len(items)
+    if executor is None:
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            groups = executor.map(run_group, groups.values())
+    else:
+        groups = _bounded_map(executor, run_group, groups.values(),
+                              max_workers)
+    for group in groups:
+        for index, result in group:
+            results[index] = result
+    return results
+
+
+def _bounded_map(executor, func, values, limit):
+    """Map ``func`` over ``values`` on ``executor``, ``limit`` at a time."""
+    pending = set()
+    done = []
+    for value in values:
+        if len(pending) >= limit:
+            finished, pending = futures.wait(
+                pending, return_when=futures.FIRST_COMPLETED)
+            done.extend(future.result() for future in finished)
+        pending.add(executor.submit(func, value))
+    done.extend(future.result() for future in futures.as_completed(pending))
+    return done
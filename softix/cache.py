@@ -0,0 +1,112 @@
+import threading
+
+from .backends import MemoryBackend
+from .helpers import SingleFlight
+
+
+class ResponseCache(object):
+    """
+    TTL cache for Softix lookups.
+
+    Entries are keyed by ``(seller_code, code, endpoint)`` where ``code`` is
+    a performance code for ``prices`` and ``availabilities``, a customer id
+    for ``customer`` and an order id for ``order``. Each endpoint has its
+    own TTL. Storage is delegated to a :class:`softix.backends.CacheBackend`
+    which defaults to a per-process LRU; pass a shared backend to reuse
+    lookups across workers. Concurrent misses on the same key within a
+    process share one upstream fetch, and a fetch that was already in
+    flight when its key was invalidated is not stored.
+
+    Cached responses are shared between callers and must not be mutated.
+    """
+
+    default_ttls = {
+        'prices': 300,
+        'availabilities': 5,
+        'customer': 600,
+        'order': 60,
+    }
+    performance_endpoints = ('prices', 'availabilities')
+
+    def __init__(self, ttls=None, backend=None, max_entries=1024,
+                 max_bytes=None):
+        self.ttls = dict(self.default_ttls, **(ttls or {}))
+        if backend is None:
+            backend = MemoryBackend(max_entries=max_entries,
+                                    max_bytes=max_bytes)
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        # name: [generation, fetches in flight], only while fetches are
+        self._inflight = {}
+
+    @property
+    def evictions(self):
+        return self.backend.evictions
+
+    @property
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def key(self, key):
+        seller_code, code, endpoint = key
+        return '{0}:{1}:{2}'.format(endpoint, seller_code, code)
+
+    def get_or_fetch(self, key, fetch):
+        """Return the cached value for ``key`` or store what fetch returns."""
+        name = self.key(key)
+        value = self.backend.get(name)
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            inflight = self._inflight.setdefault(name, [0, 0])
+            inflight[1] += 1
+            generation = self._generation(name)
+
+        def fetch_and_store():
+            value = fetch()
+            self.set(key, value)
+            with self._lock:
+                stale = self._generation(name) != generation
+            if stale:
+                self.backend.delete(name)
+            return value
+        try:
+            return self._flights.do((name, generation), fetch_and_store)
+        finally:
+            with self._lock:
+                inflight[1] -= 1
+                if not inflight[1]:
+                    del self._inflight[name]
+
+    def set(self, key, value):
+        if value is not None:
+            self.backend.set(self.key(key), value, self.ttls[key[-1]])
+
+    def invalidate(self, seller_code, code, endpoints=None):
+        """Drop cached responses, by default those of a performance."""
+        for endpoint in endpoints or self.performance_endpoints:
+            name = self.key((seller_code, code, endpoint))
+            with self._lock:
+                inflight = self._inflight.get(name)
+                if inflight is not None:
+                    inflight[0] += 1
+            self.backend.delete(name)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+        self.backend.clear()
+
+    def _generation(self, name):
+        inflight = self._inflight.get(name)
+        return self._epoch, inflight[0] if inflight else 0
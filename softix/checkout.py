@@ -0,0 +1,117 @@
+"""
+Checkout of several offers in one flow.
+
+A :class:`Checkout` resolves the customer once, creates the basket with the
+first offer, adds the remaining offers concurrently and purchases the basket
+with the total computed from the offer responses, without reading the basket
+or the customer again.
+"""
+import collections
+import sys
+import time
+
+from . import exceptions
+
+if sys.version_info[0] < 3:
+    exec('def _reraise(error, traceback):\n'
+         '    raise error, None, traceback\n')
+else:
+    def _reraise(error, traceback):
+        raise error.with_traceback(traceback)
+
+
+class CheckoutResult(collections.namedtuple(
+        'CheckoutResult', 'basket order timings')):
+    """The purchased ``basket``, the purchase response and stage timings."""
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return sum(self.timings.values())
+
+
+class Checkout(object):
+    """
+    Plan and run the checkout of ``offers`` for a seller.
+
+    Stages are ``customer`` (only when looked up by ``customer_id``),
+    ``create_basket``, ``add_offers`` and ``purchase``; their durations in
+    seconds are reported in :attr:`CheckoutResult.timings`.
+    """
+
+    def __init__(self, client, seller_code, offers, customer_id=None,
+                 customer=None, max_workers=4):
+        if not offers:
+            raise ValueError('A checkout needs at least one offer')
+        self.client = client
+        self.seller_code = seller_code
+        self.offers = list(offers)
+        self.customer_id = customer_id
+        self.customer = customer
+        self.max_workers = max_workers
+        self.basket_id = None
+        self.timings = collections.OrderedDict()
+
+    def run(self):
+        customer = self.customer
+        if customer is None and self.customer_id:
+            customer = self._stage('customer', self.client.customer,
+                                   self.seller_code, self.customer_id)
+        first, others = self.offers[0], self.offers[1:]
+        create = (self.client.create_basket_with_seat
+                  if first.seat is not None else self.client.create_basket)
+        seat = (first.seat,) if first.seat is not None else ()
+        basket = self._stage('create_basket', create, self.seller_code,
+                             first.performance_code, first.section,
+                             first.demands, first.fees, *seat,
+                             customer=customer)
+        self.basket_id = basket['Id']
+        responses = [basket]
+        if others:
+            results = self._stage('add_offers', self.client.add_offers,
+                                  self.seller_code, self.basket_id, others,
+                                  max_workers=self.max_workers)
+            for result in results:
+                if not result.ok:
+                    _reraise(self._error(result.error, 'add_offers'),
+                             getattr(result.error, '__traceback__', None))
+                responses.append(result.result)
+        basket = merge_baskets(responses)
+        order = self._stage('purchase', self.client.purchase_basket,
+                            self.seller_code, self.basket_id,
+                            customer=customer, basket=basket)
+        return CheckoutResult(basket, order, self.timings)
+
+    def _stage(self, name, func, *args, **kwargs):
+        started = time.time()
+        try:
+            return func(*args, **kwargs)
+        except exceptions.CheckoutError:
+            raise
+        except Exception as error:
+            _reraise(self._error(error, name), sys.exc_info()[2])
+        finally:
+            self.timings[name] = time.time() - started
+
+    def _error(self, cause, stage):
+        """Wrap ``cause``, kept as ``error.cause``, in a CheckoutError."""
+        return exceptions.CheckoutError(str(cause), stage, self.basket_id,
+                                        cause=cause)
+
+
+def merge_baskets(responses):
+    """
+    Combine basket responses into one basket with every offer.
+
+    Offers added concurrently each return the basket as it was when they
+    were added, so every offer is in at least one of the responses.
+    """
+    offers = collections.OrderedDict()
+    for response in responses:
+        for offer in response.get('Offers') or ():
+            key = offer.get('Id')
+            offers[len(offers) if key is None else key] = offer
+    basket = dict(responses[-1])
+    basket['Offers'] = list(offers.values())
+    return basket
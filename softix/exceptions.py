@@ -11,11 +11,36 @@ class CreateCustomerException(Exception):
 class SoftixError(Exception):
     pass
 
-class MissingRequiredCustomerField(SoftixError):
+class ValidationError(SoftixError):
+    def __init__(self, message, errors=()):
+        super(ValidationError, self).__init__(message)
+        self.errors = list(errors)
+
+class MissingRequiredCustomerField(ValidationError):
     pass
 
-class InvalidCustomerField(SoftixError):
+class InvalidCustomerField(ValidationError):
     pass
 
 class AuthenticationError(SoftixError):
     pass
+
+class CircuitOpenError(SoftixError):
+    pass
+
+class RateLimitTimeout(SoftixError):
+    pass
+
+class BasketExpiredError(SoftixError):
+    pass
+
+class CheckoutError(SoftixError):
+    def __init__(self, message, stage=None, basket_id=None, cause=None):
+        super(CheckoutError, self).__init__(message)
+        self.stage = stage
+        self.basket_id = basket_id
+        self.cause = cause
+        self.__cause__ = cause
+
+class QuoteError(SoftixError):
+    pass
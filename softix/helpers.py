@@ -1,6 +1,147 @@
+import codecs
+import json
+import threading
+
+from concurrent import futures
+
+from . import exceptions
+
+
 def remove_none(data):
     if not data:
         return
-    for k, v in data.items():
+    for k, v in list(data.items()):
         if v is None:
             del(data[k])
+
+
+class Flight(object):
+    """
+    A single in-progress call whose outcome is shared by every waiter.
+
+    If the call is interrupted, e.g. by ``KeyboardInterrupt``, the caller
+    running it gets the interruption and waiters a ``SoftixError``.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def run(self, func, *args, **kwargs):
+        try:
+            self.result = func(*args, **kwargs)
+        except Exception as error:
+            self.error = error
+        except BaseException:
+            self.error = exceptions.SoftixError('Shared call interrupted')
+            raise
+        finally:
+            self.done.set()
+        return self.wait()
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent calls by key.
+
+    While a call for a key is in flight, further calls with the same key
+    wait for it and share its outcome instead of calling again.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        return {'calls': self.calls, 'collapsed': self.collapsed}
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+            else:
+                self.collapsed += 1
+        if not leader:
+            return flight.wait()
+        try:
+            return flight.run(func, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+
+def concurrently(*calls, **kwargs):
+    """
+    Run ``calls`` in parallel and return their results in order.
+
+    The first call runs in the calling thread, the others on ``executor``
+    when given, else on a pool started for them.
+    """
+    executor = kwargs.pop('executor', None)
+    if len(calls) == 1:
+        return [calls[0]()]
+    if executor is None:
+        with futures.ThreadPoolExecutor(len(calls) - 1) as executor:
+            return concurrently(*calls, executor=executor)
+    pending = [executor.submit(call) for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [future.result() for future in pending]
+
+
+def iter_json_array(chunks, encoding='utf-8'):
+    """
+    Yield the items of a JSON array as its encoded ``chunks`` arrive.
+
+    Only the items not yet yielded are kept in memory. Anything other than
+    an array is decoded once complete and its items, if any, yielded.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder(encoding)()
+    buf = ''
+    index = 0
+    in_array = None
+    for chunk in chunks:
+        buf = buf[index:] + text.decode(chunk)
+        index = 0
+        if in_array is None:
+            stripped = buf.lstrip()
+            if not stripped:
+                continue
+            in_array = stripped[0] == '['
+            index = len(buf) - len(stripped) + 1 if in_array else 0
+        if not in_array:
+            continue
+        while True:
+            while index < len(buf) and buf[index] in ' \t\r\n,':
+                index += 1
+            if index >= len(buf) or buf[index] == ']':
+                break
+            try:
+                item, end = decoder.raw_decode(buf, index)
+            except ValueError:
+                break
+            # Wait for a delimiter so numbers split across chunks are whole.
+            if end >= len(buf):
+                break
+            yield item
+            index = end
+    buf = buf[index:] + text.decode(b'', True)
+    if in_array:
+        buf = '[' + buf
+    if buf.strip():
+        data = json.loads(buf)
+        for item in data or ():
+            yield item
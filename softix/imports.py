@@ -0,0 +1,151 @@
+"""
+Bulk import of customers.
+
+Records are streamed from a CSV or JSON lines file, validated, de-duplicated
+by email and phone number and created with ``SoftixCore.create_customer``
+over a bounded pool. The outcome of every record is appended to a JSON lines
+output file, which is also how an interrupted import resumes.
+"""
+import collections
+import csv
+import hashlib
+import json
+import os
+import re
+
+from concurrent import futures
+
+from . import validation
+
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+INVALID = 'invalid'
+FAILED = 'failed'
+
+_NOT_DIGITS = re.compile(r'\D')
+
+
+def read_records(path):
+    """Iterate over the records of a ``.csv`` or JSON lines file."""
+    with open(path) as records:
+        if path.endswith('.csv'):
+            for record in csv.DictReader(records):
+                yield record
+            return
+        for line in records:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _digest(kind, value):
+    return hashlib.sha1((kind + ':' + value).encode('utf-8')).hexdigest()
+
+
+def identity_keys(customer):
+    """Return the hashes a customer is de-duplicated on."""
+    keys = []
+    email = (customer.get('email') or '').strip().lower()
+    if email:
+        keys.append(_digest('email', email))
+    phone = _NOT_DIGITS.sub('', ''.join(
+        customer.get(field) or '' for field in
+        ('internationalcode', 'areacode', 'phonenumber')))
+    if phone:
+        keys.append(_digest('phone', phone))
+    return keys
+
+
+class CustomerImport(object):
+    """
+    Import customers for a seller, recording progress to ``output``.
+
+    Each line of the output holds a record's index in the input, its
+    ``status``, its identity hashes and the created ``customer`` or the
+    ``errors``. Records already in the output are skipped, except failed
+    ones which are retried, and their hashes seed the duplicate index.
+    """
+
+    def __init__(self, client, seller_code, output, max_workers=4):
+        self.client = client
+        self.seller_code = seller_code
+        self.output = output
+        self.max_workers = max_workers
+        self.counts = collections.Counter()
+        self._done = set()
+        self._keys = set()
+
+    def resume(self):
+        """Load the progress of a previous run from the output file."""
+        if not os.path.exists(self.output):
+            return
+        with open(self.output) as output:
+            for line in output:
+                if not line.strip():
+                    continue
+                outcome = json.loads(line)
+                if outcome['status'] == FAILED:
+                    continue
+                self._done.add(outcome['record'])
+                if outcome['status'] == CREATED:
+                    self._keys.update(outcome['keys'])
+
+    def run(self, records):
+        """Import ``records`` and return the count of each status."""
+        self.resume()
+        pending = collections.deque()
+        executor = futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            with open(self.output, 'a') as output:
+                for index, record in enumerate(records):
+                    if index in self._done:
+                        continue
+                    outcome, keys = self._prepare(index, record)
+                    if outcome is not None:
+                        self._write(output, outcome)
+                        continue
+                    self._keys.update(keys)
+                    pending.append((index, keys, executor.submit(
+                        self.client.create_customer, self.seller_code,
+                        **record)))
+                    if len(pending) >= self.max_workers * 2:
+                        self._complete(output, pending.popleft())
+                while pending:
+                    self._complete(output, pending.popleft())
+        finally:
+            executor.shutdown(wait=True)
+        return self.counts
+
+    def _prepare(self, index, record):
+        errors = validation.CUSTOMER.validate(record)
+        if errors:
+            return {'record': index, 'status': INVALID,
+                    'errors': [message for _, message in errors]}, None
+        keys = identity_keys(record)
+        if any(key in self._keys for key in keys):
+            return {'record': index, 'status': DUPLICATE, 'keys': keys}, keys
+        return None, keys
+
+    def _complete(self, output, pending):
+        index, keys, future = pending
+        try:
+            customer = future.result()
+        except Exception as error:
+            self._keys.difference_update(keys)
+            outcome = {'record': index, 'status': FAILED,
+                       'errors': [str(error)]}
+        else:
+            outcome = {'record': index, 'status': CREATED, 'keys': keys,
+                       'customer': dict(customer or {})}
+        self._write(output, outcome)
+
+    def _write(self, output, outcome):
+        output.write(json.dumps(outcome) + '\n')
+        output.flush()
+        self.counts[outcome['status']] += 1
+
+
+def import_customers(client, seller_code, path, output, max_workers=4):
+    """Import the customers of a CSV or JSON lines file."""
+    customer_import = CustomerImport(client, seller_code, output,
+                                     max_workers=max_workers)
+    return customer_import.run(read_records(path))
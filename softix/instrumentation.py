@@ -0,0 +1,248 @@
+"""
+Per-call instrumentation of the requests sent by SoftixCore.
+
+Hooks registered on ``SoftixCore.instrumentation`` receive a :class:`Call`
+for every request once its response has been handled. Nothing is measured
+while no hook is registered. Errors raised while measuring or by a hook are
+logged and never fail the request.
+"""
+import bisect
+import collections
+import logging
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3 import connection, connectionpool
+
+#: Phases of a call; name resolution is timed as part of ``connect``
+PHASES = ('connect', 'tls', 'server', 'parse', 'total')
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+_connection_timings = threading.local()
+
+log = logging.getLogger(__name__)
+
+
+def connection_timings():
+    """Connect and TLS timings of connections opened by this thread."""
+    timings = getattr(_connection_timings, 'timings', None)
+    if timings is None:
+        timings = _connection_timings.timings = {}
+    return timings
+
+
+def _record(phase, started):
+    try:
+        timings = connection_timings()
+        if phase == 'tls':
+            timings[phase] = (time.time() - started -
+                              timings.get('connect', 0))
+        else:
+            timings[phase] = time.time() - started
+    except Exception:
+        log.exception('Failed to time the %s phase', phase)
+
+
+class _TimedConnection(object):
+
+    def _new_conn(self):
+        started = time.time()
+        try:
+            return super(_TimedConnection, self)._new_conn()
+        finally:
+            _record('connect', started)
+
+
+class TimedHTTPConnection(_TimedConnection, connection.HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnection, connection.HTTPSConnection):
+
+    def connect(self):
+        started = time.time()
+        super(TimedHTTPSConnection, self).connect()
+        _record('tls', started)
+
+
+class TimedHTTPConnectionPool(connectionpool.HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    Adapter whose new connections report their connect and TLS time.
+
+    urllib3 resolves the host inside the same call that opens the socket,
+    so DNS cannot be told apart from TCP without resolving twice; both are
+    reported as ``connect``.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class Call(object):
+    """
+    Measurements of a single request.
+
+    ``timings`` holds seconds per phase: ``connect`` (DNS and TCP) and
+    ``tls`` are only present when a new connection was opened, ``server``
+    is the time until the response headers arrived, ``parse`` the time
+    spent decoding the body and ``total`` the whole call.
+    """
+
+    __slots__ = ('operation', 'method', 'url', 'status_code',
+                 'request_bytes', 'response_bytes', 'timings', 'started')
+
+    def __init__(self, operation, method, url, request_bytes=0):
+        self.operation = operation
+        self.method = method
+        self.url = url
+        self.status_code = None
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.timings = {}
+        self.started = time.time()
+
+
+class Instrumentation(object):
+    """Registry of the hooks called with every finished :class:`Call`."""
+
+    def __init__(self):
+        self.hooks = []
+
+    @property
+    def enabled(self):
+        return bool(self.hooks)
+
+    def register(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def unregister(self, hook):
+        self.hooks.remove(hook)
+
+    def emit(self, call):
+        call.timings['total'] = time.time() - call.started
+        for hook in list(self.hooks):
+            try:
+                hook(call)
+            except Exception:
+                log.exception('Instrumentation hook %r failed', hook)
+
+
+class Histogram(object):
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return bound
+        return float('inf')
+
+
+class HistogramCollector(object):
+    """
+    In-memory hook aggregating calls per operation.
+
+    Keeps a latency histogram per operation and phase, request counts per
+    operation and status code, and byte counts per operation. Calls that
+    got no response, because sending them raised, are counted with status
+    code ``0``.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.requests = collections.Counter()
+        self.request_bytes = collections.Counter()
+        self.response_bytes = collections.Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, call):
+        with self._lock:
+            for phase, seconds in call.timings.items():
+                key = (call.operation, phase)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(self.buckets)
+                histogram.observe(seconds)
+            self.requests[(call.operation, call.status_code or 0)] += 1
+            self.request_bytes[call.operation] += call.request_bytes
+            self.response_bytes[call.operation] += call.response_bytes
+
+    def histogram(self, operation, phase='total'):
+        return self.histograms.get((operation, phase))
+
+
+def _labels(**labels):
+    return '{' + ','.join('{0}="{1}"'.format(name, labels[name])
+                          for name in sorted(labels)) + '}'
+
+
+def prometheus_text(collector, prefix='softix'):
+    """Render a :class:`HistogramCollector` in Prometheus text format."""
+    lines = []
+    with collector._lock:
+        name = prefix + '_request_duration_seconds'
+        lines.append('# HELP {0} Duration of Softix API calls by phase.'
+                     .format(name))
+        lines.append('# TYPE {0} histogram'.format(name))
+        for (operation, phase), histogram in sorted(
+                collector.histograms.items()):
+            cumulative = 0
+            bounds = [repr(bound) for bound in histogram.buckets] + ['+Inf']
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append('{0}_bucket{1} {2}'.format(
+                    name, _labels(operation=operation, phase=phase,
+                                  le=bound), cumulative))
+            labels = _labels(operation=operation, phase=phase)
+            lines.append('{0}_sum{1} {2!r}'.format(name, labels,
+                                                   histogram.sum))
+            lines.append('{0}_count{1} {2}'.format(name, labels,
+                                                   histogram.count))
+
+        name = prefix + '_requests_total'
+        lines.append('# HELP {0} Softix API calls by status code.'
+                     .format(name))
+        lines.append('# TYPE {0} counter'.format(name))
+        for (operation, status), count in sorted(collector.requests.items()):
+            lines.append('{0}{1} {2}'.format(
+                name, _labels(operation=operation, status=status), count))
+
+        for direction, counter in (('request', collector.request_bytes),
+                                   ('response', collector.response_bytes)):
+            name = '{0}_{1}_bytes_total'.format(prefix, direction)
+            lines.append('# HELP {0} Bytes of Softix API {1} bodies.'
+                         .format(name, direction))
+            lines.append('# TYPE {0} counter'.format(name))
+            for operation, count in sorted(counter.items()):
+                lines.append('{0}{1} {2}'.format(
+                    name, _labels(operation=operation), count))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,94 @@
+"""
+Lazily decoded JSON responses.
+
+``LazyJSON`` keeps the raw body of a response and only decodes it the first
+time it is read, using the fastest JSON backend available. Responses that
+are passed along or cached without being read are never decoded, and
+pickling one only stores the raw body.
+"""
+import json
+import re
+
+try:
+    import ujson as _fastjson
+except ImportError:
+    try:
+        import simplejson as _fastjson
+    except ImportError:
+        _fastjson = json
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+_OBJECT = re.compile(br'\s*\{')
+
+
+def loads(content):
+    """Decode JSON with the fastest available backend."""
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return _fastjson.loads(content)
+
+
+def parse(content):
+    """Return a lazy document for a JSON object, else the decoded value."""
+    if _OBJECT.match(content):
+        return LazyJSON(content)
+    return loads(content)
+
+
+class LazyJSON(Mapping):
+    """Read-only mapping over the raw body of a JSON object."""
+
+    def __init__(self, content):
+        self._content = content
+        self._data = None
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        state = 'decoded' if self._data is not None else 'raw'
+        return '<{0} {1}>'.format(type(self).__name__, state)
+
+    def __getstate__(self):
+        return {'_content': self._content, '_data': None}
+
+    @property
+    def content(self):
+        return self._content
+
+    @property
+    def data(self):
+        """The decoded object."""
+        if self._data is None:
+            self._data = loads(self._content)
+        return self._data
+
+    @property
+    def size(self):
+        return len(self._content)
+
+
+def lazy_model(model):
+    """
+    Build a lazy counterpart of a ``dict`` based model.
+
+    The properties and methods of ``model`` are reused as is since they
+    only read the document through item access.
+    """
+    attributes = dict(
+        (name, value) for name, value in vars(model).items()
+        if not name.startswith('__') and
+        not isinstance(value, (classmethod, staticmethod))
+    )
+    attributes['__module__'] = model.__module__
+    return type('Lazy' + model.__name__, (LazyJSON,), attributes)
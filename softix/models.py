@@ -1,9 +1,19 @@
+import abc
+import collections
 import datetime
 import json
+import threading
+import time
+import warnings
 
-import sessions
-from . import exceptions
-from . helpers import remove_none
+from concurrent import futures
+
+from . import backends, exceptions, lazy, offload, sessions, validation
+from . instrumentation import Call, Instrumentation, connection_timings
+from . batch import run_batch
+from . checkout import Checkout
+from . helpers import concurrently, iter_json_array, remove_none
+from . transactions import TransactionStream
 
 
 def uppercase_keys(item, *keys):
@@ -15,69 +25,91 @@ def uppercase_keys(item, *keys):
 
 
 def validate_customer(customer):
-    required_fields = (
-        'salutation',
-        'firstname',
-        'lastname',
-        'nationality',
-        'email',
-        'dateofbirth',
-        'internationalcode',
-        'areacode',
-        'phonenumber',
-        'addressline1',
-        'addressline2',
-        'addressline3',
-        'city',
-        'countrycode',
-        'state',
-    )
-    for field in required_fields:
-        if field not in customer:
-            raise exceptions.MissingRequiredCustomerField(
-                'Missing "{0}"'.format(field)
-            )
-    if not two_characters_long(customer.get('countrycode')):
-        raise exceptions.InvalidCustomerField(
-            '{0} needs to be a 2 characters'.format('countrycode')
-        )
-    if not two_characters_long(customer.get('nationality')):
-        raise exceptions.InvalidCustomerField(
-            '{0} needs to be a 2 characters'.format('nationality')
-        )
-
-
-def two_characters_long(data):
-    return True if len(data) == 2 else False
+    """Raise on the errors of a customer payload, without normalizing it."""
+    validation.CUSTOMER.check(customer, normalize=False)
 
 
 class SoftixCore(object):
     """Base class for all Softix objects."""
 
-    def __init__(self):
+    def __init__(self, token_provider=None, cache=None, lazy=False,
+                 baskets=None, offload=None, max_workers=8, flights=None):
         self.access_token = ''
+        self.token_provider = token_provider
+        self.cache = cache
+        self.baskets = baskets
+        self.lazy = lazy
+        self.offload = offload
+        self.max_workers = max_workers
+        self.instrumentation = Instrumentation()
+        self.flights = flights
         self.session = sessions.Session()
+        self._prebuilt_headers = (None, None)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """
+        Pool running the concurrent lookups and batches of this client.
 
-    def basket(self, seller_code, basket_id):
+        It is started on first use, shared by every call and shut down by
+        :meth:`close`.
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers)
+        return self._executor
+
+    def close(self, wait=True):
+        """Shut down the pool and release pooled connections."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        self.session.close()
+
+    def basket(self, seller_code, basket_id, refresh=False):
         """
         Get basket.
 
         An exception may raise if the basket has expired:
           'No basket found for the requested basket id'
+
+        With a basket mirror, baskets created by this client are served
+        locally until stale; ``refresh`` forces a re-read from the API.
         """
-        url = self.build_url('baskets', basket_id)
+        if self.baskets is not None and not refresh:
+            basket = self.baskets.get(seller_code, basket_id)
+            if basket is not None:
+                return basket
+        url = self.session.url('basket', basket_id)
         data = {
             'sellerCode': seller_code
         }
-        response = self._json(self._get(url, params=data), 200)
+        try:
+            response = self._get_json(url, data)
+        except exceptions.SoftixError:
+            if self.baskets is not None:
+                self.baskets.forget(seller_code, basket_id)
+            raise
+        self._mirror(seller_code, response)
         return response
 
     def build_url(self, *urls, **kwargs):
         """Build a url.
 
+        .. deprecated:: URLs of operations are built by
+           :meth:`softix.sessions.Session.url`.
+
         :param string urls: A string of URIS
         :returns `string`
         """
+        warnings.warn('SoftixCore.build_url is deprecated, use '
+                      'SoftixCore.session.url', DeprecationWarning,
+                      stacklevel=2)
         return self.session.build_url(*urls, **kwargs)
 
     def authenticate(self, username, password):
@@ -88,7 +120,7 @@ class SoftixCore(object):
         expiration_date to allow us to create new tokens
         """
         creds = (username, password)
-        url = self.build_url('oauth2', 'accesstoken')
+        url = self.session.url('authenticate')
         data = {
             'grant_type': 'client_credentials'
         }
@@ -105,17 +137,18 @@ class SoftixCore(object):
 
         Section/Area is the group of seats
         """
-        url = self.build_url('baskets', basket_id, 'offers')
+        url = self.session.url('add_offer', basket_id)
         data = {
             'Channel': 'W',
             'Seller': seller_code,
             'Performancecode': performance_code,
             'Area': section,
             'holdcode': '',
-            'Demand': [demand.to_request() for demand in demands],
-            'Fees': [fee.to_request() for fee in fees]
         }
-        response = self._json(self._post(url, data=json.dumps(data)), 201)
+        data = dumps(data, Demand=demands, Fees=fees)
+        response = self._json(self._post(url, data=data), 201)
+        self._invalidate(seller_code, performance_code)
+        self._mirror(seller_code, response)
         return response
 
     def add_offer_with_seats(self, seller_code, basket_id, performance_code,
@@ -124,63 +157,123 @@ class SoftixCore(object):
 
         Section/Area is the group of seats
         """
-        url = self.build_url('baskets', basket_id, 'offers')
+        url = self.session.url('add_offer', basket_id)
         data = {
             'Channel': 'W',
             'Seller': seller_code,
             'Performancecode': performance_code,
             'Area': section,
             'holdcode': '',
-            'Demand': [demand.to_request() for demand in demands],
-            'Fees': [fee.to_request() for fee in fees],
-            'Seats': seat.to_request(),
         }
-        response = self._json(self._post(url, data=json.dumps(data)), 201)
+        data = dumps(data, Demand=demands, Fees=fees, Seats=seat)
+        response = self._json(self._post(url, data=data), 201)
+        self._invalidate(seller_code, performance_code)
+        self._mirror(seller_code, response)
         return response
 
+    def add_offers(self, seller_code, basket_id, offers, max_workers=4):
+        """Add many offers to an existing basket.
+
+        Offers competing for the same performance section are added one
+        after the other in the order given, other offers concurrently.
+
+        :returns: a :class:`softix.batch.BatchResult` per offer, in order
+        """
+        def add(offer):
+            if offer.seat is not None:
+                return self.add_offer_with_seats(
+                    seller_code, basket_id, offer.performance_code,
+                    offer.section, offer.demands, offer.fees, offer.seat)
+            return self.add_offer(seller_code, basket_id,
+                                  offer.performance_code, offer.section,
+                                  offer.demands, offer.fees)
+        return run_batch(add, offers, max_workers=max_workers,
+                         key=lambda offer: offer.area,
+                         executor=self.executor)
+
+    def create_baskets(self, seller_code, offers, customer_id=None,
+                       customer=None, max_workers=4):
+        """Create one basket per offer.
+
+        The customer is resolved once for the whole batch. Offers competing
+        for the same performance section are submitted in the order given.
+
+        :returns: a :class:`softix.batch.BatchResult` per offer, in order
+        """
+        if customer is None and customer_id:
+            customer = self.customer(seller_code, customer_id)
+
+        def create(offer):
+            if offer.seat is not None:
+                return self.create_basket_with_seat(
+                    seller_code, offer.performance_code, offer.section,
+                    offer.demands, offer.fees, offer.seat, customer=customer)
+            return self.create_basket(seller_code, offer.performance_code,
+                                      offer.section, offer.demands,
+                                      offer.fees, customer=customer)
+        return run_batch(create, offers, max_workers=max_workers,
+                         key=lambda offer: offer.area,
+                         executor=self.executor)
+
+    def checkout(self, seller_code, offers, customer_id=None, customer=None,
+                 max_workers=4):
+        """Create a basket of ``offers`` and purchase it.
+
+        The customer is resolved once, offers after the first are added
+        concurrently and the payment is computed from their responses.
+
+        :returns: a :class:`softix.checkout.CheckoutResult`
+        """
+        return Checkout(self, seller_code, offers, customer_id=customer_id,
+                        customer=customer, max_workers=max_workers).run()
+
     def create_basket(self, seller_code, performance_code, section, demands,
-                      fees, customer_id=None):
+                      fees, customer_id=None, customer=None):
         """Create a new basket.
 
-        Section/Area is the group of seats
+        Section/Area is the group of seats. An already resolved ``customer``
+        saves looking it up by ``customer_id``.
         """
-        customer = self.customer(seller_code, customer_id).to_request() if customer_id else None  # NOQA
-        url = self.build_url('baskets')
+        customer = self._customer_request(seller_code, customer_id, customer)
+        url = self.session.url('create_basket')
         data = {
             'Channel': 'W',
             'Seller': seller_code,
             'Performancecode': performance_code,
             'Area': section,
             'holdcode': '',
-            'Demand': [demand.to_request() for demand in demands],
-            'Fees': [fee.to_request() for fee in fees],
             'Customer': customer
         }
         remove_none(data)
-        response = self._json(self._post(url, data=json.dumps(data)), 201)
+        data = dumps(data, Demand=demands, Fees=fees)
+        response = self._json(self._post(url, data=data), 201)
+        self._invalidate(seller_code, performance_code)
+        self._mirror(seller_code, response)
         return response
 
     def create_basket_with_seat(self, seller_code, performance_code, section,
-                                demands, fees, seat, customer_id=None):
+                                demands, fees, seat, customer_id=None,
+                                customer=None):
         """Create a new basket.
 
-        Section/Area is the group of seats
+        Section/Area is the group of seats. An already resolved ``customer``
+        saves looking it up by ``customer_id``.
         """
-        customer = self.customer(seller_code, customer_id).to_request() if customer_id else None  # NOQA
-        url = self.build_url('baskets')
+        customer = self._customer_request(seller_code, customer_id, customer)
+        url = self.session.url('create_basket')
         data = {
             'Channel': 'W',
             'Seller': seller_code,
             'Performancecode': performance_code,
             'Area': section,
             'holdcode': '',
-            'Demand': [demand.to_request() for demand in demands],
-            'Fees': [fee.to_request() for fee in fees],
-            'Seats': seat.to_request(),
             'Customer': customer
         }
         remove_none(data)
-        response = self._json(self._post(url, data=json.dumps(data)), 201)
+        data = dumps(data, Demand=demands, Fees=fees, Seats=seat)
+        response = self._json(self._post(url, data=data), 201)
+        self._invalidate(seller_code, performance_code)
+        self._mirror(seller_code, response)
         return response
 
     def create_customer(self, seller_code, **customer):
@@ -189,100 +282,322 @@ class SoftixCore(object):
         :param string seller_code: (required) Seller code provided by DTCM
         :returns: int id
         """
-        validate_customer(customer)
-        customer = uppercase_keys(customer, 'nationality', 'countrycode')
-        url = self.build_url('customers?sellerCode={0}'.format(seller_code))
+        validation.CUSTOMER.check(customer)
+        url = self.session.url('create_customer', seller_code)
         data = self._json(self._post(url, data=json.dumps(customer)), 200)
         return data
 
     def customer(self, seller_code, customer_id):
-        url = self.build_url('customers', customer_id)
+        url = self.session.url('customer', customer_id)
         data = {
             'sellerCode': seller_code
         }
-        customer = self._json(self._get(url, params=data), 200)
-        return Customer(customer)
+
+        def fetch():
+            customer = self._get_json(url, data)
+            return as_model(Customer, customer)
+        return self._cached(fetch, seller_code, customer_id, 'customer')
 
     def order(self, seller_code, order_id):
         """View order details."""
-        url = self.build_url('orders', order_id)
+        url = self.session.url('order', order_id)
         data = {
             'sellerCode': seller_code
         }
-        order = self._json(self._get(url, params=data), 200)
-        return order
+
+        def fetch():
+            return self._get_json(url, data, shared=True)
+        return self._cached(fetch, seller_code, order_id, 'order')
+
+    def order_columns(self, seller_code, order_id):
+        """
+        Get the order id, line item, net and timestamp columns of an order,
+        as :func:`softix.offload.order_line_items`.
+
+        With an offload, large orders are decoded and reduced to the columns
+        in a worker process. The columns are not cached.
+        """
+        url = self.session.url('order', order_id)
+        data = {
+            'sellerCode': seller_code
+        }
+        return self._json(self._get(url, params=data), 200,
+                          offload.order_line_items)
 
     def transaction_sync(self, seller_code, from_date, to_date):
         """Get transactions list."""
-        url = self.build_url('dcal', 'transync', from_date, to_date)
+        url = self.session.url('transaction_sync', from_date, to_date)
         data = {
             'sellerCode': seller_code
         }
         transactions = self._json(self._get(url, params=data), 201)
         return transactions
 
+    def transaction_columns(self, seller_code, from_date, to_date,
+                            fields=offload.TRANSACTION_FIELDS):
+        """
+        Get the order id, line item, net and timestamp columns of the
+        transactions, as :func:`softix.offload.transaction_columns`.
+
+        With an offload, large responses are decoded and reduced to the
+        columns in a worker process.
+        """
+        url = self.session.url('transaction_sync', from_date, to_date)
+        data = {
+            'sellerCode': seller_code
+        }
+        return self._json(self._get(url, params=data), 201,
+                          offload.transaction_reducer(fields))
+
+    def iter_transaction_sync(self, seller_code, from_date, to_date,
+                              window_days=1, workers=4, checkpoint=None,
+                              store=None):
+        """Iterate over transactions, fetching the range window by window.
+
+        Dates are ``datetime.date`` objects or ``YYYY-MM-DD`` strings. Pass a
+        :class:`softix.transactions.Checkpoint` to resume an interrupted
+        sync after the last window that was fully consumed, or a
+        :class:`softix.snapshots.SnapshotStore` to only fetch the days not
+        stored yet.
+        """
+        return TransactionStream(self, seller_code, from_date, to_date,
+                                 window_days=window_days, workers=workers,
+                                 checkpoint=checkpoint, store=store)
+
     def performance_availabilities(self, seller_code, performance_code):
         """Retrieve performance price availabilities."""
-        url = self.build_url('performances', performance_code,
-                             'availabilities')
+        url = self.session.url('performance_availabilities', performance_code)
         data = {'channel': 'W', 'sellerCode': seller_code}
-        availabilities = self._json(self._get(url, params=data), 200)
-        return availabilities
+
+        def fetch():
+            return self._get_json(url, data, shared=True)
+        return self._cached(fetch, seller_code, performance_code,
+                            'availabilities')
 
     def performance_prices(self, seller_code, performance_code):
         """Retrieve performance prices."""
-        url = self.build_url('performances', performance_code, 'prices')
+        url = self.session.url('performance_prices', performance_code)
         data = {'channel': 'W', 'sellerCode': seller_code}
-        prices = self._json(self._get(url, params=data), 200)
-        return prices
-
-    def purchase_basket(self, seller_code, basket_id, customer_id=None):
-        """Purchase a basket."""
-        url = self.build_url('Baskets', basket_id, 'purchase')
-        basket = Basket(self.basket(seller_code, basket_id))
-        customer = self.customer(seller_code, customer_id).to_request() if customer_id else None  # NOQA
+
+        def fetch():
+            return self._get_json(url, data, shared=True)
+        return self._cached(fetch, seller_code, performance_code, 'prices')
+
+    def purchase_basket(self, seller_code, basket_id, customer_id=None,
+                        customer=None, basket=None):
+        """Purchase a basket.
+
+        Passing the ``basket`` and ``customer`` already at hand saves looking
+        them up; when both have to be fetched, they are fetched in parallel.
+        """
+        url = self.session.url('purchase_basket', basket_id)
+        if basket is None and customer is None and customer_id:
+            basket, customer = concurrently(
+                lambda: self.basket(seller_code, basket_id),
+                lambda: self.customer(seller_code, customer_id),
+                executor=self.executor)
+        elif basket is None:
+            basket = self.basket(seller_code, basket_id)
+        basket = as_model(Basket, basket)
+        customer = self._customer_request(seller_code, customer_id, customer)
         data = {
             'Seller': seller_code,
-            'Payments': [Payment(basket.total).to_request()],
             'customer': customer
         }
         remove_none(data)
-        response = self._json(self._post(url, data=json.dumps(data)), 201)
+        data = dumps(data, Payments=[Payment(basket.total)])
+        response = self._json(self._post(url, data=data), 201)
+        for offer in basket.offers:
+            self._invalidate(seller_code, offer.get('PerformanceCode'))
+        if self.baskets is not None:
+            self.baskets.forget(seller_code, basket_id)
         return response
 
     def reverse_order(self, seller_code, order_id, total):
         """Reverse an order that was once purchased."""
         # order = Order(self.order(seller_code, order_id))
-        url = self.build_url('orders', order_id, 'reverse')
+        url = self.session.url('reverse_order', order_id)
         data = {
             'Seller': seller_code,
             # 'refunds': [Payment(order.total).to_request()]
             'refunds': total
         }
         response = self._post(url, data=json.dumps(data))
-        self.is_response_successful(response, 204)
+        try:
+            self.is_response_successful(response, 204)
+        finally:
+            self._finish(response)
+        self._invalidate(seller_code, order_id, 'order')
         return
 
-    def _get(self, url, **kwargs):
-        default_headers = {
-            'Authorization': 'Bearer {0}'.format(self.access_token),
-            'Content-Type': 'application/json'
+    def _stream_transactions(self, seller_code, from_date, to_date):
+        url = self.session.url('transaction_sync', from_date, to_date)
+        data = {
+            'sellerCode': seller_code
         }
-        kwargs['headers'] = kwargs.get('headers', default_headers)
-        return self.session.get(url, **kwargs)
+        response = self._get(url, params=data, stream=True)
+        try:
+            if not self.is_response_successful(response, 201):
+                return iter(())
+        finally:
+            self._finish(response)
+        return iter_json_array(response.iter_content(chunk_size=65536))
+
+    def _customer_request(self, seller_code, customer_id, customer):
+        if customer is None:
+            if not customer_id:
+                return None
+            customer = self.customer(seller_code, customer_id)
+        else:
+            customer = as_model(Customer, customer)
+        return customer.to_request()
+
+    def _cached(self, fetch, seller_code, code, endpoint):
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_fetch((seller_code, code, endpoint), fetch)
+
+    def _invalidate(self, seller_code, code, *endpoints):
+        if self.cache is not None:
+            self.cache.invalidate(seller_code, code, endpoints)
+
+    def _mirror(self, seller_code, basket):
+        if self.baskets is not None and basket:
+            self.baskets.update(seller_code, basket)
+
+    def _get_json(self, url, params, status_code=200, shared=False):
+        """
+        GET and parse ``url``.
+
+        With :attr:`flights`, concurrent ``shared`` lookups of the same url
+        and params share one request and its parsed response, which must
+        therefore not be mutated. Baskets and customers are never shared:
+        a lookup started before this client's own write would miss it.
+        """
+        if not shared or self.flights is None:
+            return self._json(self._get(url, params=params), status_code)
+        key = (url, tuple(sorted(params.items())))
+        return self.flights.do(
+            key, lambda: self._json(self._get(url, params=params),
+                                    status_code))
+
+    def _get(self, url, **kwargs):
+        if self.instrumentation.hooks:
+            return self._instrumented('GET', self.session.get, url, **kwargs)
+        return self._request(self.session.get, url, **kwargs)
 
     def _post(self, url, **kwargs):
-        default_headers = {
-            'Authorization': 'Bearer {0}'.format(self.access_token),
-            'Content-Type': 'application/json'
-        }
-        kwargs['headers'] = kwargs.get('headers', default_headers)
-        return self.session.post(url, **kwargs)
+        if self.instrumentation.hooks:
+            return self._instrumented('POST', self.session.post, url,
+                                      **kwargs)
+        return self._request(self.session.post, url, **kwargs)
+
+    def _instrumented(self, method, send, url, **kwargs):
+        """
+        Send a request and attach its :class:`Call` to the response.
+
+        The call is emitted to the instrumentation hooks once the response
+        has been handled, by ``_json`` or ``_finish``.
+        """
+        data = kwargs.get('data')
+        call = Call(self.session.operation(method, url), method, url,
+                    len(data) if isinstance(data, (str, bytes)) else 0)
+        timings = connection_timings()
+        timings.clear()
+        try:
+            response = self._request(send, url, **kwargs)
+        except Exception:
+            self.instrumentation.emit(call)
+            raise
+        call.timings.update(timings)
+        if response is not None:
+            call.status_code = response.status_code
+            call.timings['server'] = response.elapsed.total_seconds()
+            if kwargs.get('stream'):
+                length = response.headers.get('Content-Length')
+                call.response_bytes = int(length) if length else 0
+            else:
+                call.response_bytes = len(response.content or b'')
+            response.softix_call = call
+        else:
+            self.instrumentation.emit(call)
+        return response
+
+    def _call(self, response):
+        call = getattr(response, 'softix_call', None)
+        return call if isinstance(call, Call) else None
+
+    def _finish(self, response):
+        """Emit the call of an instrumented response."""
+        call = self._call(response)
+        if call is not None:
+            del response.softix_call
+            self.instrumentation.emit(call)
+
+    def _request(self, send, url, **kwargs):
+        """
+        Send a request with the current access token.
 
-    def _json(self, response, status_code):
+        When a token provider is set and the token is rejected with a 401,
+        the token is refreshed and the request is retried once.
+        """
+        if 'headers' in kwargs:
+            return send(url, **kwargs)
+        token = self._access_token()
+        response = send(url, headers=self._headers(token), **kwargs)
+        if (self.token_provider is not None and response is not None and
+                response.status_code == 401):
+            token = self.token_provider.refresh(stale_token=token).access_token  # NOQA
+            response = send(url, headers=self._headers(token), **kwargs)
+        return response
+
+    def _access_token(self):
+        if self.token_provider is not None:
+            return self.token_provider.access_token
+        return self.access_token
+
+    def _headers(self, access_token):
+        """
+        Return the request headers for ``access_token``.
+
+        They are built once per token and shared by every request until the
+        token changes; the pair is swapped in a single assignment, so
+        concurrent callers never see headers of another token.
+        """
+        token, headers = self._prebuilt_headers
+        if token != access_token or headers is None:
+            headers = {
+                'Authorization': 'Bearer {0}'.format(access_token),
+                'Content-Type': 'application/json'
+            }
+            self._prebuilt_headers = (access_token, headers)
+        return headers
+
+    def _json(self, response, status_code, reducer=None):
+        """
+        Parse a successful response, then apply ``reducer`` to it.
+
+        With an offload, reduced responses are parsed and reduced by
+        :meth:`softix.offload.ProcessOffload.decode`, which moves large
+        ones to its process pool.
+        """
         data = None
-        if self.is_response_successful(response, status_code):
-            data = response.json()
+        call = self._call(response)
+        try:
+            if self.is_response_successful(response, status_code):
+                started = time.time()
+                if reducer is None and self.lazy:
+                    data = lazy.parse(response.content)
+                elif reducer is not None and self.offload is not None:
+                    data = self.offload.decode(response.content, reducer)
+                else:
+                    data = response.json()
+                    if reducer is not None:
+                        data = reducer(data)
+                if call is not None:
+                    call.timings['parse'] = time.time() - started
+        finally:
+            self._finish(response)
         return data
 
     def is_response_successful(self, response, expected_status_code):
@@ -295,12 +610,69 @@ class SoftixCore(object):
         return False
 
 
-class Demand(object):
+class RequestModel(backends._ABC):
+    """
+    Immutable value object sent as part of a request payload.
+
+    Its JSON encoding is computed once and spliced into payloads by
+    :func:`dumps`, so the same demand or fee can be submitted any number of
+    times without being encoded again.
+    """
+    __slots__ = ('_json',)
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_json', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            '{0} is immutable'.format(type(self).__name__))
+
+    __delattr__ = __setattr__
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_json() == other.to_json()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.to_json())
+
+    def __repr__(self):
+        return '<{0} {1}>'.format(type(self).__name__, self.to_json())
+
+    def __getstate__(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        RequestModel.__init__(self, **state)
+
+    def to_json(self):
+        if self._json is None:
+            object.__setattr__(self, '_json', json.dumps(self.to_request()))
+        return self._json
+
+    @abc.abstractmethod
+    def to_request(self):
+        """Return the payload of the model, as a JSON-serializable dict."""
+
+
+class Demand(RequestModel):
+    __slots__ = ('price_type_code', 'quantity', 'admits')
 
     def __init__(self, price_type_code, quantity, admits):
-        self.price_type_code = str(price_type_code)
-        self.quantity = int(quantity)
-        self.admits = int(admits)
+        demand = validation.DEMAND.check({
+            'PriceTypeCode': price_type_code,
+            'Quantity': quantity,
+            'Admits': admits,
+        })
+        super(Demand, self).__init__(
+            price_type_code=demand['PriceTypeCode'],
+            quantity=demand['Quantity'],
+            admits=demand['Admits'],
+        )
 
     def to_request(self):
         request = {
@@ -312,12 +684,14 @@ class Demand(object):
         return request
 
 
-class Seat(object):
+class Seat(RequestModel):
+    __slots__ = ('section', 'row', 'seats')
 
     def __init__(self, section, row, seats):
-        self.section = section
-        self.row = row
-        self.seats = seats
+        seat = validation.SEAT.check({
+            'Section': section, 'Row': row, 'Seats': seats})
+        super(Seat, self).__init__(section=seat['Section'], row=seat['Row'],
+                                   seats=seat['Seats'])
 
     def to_request(self):
         request = {
@@ -328,11 +702,12 @@ class Seat(object):
         return request
 
 
-class Fee(object):
+class Fee(RequestModel):
+    __slots__ = ('type', 'code')
 
     def __init__(self, fee_type, code):
-        self.type = fee_type
-        self.code = code
+        fee = validation.FEE.check({'Type': fee_type, 'Code': code})
+        super(Fee, self).__init__(type=fee['Type'], code=fee['Code'])
 
     def to_request(self):
         fee = {
@@ -342,11 +717,12 @@ class Fee(object):
         return fee
 
 
-class Payment(object):
+class Payment(RequestModel):
+    __slots__ = ('amount', 'means_of_payment')
 
     def __init__(self, amount, means_of_payment='EXTERNAL'):
-        self.amount = amount
-        self.means_of_payment = means_of_payment
+        super(Payment, self).__init__(amount=amount,
+                                      means_of_payment=means_of_payment)
 
     def to_request(self):
         request = {
@@ -356,6 +732,42 @@ class Payment(object):
         return request
 
 
+class Offer(collections.namedtuple(
+        'Offer', 'performance_code section demands fees seat')):
+    """An offer to add to a basket, as used by the batch operations."""
+
+    __slots__ = ()
+
+    def __new__(cls, performance_code, section, demands, fees, seat=None):
+        return super(Offer, cls).__new__(cls, performance_code, section,
+                                         tuple(demands), tuple(fees), seat)
+
+    @property
+    def area(self):
+        return (self.performance_code, self.section)
+
+
+def dumps(payload, **fragments):
+    """
+    Encode a request payload.
+
+    Request models given as ``fragments``, alone or in lists, are spliced
+    into the encoded ``payload`` from their cached encoding instead of
+    being encoded again.
+    """
+    encoded = json.dumps(payload)
+    if not fragments:
+        return encoded
+    members = [encoded[1:-1]] if payload else []
+    for key, value in fragments.items():
+        if isinstance(value, RequestModel):
+            members.append('"{0}": {1}'.format(key, value.to_json()))
+        else:
+            members.append('"{0}": [{1}]'.format(
+                key, ', '.join([item.to_json() for item in value])))
+    return '{' + ', '.join(members) + '}'
+
+
 class Authentication(dict):
 
     def __init__(self, data):
@@ -365,6 +777,7 @@ class Authentication(dict):
         now = datetime.datetime.utcnow()
         expires_in = data['expires_in']
         expiration_date = now + datetime.timedelta(0, expires_in)
+        self.expires_at = expiration_date
         self.update({
             'expiration_date': expiration_date.isoformat()
         })
@@ -436,3 +849,25 @@ class Order(dict):
 
     def net(self, line_item):
         return line_item['Price']['Net']
+
+
+LazyCustomer = lazy.lazy_model(Customer)
+LazyBasket = lazy.lazy_model(Basket)
+LazyOrder = lazy.lazy_model(Order)
+LAZY_MODELS = {
+    Customer: LazyCustomer,
+    Basket: LazyBasket,
+    Order: LazyOrder,
+}
+backends.register(Customer, Basket, Order,
+                  LazyCustomer, LazyBasket, LazyOrder)
+
+
+def as_model(model, data):
+    """Wrap ``data`` in ``model``, or its lazy counterpart if lazy."""
+    lazy_model = LAZY_MODELS[model]
+    if isinstance(data, (model, lazy_model)):
+        return data
+    if isinstance(data, lazy.LazyJSON):
+        return lazy_model(data.content)
+    return model(data)
@@ -0,0 +1,182 @@
+"""
+Reduction of large responses in a process pool.
+
+A :class:`ProcessOffload` decodes response bodies above a size threshold in
+a worker process, reduces the decoded value there to what the caller needs,
+such as the :func:`transaction_columns` of a transaction sync or the
+:func:`order_columns` of an order, and sends the
+result back packed: lists of objects sharing the same keys travel as one
+tuple of keys and a tuple of values per object instead of a dict each.
+
+Whole responses are always decoded in the calling process: unpickling and
+rebuilding a decoded response costs more than decoding the JSON again.
+"""
+import collections
+import functools
+import threading
+
+from concurrent import futures
+
+from . import lazy
+
+#: Transaction fields read as order id, line item, net price and timestamp
+TRANSACTION_FIELDS = ('OrderId', 'Id', 'Net', 'DateTime')
+
+
+class Table(collections.namedtuple('Table', 'keys rows')):
+    """A packed list of objects sharing the same ``keys``."""
+
+    __slots__ = ()
+
+
+def pack(value):
+    """Pack the lists of uniform objects of a decoded value."""
+    if isinstance(value, dict):
+        return dict((key, pack(item)) for key, item in value.items())
+    if isinstance(value, list):
+        if len(value) > 1 and all(isinstance(item, dict) for item in value):
+            keys = tuple(value[0])
+            key_set = set(keys)
+            if all(len(item) == len(keys) and key_set.issuperset(item)
+                   for item in value):
+                return Table(keys, tuple(
+                    tuple(pack(item[key]) for key in keys)
+                    for item in value))
+        return [pack(item) for item in value]
+    return value
+
+
+def unpack(value):
+    """Restore a value packed by :func:`pack`."""
+    if isinstance(value, Table):
+        keys = value.keys
+        return [dict(zip(keys, [unpack(item) for item in row]))
+                for row in value.rows]
+    if isinstance(value, dict):
+        return dict((key, unpack(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return [unpack(item) for item in value]
+    return value
+
+
+def decode(content, reducer=None):
+    """
+    Decode ``content``, reduce it and pack the result.
+
+    This is what runs in the worker processes, so ``reducer`` must be
+    picklable: a module level function or a ``functools.partial`` of one.
+    """
+    data = lazy.loads(content)
+    if reducer is not None:
+        data = reducer(data)
+    return pack(data)
+
+
+def transaction_columns(transactions, fields=TRANSACTION_FIELDS):
+    """
+    Reduce transactions to order id, line item, net and timestamp columns.
+
+    The columns are what :class:`softix.reconciliation.LineItems` is built
+    from.
+    """
+    order_field, line_item_field, net_field, time_field = fields
+    columns = ([], [], [], [])
+    for transaction in transactions or ():
+        columns[0].append(str(transaction[order_field]))
+        columns[1].append(transaction.get(line_item_field))
+        columns[2].append(transaction.get(net_field) or 0)
+        columns[3].append(transaction.get(time_field))
+    return columns
+
+
+def order_columns(orders):
+    """
+    Reduce orders to order id, line item, net and timestamp columns.
+
+    These are the columns of :func:`transaction_columns`, read from the
+    ``OrderLineItems`` of each order.
+    """
+    columns = ([], [], [], [])
+    for order in orders:
+        for item in order.get('OrderItems') or ():
+            for line_item in item.get('OrderLineItems') or ():
+                columns[0].append(str(order['Id']))
+                columns[1].append(line_item.get('Id'))
+                columns[2].append((line_item.get('Price') or {})
+                                  .get('Net') or 0)
+                columns[3].append(line_item.get('DateTime'))
+    return columns
+
+
+def order_line_items(order):
+    """Reduce one order to its :func:`order_columns`."""
+    return order_columns([order])
+
+
+def transaction_reducer(fields=TRANSACTION_FIELDS):
+    """Return a picklable :func:`transaction_columns` for ``fields``."""
+    if tuple(fields) == TRANSACTION_FIELDS:
+        return transaction_columns
+    return functools.partial(transaction_columns, fields=tuple(fields))
+
+
+class ProcessOffload(object):
+    """
+    Decode and reduce responses of at least ``threshold`` bytes in a
+    process pool.
+
+    Smaller responses, and responses without a reducer, are decoded in the
+    calling thread. Pass an ``executor`` to share a pool, otherwise one of
+    ``max_workers`` processes is started on first use and shut down by
+    :meth:`close`.
+    """
+
+    def __init__(self, threshold=256 * 1024, max_workers=None,
+                 executor=None):
+        self.threshold = threshold
+        self.max_workers = max_workers
+        self.offloaded = 0
+        self.local = 0
+        self._executor = executor
+        self._owned = executor is None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = futures.ProcessPoolExecutor(
+                        max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, content, reducer=None):
+        """
+        Decode ``content`` in the pool.
+
+        :returns: a future of the packed result, see :func:`unpack`
+        """
+        with self._lock:
+            self.offloaded += 1
+        return self.executor.submit(decode, content, reducer)
+
+    def decode(self, content, reducer=None):
+        """Decode and reduce ``content``, in the pool if it is large."""
+        if reducer is None or len(content) < self.threshold:
+            with self._lock:
+                self.local += 1
+            data = lazy.loads(content)
+            return data if reducer is None else reducer(data)
+        return unpack(self.submit(content, reducer).result())
+
+    def close(self):
+        with self._lock:
+            if self._owned and self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,289 @@
+"""
+Availability change feed.
+
+An :class:`AvailabilityPoller` polls ``performance_availabilities`` for many
+performances, diffs each response against the previous one and hands only
+the changes to its subscribers.
+"""
+import collections
+import heapq
+import logging
+import threading
+import time
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from concurrent import futures
+
+log = logging.getLogger(__name__)
+
+#: Keys identifying the items of a list, e.g. the price categories
+IDENTITY_KEYS = ('PriceCategoryCode', 'PriceCategoryId', 'Id')
+
+
+class Change(collections.namedtuple('Change', 'path old new')):
+    """
+    A value that changed at ``path``, a tuple of keys.
+
+    Items of lists are keyed by their identity (see :data:`IDENTITY_KEYS`)
+    when they have one, by index otherwise. An added value has an ``old`` of
+    ``None`` and a removed one a ``new`` of ``None``.
+    """
+
+    __slots__ = ()
+
+
+def _identity(item, index):
+    if isinstance(item, dict):
+        for key in IDENTITY_KEYS:
+            if item.get(key) is not None:
+                return item[key]
+    return index
+
+
+def diff(old, new, path=()):
+    """Return the :class:`Change` list turning ``old`` into ``new``."""
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in sorted(set(old) | set(new), key=str):
+            changes.extend(diff(old.get(key), new.get(key), path + (key,)))
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        old = collections.OrderedDict(
+            (_identity(item, index), item) for index, item in enumerate(old))
+        new = collections.OrderedDict(
+            (_identity(item, index), item) for index, item in enumerate(new))
+        changes = []
+        for key in list(old) + [key for key in new if key not in old]:
+            changes.extend(diff(old.get(key), new.get(key), path + (key,)))
+        return changes
+    return [Change(path, old, new)]
+
+
+def sold_out_ratio(availabilities):
+    """Return the share of price categories that are sold out."""
+    categories = availabilities.get('PriceCategories') or ()
+    if not categories:
+        return 0.0
+    sold_out = sum(1 for category in categories
+                   if (category.get('Availability') or {}).get('SoldOut'))
+    return float(sold_out) / len(categories)
+
+
+class Changes(object):
+    """
+    Iterator over the notifications of an :class:`AvailabilityPoller`.
+
+    Notifications are queued from its creation on. Iteration stops when the
+    poller is stopped or after ``timeout`` seconds without a notification;
+    :meth:`close` stops it earlier.
+    """
+
+    def __init__(self, poller, timeout=None):
+        self.timeout = timeout
+        self._poller = poller
+        self._queue = queue.Queue()
+        poller._queues.append(self._queue)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._queue is not None and not self._poller._stopped.is_set():
+            try:
+                notification = self._queue.get(timeout=self.timeout)
+            except queue.Empty:
+                notification = None
+            if notification is not None:
+                return notification
+        self.close()
+        raise StopIteration
+
+    next = __next__
+
+    def close(self):
+        """Stop queueing notifications."""
+        if self._queue is not None:
+            self._poller._queues.remove(self._queue)
+            self._queue = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AvailabilityPoller(object):
+    """
+    Poll the availabilities of performances with adaptive intervals.
+
+    A performance whose availability changed, or that is partly sold out,
+    is polled again after ``min_interval`` seconds; each poll without
+    changes stretches its interval by ``backoff`` up to ``max_interval``.
+    At most ``max_workers`` polls run at once.
+
+    Subscribers are called with ``(performance_code, changes)``; the first
+    poll of a performance reports its whole availability as one change at
+    the empty path. :meth:`changes` iterates over the same notifications.
+    A failing subscriber is logged and does not fail the poll.
+    """
+
+    def __init__(self, client, seller_code, performance_codes=(),
+                 min_interval=1.0, max_interval=60.0, backoff=1.5,
+                 max_workers=4):
+        self.client = client
+        self.seller_code = seller_code
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.snapshots = {}
+        self.intervals = {}
+        self.polls = 0
+        self.errors = 0
+        self._subscribers = []
+        self._queues = []
+        self._schedule = []
+        self._generations = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._executor = None
+        for performance_code in performance_codes:
+            self.add(performance_code)
+
+    def add(self, performance_code):
+        with self._lock:
+            if performance_code not in self.intervals:
+                self._generation += 1
+                self._generations[performance_code] = self._generation
+                self.intervals[performance_code] = self.min_interval
+                heapq.heappush(self._schedule,
+                               (0, performance_code, self._generation))
+        self._wakeup.set()
+
+    def remove(self, performance_code):
+        with self._lock:
+            self.intervals.pop(performance_code, None)
+            self.snapshots.pop(performance_code, None)
+            self._generations.pop(performance_code, None)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def changes(self, timeout=None):
+        """
+        Return a :class:`Changes` iterator over ``(performance_code,
+        changes)`` notifications sent from now on.
+        """
+        return Changes(self, timeout)
+
+    def poll(self, performance_code):
+        """Poll one performance now and return its changes."""
+        availabilities = self.client.performance_availabilities(
+            self.seller_code, performance_code)
+        with self._lock:
+            previous = self.snapshots.get(performance_code)
+            self.snapshots[performance_code] = availabilities
+            self.polls += 1
+        if previous is None:
+            changes = [Change((), None, availabilities)]
+        else:
+            changes = diff(previous, availabilities)
+        if changes:
+            self._notify(performance_code, changes)
+        return changes
+
+    def interval(self, performance_code, changes, availabilities):
+        """Return the delay before the next poll of a performance."""
+        interval = self.intervals.get(performance_code, self.min_interval)
+        if changes or 0 < sold_out_ratio(availabilities) < 1:
+            return self.min_interval
+        return min(self.max_interval, interval * self.backoff)
+
+    def start(self):
+        self._stopped.clear()
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for notifications in list(self._queues):
+            notifications.put(None)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            due = []
+            with self._lock:
+                now = time.time()
+                while self._schedule and self._schedule[0][0] <= now:
+                    _, performance_code, generation = heapq.heappop(
+                        self._schedule)
+                    if self._generations.get(performance_code) == generation:
+                        due.append((performance_code, generation))
+                delay = (self._schedule[0][0] - now if self._schedule
+                         else None)
+            for performance_code, generation in due:
+                self._executor.submit(self._poll_and_reschedule,
+                                      performance_code, generation)
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def _poll_and_reschedule(self, performance_code, generation):
+        if self._stopped.is_set():
+            return
+        try:
+            changes = self.poll(performance_code)
+        except Exception:
+            changes = None
+        with self._lock:
+            if changes is None:
+                self.errors += 1
+                interval = self.max_interval
+            else:
+                interval = self.interval(
+                    performance_code, changes,
+                    self.snapshots.get(performance_code) or {})
+            if self._generations.get(performance_code) != generation:
+                return
+            self.intervals[performance_code] = interval
+            heapq.heappush(self._schedule, (time.time() + interval,
+                                            performance_code, generation))
+        self._wakeup.set()
+
+    def _notify(self, performance_code, changes):
+        for callback in list(self._subscribers):
+            try:
+                callback(performance_code, changes)
+            except Exception:
+                log.exception('Availability subscriber %r failed', callback)
+        for notifications in list(self._queues):
+            notifications.put((performance_code, changes))
@@ -0,0 +1,151 @@
+"""
+Local price quotes from ``performance_prices`` responses.
+
+A :class:`PriceTable` indexes ticket prices by performance, price category
+and price type, and offer fees by performance, fee type and fee code, so an
+offer can be priced without creating a basket.
+"""
+import collections
+
+from . import exceptions
+from .batch import attempt
+
+
+class Quote(collections.namedtuple('Quote', 'net fees')):
+    """The ``net`` ticket price and the ``fees`` of an offer."""
+
+    __slots__ = ()
+
+    @property
+    def total(self):
+        return self.net + self.fees
+
+
+class PriceTable(object):
+    """
+    Prices of performances, refreshed one performance at a time.
+
+    Offers name a section while prices are per price category, so sections
+    are mapped to categories with :meth:`add_sections` or learnt from
+    basket responses with :meth:`learn`. A section that is itself a price
+    category code is used as is.
+
+    The fees an offer selects by type and code are charged once per offer
+    from the offer prices, and once per ticket from the fees of its ticket
+    prices, except fees already inside their net price.
+    """
+
+    def __init__(self):
+        self._prices = {}
+        self._fees = {}
+        self._sections = {}
+        self._indexes = {}
+
+    def __contains__(self, performance_code):
+        return performance_code in self._indexes
+
+    def update(self, performance_code, prices):
+        """
+        Index the ``performance_prices`` response of a performance.
+
+        Returns whether its prices changed; other performances are left
+        untouched.
+        """
+        index = self._index(prices)
+        if self._indexes.get(performance_code) == index:
+            return False
+        ticket_prices, fees = self._indexes.get(performance_code, ({}, {}))
+        for key in ticket_prices:
+            self._prices.pop((performance_code,) + key, None)
+        for key in fees:
+            self._fees.pop((performance_code,) + key, None)
+        ticket_prices, fees = index
+        for key, price in ticket_prices.items():
+            self._prices[(performance_code,) + key] = price
+        for key, total in fees.items():
+            self._fees[(performance_code,) + key] = total
+        self._indexes[performance_code] = index
+        return True
+
+    def refresh(self, client, seller_code, performance_codes=None):
+        """Fetch prices again and return the performances that changed."""
+        if performance_codes is None:
+            performance_codes = list(self._indexes)
+        return [code for code in performance_codes if self.update(
+            code, client.performance_prices(seller_code, code))]
+
+    def add_sections(self, performance_code, sections):
+        """Map sections of a performance to their price category codes."""
+        for section, price_category in sections.items():
+            self._sections[(performance_code, section)] = price_category
+
+    def learn(self, basket):
+        """Map the sections of a basket's offers to their categories."""
+        for offer in basket.get('Offers') or ():
+            for seats in offer.get('Seats') or ():
+                self._sections[(offer['PerformanceCode'],
+                                seats['Section'])] = offer['PriceCategoryCode']
+
+    def price_category(self, performance_code, section):
+        return self._sections.get((performance_code, section), section)
+
+    def quote(self, offer):
+        """
+        Price a :class:`softix.models.Offer`.
+
+        Raises :class:`softix.exceptions.QuoteError` when a price or a fee
+        is not in the table.
+        """
+        performance_code = offer.performance_code
+        category = self.price_category(performance_code, offer.section)
+        net = fees = 0
+        ticket_fees = set()
+        for demand in offer.demands:
+            key = (performance_code, category, demand.price_type_code)
+            try:
+                price_net, price_fees = self._prices[key]
+            except KeyError:
+                raise exceptions.QuoteError(
+                    'No price for {0} {1} {2}'.format(*key))
+            net += price_net * demand.quantity
+            for fee in offer.fees:
+                fee_key = (fee.type, fee.code)
+                if fee_key in price_fees:
+                    fees += price_fees[fee_key] * demand.quantity
+                    ticket_fees.add(fee_key)
+        for fee in offer.fees:
+            key = (performance_code, fee.type, fee.code)
+            if key in self._fees:
+                fees += self._fees[key]
+            elif key[1:] not in ticket_fees:
+                raise exceptions.QuoteError(
+                    'No fee for {0} {1} {2}'.format(*key))
+        return Quote(net, fees)
+
+    def quote_many(self, offers):
+        """
+        Price many offers.
+
+        :returns: a :class:`softix.batch.BatchResult` per offer, in order
+        """
+        return [attempt(self.quote, offer) for offer in offers]
+
+    def _index(self, prices):
+        ticket_prices = {}
+        for price in (prices.get('TicketPrices') or {}).get('Prices') or ():
+            ticket_prices[(price['PriceCategoryCode'],
+                           price['PriceTypeCode'])] = (
+                price['PriceNet'], _fees(price.get('FeeTypes'), inside=False))
+        offer_prices = prices.get('OfferPrices') or {}
+        return ticket_prices, _fees(offer_prices.get('FeeTypes'))
+
+
+def _fees(fee_types, inside=True):
+    """Index fee totals by fee type and code, the alternatives of a type."""
+    fees = {}
+    for fee_type in fee_types or ():
+        if not inside and fee_type.get('Inside'):
+            continue
+        for fee in fee_type.get('FeesDetailed') or ():
+            fees[(fee_type['FeeType'], fee['FeeCode'])] = fee['FeeTotal']
+    return fees
@@ -0,0 +1,184 @@
+"""
+Client side rate limiting of Softix calls.
+
+DTCM limits each seller's request rate. A :class:`RateLimiter` keeps a token
+bucket per seller code and hands out tokens by priority, so purchases go
+ahead of background syncs and price polling when the seller is at its limit.
+"""
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+from . import exceptions
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+#: Priority by SoftixCore operation, see ``sessions.OPERATIONS``
+PRIORITIES = {
+    'purchase_basket': HIGH,
+    'create_basket': HIGH,
+    'add_offer': HIGH,
+    'reverse_order': HIGH,
+    'transaction_sync': LOW,
+    'performance_prices': LOW,
+    'performance_availabilities': LOW,
+}
+
+THROTTLE_STATUSES = frozenset([429, 503])
+
+
+class TokenBucket(object):
+    """
+    Allow ``rate`` calls per second with bursts of up to ``burst`` calls.
+
+    Not thread safe, :class:`RateLimiter` serializes access.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = self.max_rate = float(rate)
+        self.burst = burst
+        self.tokens = float(burst)
+        self.paused_until = 0
+        self.updated = time.time()
+
+    def take(self, now):
+        """Take a token and return 0, or the seconds until one is due."""
+        self.tokens = min(self.burst, self.tokens +
+                          (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class Stats(object):
+    __slots__ = ('calls', 'waited', 'max_wait')
+
+    def __init__(self):
+        self.calls = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    def as_dict(self):
+        return {'calls': self.calls, 'waited': self.waited,
+                'max_wait': self.max_wait}
+
+
+class RateLimiter(object):
+    """
+    Token bucket per seller code with priority ordered waiting.
+
+    Calls waiting on the same seller are granted tokens by priority (see
+    :data:`PRIORITIES`, lower first), then in arrival order. When the API
+    throttles a seller with a 429 or 503, its rate is halved down to
+    ``min_rate`` and any ``Retry-After`` is honoured; each successful call
+    recovers ``recovery`` calls per second of the configured rate.
+    """
+
+    def __init__(self, rate=10, burst=None, min_rate=0.5, recovery=0.1,
+                 priorities=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.priorities = dict(PRIORITIES, **(priorities or {}))
+        self.throttles = 0
+        self.max_queue_depth = 0
+        self._buckets = {}
+        self._waiting = collections.defaultdict(list)
+        self._tickets = itertools.count()
+        self._waits = collections.defaultdict(Stats)
+        self._condition = threading.Condition()
+
+    @property
+    def queue_depth(self):
+        return sum(len(waiting) for waiting in self._waiting.values())
+
+    @property
+    def stats(self):
+        with self._condition:
+            return {
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'throttles': self.throttles,
+                'rates': dict((seller, bucket.rate) for seller, bucket
+                              in self._buckets.items()),
+                'waits': dict((operation, stats.as_dict()) for
+                              operation, stats in self._waits.items()),
+            }
+
+    def priority(self, operation):
+        return self.priorities.get(operation, NORMAL)
+
+    def acquire(self, seller_code, operation=None, timeout=None):
+        """
+        Block until ``seller_code`` may send a call of ``operation``.
+
+        Raises :class:`softix.exceptions.RateLimitTimeout` when no token
+        was granted within ``timeout`` seconds.
+        """
+        started = time.time()
+        ticket = (self.priority(operation), next(self._tickets))
+        with self._condition:
+            bucket = self._bucket(seller_code)
+            waiting = self._waiting[seller_code]
+            heapq.heappush(waiting, ticket)
+            self.max_queue_depth = max(self.max_queue_depth,
+                                       self.queue_depth)
+            try:
+                while True:
+                    delay = None
+                    if waiting[0] == ticket:
+                        delay = bucket.take(time.time())
+                        if not delay:
+                            break
+                    if timeout is not None:
+                        remaining = started + timeout - time.time()
+                        if remaining <= 0:
+                            raise exceptions.RateLimitTimeout(
+                                'No token for {0} within {1}s'.format(
+                                    seller_code, timeout))
+                        delay = min(delay or remaining, remaining)
+                    self._condition.wait(delay)
+            finally:
+                # Drop the ticket whether it was granted or the wait was
+                # interrupted, so it never blocks the callers behind it.
+                waiting.remove(ticket)
+                heapq.heapify(waiting)
+                if not waiting:
+                    self._waiting.pop(seller_code, None)
+                self._condition.notify_all()
+            waited = time.time() - started
+            stats = self._waits[operation]
+            stats.calls += 1
+            stats.waited += waited
+            stats.max_wait = max(stats.max_wait, waited)
+        return waited
+
+    def record(self, seller_code, response):
+        """Adapt the seller's rate to the API's response."""
+        with self._condition:
+            bucket = self._bucket(seller_code)
+            if response.status_code not in THROTTLE_STATUSES:
+                bucket.rate = min(bucket.max_rate,
+                                  bucket.rate + self.recovery)
+                return
+            self.throttles += 1
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                bucket.paused_until = time.time() + int(retry_after)
+
+    def _bucket(self, seller_code):
+        bucket = self._buckets.get(seller_code)
+        if bucket is None:
+            bucket = self._buckets[seller_code] = TokenBucket(self.rate,
+                                                              self.burst)
+        return bucket
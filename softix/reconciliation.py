@@ -0,0 +1,141 @@
+"""
+Reconcile ``transaction_sync`` results against orders.
+
+Transactions and order line items are loaded into columnar
+:class:`LineItems` tables and summed per order in one pass. Only orders
+missing from the local orders, or whose totals disagree, are fetched with
+``SoftixCore.order``.
+
+NumPy is used when installed, the pure Python fallback gives the same
+results.
+"""
+import collections
+
+from .batch import run_batch
+from .models import Order, as_model
+from .offload import TRANSACTION_FIELDS, order_columns, transaction_columns
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class LineItems(object):
+    """Columns of order id, line item id, net price and timestamp."""
+
+    def __init__(self, order_ids, line_items, nets, timestamps):
+        if numpy is not None:
+            order_ids = numpy.array(order_ids, dtype=str)
+            nets = numpy.array(nets, dtype=float)
+            timestamps = numpy.array(timestamps, dtype='datetime64[s]')
+        self.order_ids = order_ids
+        self.line_items = line_items
+        self.nets = nets
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return len(self.line_items)
+
+    @classmethod
+    def from_transactions(cls, transactions, fields=TRANSACTION_FIELDS):
+        return cls(*transaction_columns(transactions, fields))
+
+    @classmethod
+    def from_orders(cls, orders):
+        return cls(*order_columns(orders))
+
+    def totals(self):
+        """Return the sorted order ids and the total net of each."""
+        if numpy is not None:
+            order_ids, inverse = numpy.unique(self.order_ids,
+                                              return_inverse=True)
+            totals = numpy.bincount(inverse.ravel(), weights=self.nets,
+                                    minlength=len(order_ids))
+            return order_ids, totals
+        totals = collections.defaultdict(float)
+        for order_id, net in zip(self.order_ids, self.nets):
+            totals[order_id] += net
+        order_ids = sorted(totals)
+        return order_ids, [totals[order_id] for order_id in order_ids]
+
+
+class Reconciliation(collections.namedtuple(
+        'Reconciliation', 'matched mismatched missing errors')):
+    """
+    Outcome of a reconciliation.
+
+    ``matched`` and ``missing`` are order ids, ``mismatched`` maps order ids
+    to ``(transactions total, order total)`` and ``errors`` maps order ids
+    to the exception raised fetching them.
+    """
+
+    __slots__ = ()
+
+
+def compare(transactions, orders, tolerance=0):
+    """Compare the per order totals of two :class:`LineItems` tables."""
+    expected_ids, expected = transactions.totals()
+    actual_ids, actual = orders.totals()
+    if numpy is not None:
+        if len(actual_ids):
+            positions = numpy.minimum(
+                numpy.searchsorted(actual_ids, expected_ids),
+                len(actual_ids) - 1)
+            found = actual_ids[positions] == expected_ids
+            totals = numpy.where(found, actual[positions], 0)
+        else:
+            found = numpy.zeros(len(expected_ids), dtype=bool)
+            totals = numpy.zeros(len(expected_ids))
+        differs = found & (numpy.abs(totals - expected) > tolerance)
+        matched = expected_ids[found & ~differs].tolist()
+        mismatched = dict(zip(expected_ids[differs].tolist(),
+                              zip(expected[differs].tolist(),
+                                  totals[differs].tolist())))
+        missing = expected_ids[~found].tolist()
+        return Reconciliation(matched, mismatched, missing, {})
+    actual = dict(zip(actual_ids, actual))
+    matched, mismatched, missing = [], {}, []
+    for order_id, total in zip(expected_ids, expected):
+        if order_id not in actual:
+            missing.append(order_id)
+        elif abs(actual[order_id] - total) > tolerance:
+            mismatched[order_id] = (total, actual[order_id])
+        else:
+            matched.append(order_id)
+    return Reconciliation(matched, mismatched, missing, {})
+
+
+def reconcile(client, seller_code, transactions, orders=(), tolerance=0,
+              max_workers=4, fields=TRANSACTION_FIELDS):
+    """
+    Reconcile transactions against the orders at hand.
+
+    Orders missing from ``orders`` or whose total disagrees with the
+    transactions are fetched again, then compared once more.
+
+    :returns: a :class:`Reconciliation`
+    """
+    if not isinstance(transactions, LineItems):
+        transactions = LineItems.from_transactions(transactions, fields)
+    orders = dict((str(order['Id']), order) for order in orders)
+    result = compare(transactions, LineItems.from_orders(orders.values()),
+                     tolerance)
+    stale = result.missing + sorted(result.mismatched)
+    if not stale:
+        return result
+    errors = {}
+
+    def fetch(order_id):
+        return client.order(seller_code, order_id)
+    for fetched in run_batch(fetch, stale, max_workers=max_workers):
+        if fetched.ok:
+            orders[fetched.item] = as_model(Order, fetched.result)
+        else:
+            errors[fetched.item] = fetched.error
+    result = compare(transactions, LineItems.from_orders(orders.values()),
+                     tolerance)
+    return result._replace(
+        missing=[order_id for order_id in result.missing
+                 if order_id not in errors],
+        errors=errors)
@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+
+import requests
+from requests.packages.urllib3.exceptions import NewConnectionError
+
+from . import exceptions
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+def never_sent(error):
+    """Whether ``error`` happened before the request reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = getattr(error.args[0] if error.args else None, 'reason', None)
+    return isinstance(reason, NewConnectionError)
+
+
+class RetryPolicy(object):
+    """
+    Decide whether a failed request is retried and how long to wait.
+
+    Idempotent requests are retried after connection errors, timeouts and
+    the ``statuses`` listed. Other requests, such as a basket purchase, are
+    only retried when the connection could not be established, since the
+    server cannot have acted on them. Waits grow exponentially from
+    ``backoff`` up to ``max_backoff`` with full jitter.
+    """
+
+    def __init__(self, max_retries=2, backoff=0.1, max_backoff=2.0,
+                 statuses=(502, 503, 504)):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    def should_retry(self, method, attempt, response=None, error=None):
+        if attempt >= self.max_retries:
+            return False
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if error is not None:
+            if idempotent:
+                return isinstance(error, (requests.exceptions.ConnectionError,
+                                          requests.exceptions.Timeout))
+            return never_sent(error)
+        return idempotent and response.status_code in self.statuses
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff,
+                                     self.backoff * 2 ** attempt))
+
+    def sleep(self, attempt):
+        time.sleep(self.delay(attempt))
+
+
+class CircuitBreaker(object):
+    """
+    Fail fast once the API keeps failing.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls raise :class:`softix.exceptions.CircuitOpenError` without being
+    sent. After ``recovery_timeout`` seconds a single trial call is let
+    through: its success closes the breaker, its failure opens it again.
+    A trial that ends without either being recorded is released, so the
+    next call can try again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.time() - self.opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        """Let a call through and return whether it is the trial call."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+        raise exceptions.CircuitOpenError('Softix API is unavailable')
+
+    def release(self):
+        """End the trial call, whatever its outcome."""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.time()
+                self._trial = False
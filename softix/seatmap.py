@@ -0,0 +1,166 @@
+"""
+Indexed seat map for best-seat selection.
+
+A :class:`SeatMap` keeps the free seats of every section and row, split into
+runs of adjacent seats of the same price category. Runs are indexed by
+length per category and per category and section, so finding ``N``
+adjacent seats is a binary search.
+
+The API does not list free seats: ``performance_availabilities`` only tells
+which price categories are sold out. Seats are learnt from the ``Seats``
+entries of basket offers, whose ``RzStr`` holds the allocated seat numbers.
+"""
+import bisect
+import re
+
+from .models import Seat
+
+_SEAT_RANGES = re.compile(r'(\d+)(?:-(\d+))?')
+
+
+def parse_seats(seats):
+    """
+    Expand seat numbers such as ``"154"``, ``"186-188"`` or the ``RzStr``
+    form ``"RGA/G186-188,Q189-191"`` into a list of integers.
+    """
+    if '/' in seats:
+        seats = seats.split('/', 1)[1]
+    numbers = []
+    for start, end in _SEAT_RANGES.findall(seats):
+        numbers.extend(range(int(start), int(end or start) + 1))
+    return numbers
+
+
+def format_seats(start, count):
+    """Format adjacent seat numbers the way ``Seat`` sends them."""
+    if count == 1:
+        return str(start)
+    return '{0}-{1}'.format(start, start + count - 1)
+
+
+def offer_seats(offer):
+    """Yield the section, row and seat numbers of an offer's ``Seats``."""
+    for seats in offer.get('Seats') or ():
+        yield (seats['Section'], seats['Row'],
+               parse_seats(seats.get('RzStr') or seats.get('Seats') or ''))
+
+
+class SeatMap(object):
+    """Free seats by section and row, indexed by price category."""
+
+    def __init__(self):
+        self.sold_out = set()
+        self._rows = {}
+        self._row_runs = {}
+        self._runs = {}
+        self._section_runs = {}
+
+    @classmethod
+    def from_availabilities(cls, availabilities, baskets=()):
+        """
+        Build a seat map from a ``performance_availabilities`` response.
+
+        Sold out categories are recorded from each price category's
+        ``Availability``; the seats of the offers of ``baskets``, such as
+        holds about to be released, are added as free.
+        """
+        seatmap = cls()
+        seatmap.update_availabilities(availabilities)
+        for basket in baskets:
+            seatmap.add_basket(basket)
+        return seatmap
+
+    def update_availabilities(self, availabilities):
+        """Record which price categories are sold out."""
+        for category in availabilities.get('PriceCategories') or ():
+            code = category.get('PriceCategoryCode')
+            if (category.get('Availability') or {}).get('SoldOut'):
+                self.sold_out.add(code)
+            else:
+                self.sold_out.discard(code)
+
+    def __len__(self):
+        return sum(len(seats) for seats in self._rows.values())
+
+    def add(self, section, row, numbers, price_category):
+        """Mark seats as free."""
+        seats = self._rows.setdefault((section, row), {})
+        for number in numbers:
+            seats[number] = price_category
+        self._reindex(section, row)
+
+    def consume(self, section, row, numbers):
+        """Mark seats as taken, e.g. by one of our own baskets."""
+        seats = self._rows.get((section, row))
+        if not seats:
+            return
+        for number in numbers:
+            seats.pop(number, None)
+        self._reindex(section, row)
+
+    def add_basket(self, basket):
+        """Mark the seats of the offers of a basket as free."""
+        for offer in basket.get('Offers') or ():
+            for section, row, numbers in offer_seats(offer):
+                self.add(section, row, numbers, offer['PriceCategoryCode'])
+
+    def consume_basket(self, basket):
+        """Mark the seats held by the offers of a basket as taken."""
+        for offer in basket.get('Offers') or ():
+            for section, row, numbers in offer_seats(offer):
+                self.consume(section, row, numbers)
+
+    def find(self, count, price_category, section=None):
+        """
+        Return a ``Seat`` for ``count`` adjacent free seats, or ``None``.
+
+        The shortest run that fits is picked so larger runs stay available
+        for larger groups.
+        """
+        if section is None:
+            runs = self._runs.get(price_category)
+        else:
+            runs = self._section_runs.get((price_category, section))
+        if not runs or price_category in self.sold_out:
+            return None
+        index = bisect.bisect_left(runs, (count,))
+        if index == len(runs):
+            return None
+        _, run_section, row, start = runs[index]
+        return Seat(run_section, row, format_seats(start, count))
+
+    def take(self, count, price_category, section=None):
+        """Find adjacent seats and mark them as taken."""
+        seat = self.find(count, price_category, section)
+        if seat is not None:
+            self.consume(seat.section, seat.row, parse_seats(seat.seats))
+        return seat
+
+    def _reindex(self, section, row):
+        key = (section, row)
+        for category, run in self._row_runs.pop(key, ()):
+            for runs in (self._runs[category],
+                         self._section_runs[(category, section)]):
+                del runs[bisect.bisect_left(runs, run)]
+        seats = self._rows.get(key)
+        if not seats:
+            self._rows.pop(key, None)
+            return
+        row_runs = self._row_runs[key] = []
+        start = previous = category = None
+        for number in sorted(seats):
+            if (previous is None or number != previous + 1 or
+                    seats[number] != category):
+                if previous is not None:
+                    row_runs.append(self._run(category, section, row, start,
+                                              previous))
+                start, category = number, seats[number]
+            previous = number
+        row_runs.append(self._run(category, section, row, start, previous))
+        for category, run in row_runs:
+            bisect.insort(self._runs.setdefault(category, []), run)
+            bisect.insort(
+                self._section_runs.setdefault((category, section), []), run)
+
+    def _run(self, category, section, row, start, end):
+        return category, (end - start + 1, section, row, start)
@@ -1,9 +1,72 @@
+import collections
+import re
+
 import requests
 
+from .instrumentation import TimedHTTPAdapter
+from .resilience import CircuitBreaker, RetryPolicy
+
+
+ENDPOINTS = frozenset([
+    'accesstoken',
+    'availabilities',
+    'baskets',
+    'customers',
+    'offers',
+    'orders',
+    'prices',
+    'purchase',
+    'reverse',
+    'transync',
+])
+
+#: Logical SoftixCore operation by request method and endpoint
+OPERATIONS = {
+    ('POST', 'accesstoken'): 'authenticate',
+    ('GET', 'availabilities'): 'performance_availabilities',
+    ('GET', 'baskets'): 'basket',
+    ('POST', 'baskets'): 'create_basket',
+    ('GET', 'customers'): 'customer',
+    ('POST', 'customers'): 'create_customer',
+    ('POST', 'offers'): 'add_offer',
+    ('GET', 'orders'): 'order',
+    ('GET', 'prices'): 'performance_prices',
+    ('POST', 'purchase'): 'purchase_basket',
+    ('POST', 'reverse'): 'reverse_order',
+    ('GET', 'transync'): 'transaction_sync',
+}
+
+#: Path of each SoftixCore operation, with its arguments in order
+URLS = {
+    'add_offer': 'baskets/{0}/offers',
+    'authenticate': 'oauth2/accesstoken',
+    'basket': 'baskets/{0}',
+    'create_basket': 'baskets',
+    'create_customer': 'customers?sellerCode={0}',
+    'customer': 'customers/{0}',
+    'order': 'orders/{0}',
+    'performance_availabilities': 'performances/{0}/availabilities',
+    'performance_prices': 'performances/{0}/prices',
+    'purchase_basket': 'Baskets/{0}/purchase',
+    'reverse_order': 'orders/{0}/reverse',
+    'transaction_sync': 'dcal/transync/{0}/{1}',
+}
+
+_PLACEHOLDER = re.compile(r'\{\d+\}')
+_SELLER = re.compile(r'"Seller":\s*"([^"]*)"|[?&]sellerCode=([^&]*)')
+
 
 class Session(requests.sessions.Session):
 
-    def __init__(self):
+    #: (connect, read) timeouts in seconds, by endpoint
+    default_timeouts = {
+        'default': (3.05, 30),
+        'purchase': (3.05, 60),
+        'transync': (3.05, 300),
+    }
+
+    def __init__(self, timeouts=None, retry=None, breaker=None,
+                 limiter=None):
         super(Session, self).__init__()
         self.base_url = 'https://api.etixdubai.com/'
 
@@ -13,6 +76,25 @@ class Session(requests.sessions.Session):
         }
 
         self.headers.update(headers)
+        self.mount('https://', TimedHTTPAdapter())
+        self.mount('http://', TimedHTTPAdapter())
+        self.timeouts = dict(self.default_timeouts, **(timeouts or {}))
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter
+        self.retries = collections.Counter()
+        self._urls = (None, {})
+
+    @property
+    def stats(self):
+        stats = {
+            'breaker': self.breaker.state,
+            'breaker_trips': self.breaker.trips,
+            'retries': dict(self.retries),
+        }
+        if self.limiter is not None:
+            stats['limiter'] = self.limiter.stats
+        return stats
 
     def build_url(self, *urls, **kwargs):
         """
@@ -21,3 +103,109 @@ class Session(requests.sessions.Session):
         base_url = kwargs.get('base_url') or self.base_url
         url = base_url + '/'.join(urls)
         return url
+
+    def url(self, operation, *args):
+        """
+        Build the URL of an operation from its template in :data:`URLS`.
+
+        Templates are joined to ``base_url`` and compiled to ``%`` format
+        strings once, and again only when ``base_url`` changes.
+        """
+        base_url, urls = self._urls
+        if base_url != self.base_url:
+            base_url = self.base_url
+            urls = dict((name, _PLACEHOLDER.sub(
+                '%s', (base_url + path).replace('%', '%%')))
+                for name, path in URLS.items())
+            self._urls = (base_url, urls)
+        return urls[operation] % args
+
+    def endpoint(self, url):
+        """
+        Name the endpoint of ``url``, for timeouts and metrics.
+
+        This is the last known path segment, e.g. ``purchase`` for
+        ``Baskets/<id>/purchase``, else ``default``.
+        """
+        path = url.split('?', 1)[0].lower().split('/')
+        for segment in reversed(path):
+            if segment in ENDPOINTS:
+                return segment
+        return 'default'
+
+    def operation(self, method, url):
+        """Name the SoftixCore operation sending ``method`` to ``url``."""
+        endpoint = self.endpoint(url)
+        return OPERATIONS.get((method.upper(), endpoint), endpoint)
+
+    def seller(self, url, params=None, data=None):
+        """Find the seller code a request is sent for, if any."""
+        if params and 'sellerCode' in params:
+            return params['sellerCode']
+        for text in (url, data):
+            if isinstance(text, bytes):
+                text = text.decode('utf-8')
+            try:
+                match = _SELLER.search(text)
+            except TypeError:
+                continue
+            if match:
+                return match.group(1) or match.group(2)
+        return None
+
+    def mount_pool(self, maxsize, block=True):
+        """
+        Keep up to ``maxsize`` connections alive per host.
+
+        With ``block`` set, callers wait for a free connection instead of
+        opening throwaway ones once the pool is exhausted.
+        """
+        adapter = TimedHTTPAdapter(pool_maxsize=maxsize, pool_block=block)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request with a timeout, retries and the circuit breaker.
+
+        With a :class:`softix.ratelimit.RateLimiter`, each attempt first
+        waits for its seller's turn.
+        """
+        endpoint = self.endpoint(url)
+        seller = None
+        if self.limiter is not None:
+            operation = self.operation(method, url)
+            seller = self.seller(url, kwargs.get('params'),
+                                 kwargs.get('data'))
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeouts.get(endpoint,
+                                                  self.timeouts['default'])
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call()
+            try:
+                if seller is not None:
+                    self.limiter.acquire(seller, operation)
+                response = super(Session, self).request(method, url,
+                                                        **kwargs)
+            except requests.exceptions.RequestException as error:
+                self.breaker.record_failure()
+                if not self.retry.should_retry(method, attempt, error=error):
+                    raise
+            else:
+                if seller is not None:
+                    self.limiter.record(seller, response)
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if not self.retry.should_retry(method, attempt,
+                                               response=response):
+                    return response
+                response.close()
+            finally:
+                if trial:
+                    self.breaker.release()
+            self.retry.sleep(attempt)
+            self.retries[endpoint] += 1
+            attempt += 1
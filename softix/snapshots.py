@@ -0,0 +1,260 @@
+"""
+Local store of synced transactions.
+
+Transactions are stored per seller and day in append-only partitions that
+are written once, when the day has been synced, and never modified. A
+partition is a data file of zlib compressed blocks of transactions, read
+through ``mmap``, and a JSON index of its blocks, order ids and timestamps.
+"""
+import bisect
+import collections
+import datetime
+import json
+import mmap
+import os
+import threading
+import zlib
+
+from .transactions import DATE_FORMAT, date_windows, parse_date
+
+#: Transaction fields indexed as order id and timestamp
+INDEX_FIELDS = ('OrderId', 'DateTime')
+
+
+class SnapshotStore(object):
+    """
+    Transactions by seller and day under the ``root`` directory.
+
+    Only days before the current UTC day are stored, since later days may
+    still gain transactions. Pass the store to
+    ``SoftixCore.iter_transaction_sync`` so stored days are read locally and
+    only missing days are fetched from ``dcal/transync``.
+
+    At most ``max_open`` partitions keep their files open; the least
+    recently used one is closed, and reopened if it is read again.
+    """
+
+    def __init__(self, root, block_size=256, fields=INDEX_FIELDS,
+                 max_open=32):
+        self.root = root
+        self.block_size = block_size
+        self.fields = fields
+        self.max_open = max_open
+        self._partitions = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, seller_code, day):
+        return os.path.join(self.root, seller_code,
+                            day.strftime(DATE_FORMAT))
+
+    def days(self, seller_code):
+        """Return the stored days of a seller, in order."""
+        try:
+            names = os.listdir(os.path.join(self.root, seller_code))
+        except OSError:
+            return []
+        return sorted(parse_date(name[:-4]) for name in names
+                      if name.endswith('.idx'))
+
+    def has(self, seller_code, day):
+        return os.path.exists(self.path(seller_code, day) + '.idx')
+
+    def is_final(self, day):
+        """Whether no transactions can be added to ``day`` any more."""
+        return day < datetime.datetime.utcnow().date()
+
+    def missing(self, seller_code, from_date, to_date):
+        """Return the days of a range that are not stored yet."""
+        return [day for day, _ in date_windows(parse_date(from_date),
+                                               parse_date(to_date))
+                if not self.has(seller_code, day)]
+
+    def writer(self, seller_code, day):
+        """Return a :class:`PartitionWriter`, or ``None`` if not final."""
+        if not self.is_final(day):
+            return None
+        return PartitionWriter(self, seller_code, day)
+
+    def partition(self, seller_code, day):
+        key = (seller_code, day)
+        with self._lock:
+            partition = self._partitions.pop(key, None)
+            if partition is None:
+                partition = Partition(self.path(seller_code, day))
+            self._partitions[key] = partition
+            while len(self._partitions) > self.max_open:
+                _, evicted = self._partitions.popitem(last=False)
+                evicted.close()
+            return partition
+
+    def transactions(self, seller_code, from_date, to_date):
+        """Iterate over the stored transactions of a date range."""
+        for day in self._days(seller_code, from_date, to_date):
+            for transaction in self.partition(seller_code, day):
+                yield transaction
+
+    def find(self, seller_code, order_id, from_date=None, to_date=None):
+        """
+        Return the stored transactions of an order.
+
+        Only the days from ``from_date`` to ``to_date`` are searched, by
+        default every stored day.
+        """
+        found = []
+        for day in self._days(seller_code, from_date, to_date):
+            found.extend(self.partition(seller_code, day).find(order_id))
+        return found
+
+    def between(self, seller_code, start, end):
+        """
+        Return the transactions timestamped from ``start`` to ``end``.
+
+        Timestamps are compared as ISO strings, e.g.
+        ``2016-11-21T10:00:00``; only the days they span are searched.
+        """
+        found = []
+        for day in self._days(seller_code, start[:10], end[:10]):
+            found.extend(self.partition(seller_code, day).between(start, end))
+        return found
+
+    def close(self):
+        """Close the files of every open partition."""
+        with self._lock:
+            for partition in self._partitions.values():
+                partition.close()
+            self._partitions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _days(self, seller_code, from_date=None, to_date=None):
+        days = self.days(seller_code)
+        if from_date is not None:
+            days = days[bisect.bisect_left(days, parse_date(from_date)):]
+        if to_date is not None:
+            days = days[:bisect.bisect_right(days, parse_date(to_date))]
+        return days
+
+
+class Partition(object):
+    """
+    A stored day, read through its index.
+
+    Its data file is mapped on first read and unmapped by :meth:`close`;
+    reading a closed partition maps it again.
+    """
+
+    def __init__(self, path):
+        with open(path + '.idx') as index:
+            index = json.load(index)
+        self.path = path
+        self.blocks = index['blocks']
+        self.orders = index['orders']
+        self.times = index['times']
+        self._file = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        for block in range(len(self.blocks)):
+            for transaction in self.block(block):
+                yield transaction
+
+    def block(self, block):
+        offset, length = self.blocks[block]
+        with self._lock:
+            if self._data is None:
+                self._file = open(self.path + '.dat', 'rb')
+                self._data = mmap.mmap(self._file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+            data = self._data[offset:offset + length]
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    def find(self, order_id):
+        return self._read(self.orders.get(str(order_id), ()))
+
+    def between(self, start, end):
+        low = bisect.bisect_left(self.times, [start])
+        high = bisect.bisect_right(self.times, [end, float('inf')])
+        return self._read((block, position) for _, block, position
+                          in self.times[low:high])
+
+    def close(self):
+        with self._lock:
+            if self._data is not None:
+                self._data.close()
+                self._file.close()
+            self._data = self._file = None
+
+    def _read(self, positions):
+        blocks = {}
+        found = []
+        for block, position in positions:
+            if block not in blocks:
+                blocks[block] = self.block(block)
+            found.append(blocks[block][position])
+        return found
+
+
+class PartitionWriter(object):
+    """
+    Write a day of transactions, in blocks of ``block_size``.
+
+    The partition only becomes visible once :meth:`seal` writes its index.
+    """
+
+    def __init__(self, store, seller_code, day):
+        self.path = store.path(seller_code, day)
+        self.block_size = store.block_size
+        self.order_field, self.time_field = store.fields
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+        self._file = open(self.path + '.dat.tmp', 'wb')
+        self.blocks = []
+        self.orders = collections.defaultdict(list)
+        self.times = []
+        self._pending = []
+
+    def append(self, transaction):
+        block, position = len(self.blocks), len(self._pending)
+        order_id = transaction.get(self.order_field)
+        if order_id is not None:
+            self.orders[str(order_id)].append([block, position])
+        self.times.append([transaction.get(self.time_field) or '', block,
+                           position])
+        self._pending.append(transaction)
+        if len(self._pending) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        data = zlib.compress(json.dumps(self._pending).encode('utf-8'))
+        self.blocks.append([self._file.tell(), len(data)])
+        self._file.write(data)
+        self._pending = []
+
+    def seal(self):
+        self.flush()
+        self._file.close()
+        os.rename(self.path + '.dat.tmp', self.path + '.dat')
+        self.times.sort()
+        with open(self.path + '.idx.tmp', 'w') as index:
+            json.dump({'blocks': self.blocks, 'orders': self.orders,
+                       'times': self.times}, index)
+        os.rename(self.path + '.idx.tmp', self.path + '.idx')
+
+    def discard(self):
+        self._file.close()
+        os.remove(self.path + '.dat.tmp')
@@ -0,0 +1,210 @@
+import datetime
+import json
+import os
+import threading
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from concurrent import futures
+
+ONE_DAY = datetime.timedelta(days=1)
+DATE_FORMAT = '%Y-%m-%d'
+
+_DONE = object()
+
+
+def parse_date(value, date_format=DATE_FORMAT):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, date_format).date()
+
+
+def date_windows(from_date, to_date, days=1):
+    """
+    Split the inclusive range ``from_date``..``to_date`` into windows.
+
+    Windows are inclusive on both ends, like the range accepted by
+    ``dcal/transync``, so consecutive windows never overlap.
+    """
+    span = datetime.timedelta(days=days) - ONE_DAY
+    start = from_date
+    while start <= to_date:
+        end = min(start + span, to_date)
+        yield start, end
+        start = end + ONE_DAY
+
+
+class Checkpoint(object):
+    """
+    Record the last window of a sync whose transactions were all consumed.
+
+    The checkpoint is a small JSON file rewritten atomically after every
+    window, so an interrupted run can resume where it stopped. Progress is
+    kept per seller and date range: a sync of another range starts from
+    its beginning.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def key(self, seller_code, from_date, to_date):
+        return '{0}:{1}:{2}'.format(seller_code,
+                                    from_date.strftime(DATE_FORMAT),
+                                    to_date.strftime(DATE_FORMAT))
+
+    def load(self, seller_code, from_date, to_date):
+        completed = self._state().get(
+            self.key(seller_code, from_date, to_date))
+        return parse_date(completed) if completed is not None else None
+
+    def save(self, seller_code, from_date, to_date, completed):
+        state = self._state()
+        state[self.key(seller_code, from_date, to_date)] = \
+            completed.strftime(DATE_FORMAT)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as checkpoint:
+            json.dump(state, checkpoint)
+        os.rename(tmp, self.path)
+
+    def _state(self):
+        try:
+            with open(self.path) as checkpoint:
+                state = json.load(checkpoint)
+        except (IOError, OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+
+class TransactionStream(object):
+    """
+    Iterate over the transactions of a long date range.
+
+    The range is split into windows of ``window_days`` which are fetched by
+    up to ``workers`` windows at a time. Each response is parsed as it is
+    received and transactions are yielded in date order. Each window in
+    flight buffers at most ``queue_size`` transactions, its fetch waiting
+    for them to be consumed.
+
+    With a :class:`softix.snapshots.SnapshotStore`, the range is fetched
+    day by day: stored days are read from the store and fetched days are
+    written to it.
+    """
+
+    def __init__(self, client, seller_code, from_date, to_date,
+                 window_days=1, workers=4, checkpoint=None,
+                 date_format=DATE_FORMAT, store=None, queue_size=1000):
+        self.client = client
+        self.seller_code = seller_code
+        self.from_date = parse_date(from_date, date_format)
+        self.to_date = parse_date(to_date, date_format)
+        self.window_days = 1 if store is not None else window_days
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self.date_format = date_format
+        self.store = store
+        self.queue_size = queue_size
+
+    def windows(self):
+        start = self.from_date
+        if self.checkpoint is not None:
+            completed = self.checkpoint.load(
+                self.seller_code, self.from_date, self.to_date)
+            if (completed is not None and
+                    self.from_date <= completed <= self.to_date):
+                start = completed + ONE_DAY
+        return date_windows(start, self.to_date, self.window_days)
+
+    def __iter__(self):
+        windows = self.windows()
+        pending = []
+        cancelled = threading.Event()
+        executor = futures.ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for window in windows:
+                pending.append(self._submit(executor, window, cancelled))
+                if len(pending) < self.workers:
+                    continue
+                for transaction in self._drain(pending.pop(0)):
+                    yield transaction
+            while pending:
+                for transaction in self._drain(pending.pop(0)):
+                    yield transaction
+        finally:
+            cancelled.set()
+            executor.shutdown(wait=False)
+
+    def _submit(self, executor, window, cancelled):
+        start, _ = window
+        if self.store is not None and self.store.has(self.seller_code, start):
+            return window, self.store.partition(self.seller_code, start)
+        items = queue.Queue(maxsize=self.queue_size)
+        executor.submit(self._fetch, window, items, cancelled)
+        return window, items
+
+    def _fetch(self, window, items, cancelled):
+        start, end = window
+        try:
+            transactions = self.client._stream_transactions(
+                self.seller_code,
+                start.strftime(self.date_format),
+                end.strftime(self.date_format),
+            )
+            for transaction in transactions:
+                if not self._put(items, transaction, cancelled):
+                    return
+        except Exception as error:
+            self._put(items, _Failure(error), cancelled)
+        finally:
+            self._put(items, _DONE, cancelled)
+
+    def _put(self, items, item, cancelled):
+        """Queue ``item`` unless the iteration is cancelled while waiting."""
+        while not cancelled.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _drain(self, pending):
+        (start, end), items = pending
+        if isinstance(items, queue.Queue):
+            items = self._received(start, items)
+        for item in items:
+            yield item
+        if self.checkpoint is not None:
+            self.checkpoint.save(self.seller_code, self.from_date,
+                                 self.to_date, end)
+
+    def _received(self, start, items):
+        writer = None
+        if self.store is not None:
+            writer = self.store.writer(self.seller_code, start)
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                if writer is not None:
+                    writer.append(item)
+                yield item
+        except BaseException:
+            if writer is not None:
+                writer.discard()
+            raise
+        if writer is not None:
+            writer.seal()
+
+
+class _Failure(object):
+
+    def __init__(self, error):
+        self.error = error
@@ -0,0 +1,217 @@
+"""
+Schema validation of request payloads.
+
+A :class:`Schema` is compiled once into a list of checks per field. It
+reports every error of a payload at once and normalizes valid values in
+place, so invalid payloads are rejected before any request is sent.
+"""
+import re
+
+from . import exceptions
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+try:
+    string_types = (str, unicode)  # NOQA
+except NameError:
+    string_types = (str,)
+
+try:
+    integer_types = (int, long)  # NOQA
+except NameError:
+    integer_types = (int,)
+
+MISSING = 'Missing "{0}"'
+EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+class Field(object):
+    """
+    Constraints of a payload field.
+
+    ``kind`` is ``str`` or ``int``; strings are stripped and optionally
+    upper cased, and integers such as the customer ``ID`` and ``Account``
+    the API returns are converted to strings. Integers may be given as
+    strings and are converted.
+    """
+
+    def __init__(self, kind=str, required=True, blank=True, length=None,
+                 minimum=None, pattern=None, upper=False):
+        self.kind = kind
+        self.required = required
+        self.blank = blank
+        self.length = length
+        self.minimum = minimum
+        self.pattern = pattern
+        self.upper = upper
+
+    def compile(self):
+        """Return the checks of the field, in order."""
+        checks = []
+        if self.kind is int:
+            checks.append(_integer)
+            if self.minimum is not None:
+                checks.append(_minimum(self.minimum))
+            return checks
+        checks.append(_string)
+        if not self.blank:
+            checks.append(_not_blank)
+        if self.upper:
+            checks.append(_upper)
+        if self.length is not None:
+            checks.append(_length(self.length))
+        if self.pattern is not None:
+            checks.append(_pattern(self.pattern))
+        return checks
+
+
+class Schema(object):
+    """
+    Compiled validator of a payload's fields.
+
+    ``missing_error`` is raised when a required field is absent and
+    ``invalid_error`` for any other error; both carry all the ``errors``.
+    """
+
+    def __init__(self, fields, missing_error=exceptions.ValidationError,
+                 invalid_error=exceptions.ValidationError):
+        self.fields = [(name, field.required, field.compile())
+                       for name, field in fields]
+        self.missing_error = missing_error
+        self.invalid_error = invalid_error
+
+    def validate(self, payload, normalize=True):
+        """
+        Return the ``(field, message)`` errors of ``payload``.
+
+        With ``normalize``, valid values are replaced in place by their
+        normalized form.
+        """
+        if not isinstance(payload, Mapping):
+            payload = {}
+        errors = []
+        for name, required, checks in self.fields:
+            if name not in payload:
+                if required:
+                    errors.append((name, MISSING.format(name)))
+                continue
+            value = payload[name]
+            for check in checks:
+                value, error = check(value)
+                if error is not None:
+                    errors.append((name, '{0} {1}'.format(name, error)))
+                    break
+            else:
+                if normalize:
+                    payload[name] = value
+        return errors
+
+    def check(self, payload, normalize=True):
+        """Validate ``payload`` and raise if it has any error."""
+        errors = self.validate(payload, normalize)
+        if errors:
+            missing = any(message == MISSING.format(name)
+                          for name, message in errors)
+            error = self.missing_error if missing else self.invalid_error
+            raise error('; '.join(message for _, message in errors),
+                        errors)
+        return payload
+
+    def validate_many(self, payloads, normalize=True):
+        """Return the errors of each invalid payload by its index."""
+        validate = self.validate
+        invalid = {}
+        for index, payload in enumerate(payloads):
+            errors = validate(payload, normalize)
+            if errors:
+                invalid[index] = errors
+        return invalid
+
+
+def _string(value):
+    if isinstance(value, integer_types) and not isinstance(value, bool):
+        return str(value), None
+    if not isinstance(value, string_types):
+        return value, 'must be a string'
+    return value.strip(), None
+
+
+def _not_blank(value):
+    if not value:
+        return value, 'must not be blank'
+    return value, None
+
+
+def _upper(value):
+    return value.upper(), None
+
+
+def _integer(value):
+    try:
+        return int(value), None
+    except (TypeError, ValueError):
+        return value, 'must be an integer'
+
+
+def _length(length):
+    def check(value):
+        if len(value) != length:
+            return value, 'needs to be {0} characters'.format(length)
+        return value, None
+    return check
+
+
+def _minimum(minimum):
+    def check(value):
+        if value < minimum:
+            return value, 'must be at least {0}'.format(minimum)
+        return value, None
+    return check
+
+
+def _pattern(pattern):
+    def check(value):
+        if not pattern.match(value):
+            return value, 'is not valid'
+        return value, None
+    return check
+
+
+CUSTOMER = Schema([
+    ('salutation', Field()),
+    ('firstname', Field()),
+    ('lastname', Field()),
+    ('nationality', Field(length=2, upper=True)),
+    ('email', Field(pattern=EMAIL)),
+    ('dateofbirth', Field()),
+    ('internationalcode', Field()),
+    ('areacode', Field()),
+    ('phonenumber', Field()),
+    ('addressline1', Field()),
+    ('addressline2', Field()),
+    ('addressline3', Field()),
+    ('city', Field()),
+    ('countrycode', Field(length=2, upper=True)),
+    ('state', Field()),
+], missing_error=exceptions.MissingRequiredCustomerField,
+    invalid_error=exceptions.InvalidCustomerField)
+
+DEMAND = Schema([
+    ('PriceTypeCode', Field(blank=False)),
+    ('Quantity', Field(int, minimum=1)),
+    ('Admits', Field(int, minimum=1)),
+])
+
+SEAT = Schema([
+    ('Section', Field(blank=False)),
+    ('Row', Field(blank=False)),
+    ('Seats', Field(blank=False)),
+])
+
+FEE = Schema([
+    ('Type', Field(blank=False)),
+    ('Code', Field()),
+])
@@ -3,7 +3,10 @@ import softix
 import mock
 import betamax
 import base64
+import datetime
+import json
 import os
+import requests
 from betamax_matchers import json_body
 from betamax_serializers import pretty_json
 
@@ -20,9 +23,80 @@ def softixcore():
     sc.session = create_mocked_session()
     sc.session.get.return_value = None
     sc.session.post.return_value = None
-    sc.build_url = build_url
+    sc.session.url.side_effect = url
     return sc
 
+@pytest.fixture
+def cassette():
+    """
+    Returns a loader of recorded response bodies
+
+    ``cassette(name, index)`` decodes the body of the ``index``-th
+    interaction of ``tests/cassettes/<name>.json``.
+    """
+    def load(name, index=0):
+        path = os.path.join(os.path.dirname(__file__), 'cassettes',
+                            name + '.json')
+        with open(path) as recording:
+            interaction = json.load(recording)['http_interactions'][index]
+        return json.loads(interaction['response']['body']['string'])
+    return load
+
+@pytest.fixture
+def json_response():
+    """
+    Returns a builder of responses
+
+    ``json_response(status_code, data)`` builds a ``requests.Response``
+    whose body is ``data``, encoded as JSON unless it is already bytes.
+    """
+    def build(status_code, data):
+        response = requests.Response()
+        response.status_code = status_code
+        if not isinstance(data, bytes):
+            data = json.dumps(data).encode('utf-8')
+        response._content = data
+        response._content_consumed = True
+        response.elapsed = datetime.timedelta(seconds=0.02)
+        return response
+    return build
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    """Replay a list of responses (status codes) or exceptions."""
+
+    def __init__(self, outcomes):
+        super(FakeAdapter, self).__init__()
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append((request, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def fake_adapter():
+    """
+    Returns the adapter class replaying outcomes
+
+    Mount ``fake_adapter(outcomes)`` on a session to answer its requests
+    with the given status codes or raise the given exceptions, in order.
+    """
+    return FakeAdapter
+
+@pytest.fixture
+def auth_headers():
+    return {'Content-Type': 'application/json', 'Authorization': 'Bearer '}
+
 @pytest.fixture(scope='module')
 def recorder():
     """
@@ -32,8 +106,8 @@ def recorder():
 
 
 
-def build_url(*args, **kwargs):
-    return softix.sessions.Session().build_url(*args, **kwargs)
+def url(*args):
+    return softix.sessions.Session().url(*args)
     
 
 def create_mocked_session():
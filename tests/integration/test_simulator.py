@@ -0,0 +1,52 @@
+import pytest
+import softix
+from benchmarks.simulator import Simulator, SimulatorServer
+
+
+@pytest.fixture(scope='module')
+def simulator():
+    server = SimulatorServer(Simulator(line_items=3, transactions=5)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(simulator):
+    client = softix.SoftixCore()
+    client.session.base_url = simulator.base_url
+    client.authenticate('client-id', 'secret')
+    return client
+
+
+def test_checkout_flow(client):
+    demands = [softix.Demand('A', 2, 2)]
+    basket = client.create_basket('ANMFZ1', 'ETES0000004EL', 'SGA', demands,
+                                  [])
+    basket = client.add_offer('ANMFZ1', basket['Id'], 'ETES0000004EL', 'SGB',
+                              demands, [])
+    assert softix.models.Basket(basket).total == 40000
+    order = client.purchase_basket('ANMFZ1', basket['Id'])
+    assert order['OrderId']
+    with pytest.raises(softix.exceptions.SoftixError):
+        client.basket('ANMFZ1', basket['Id'])
+
+
+def test_lookups(client):
+    assert softix.models.Order(client.order('ANMFZ1', '1')).total == 24000
+    assert client.customer('ANMFZ1', '1768618').id == 1768618
+    assert client.performance_prices('ANMFZ1', 'ETES2JN')['PriceTypes']
+    assert len(client.transaction_sync('ANMFZ1', '2016-11-01',
+                                       '2016-11-01')) == 5
+
+
+def test_errors_are_retried(simulator):
+    simulator.simulator.error_rate = 1.0
+    client = softix.SoftixCore()
+    client.session.base_url = simulator.base_url
+    client.session.retry.backoff = 0
+    try:
+        with pytest.raises(softix.exceptions.SoftixError):
+            client.order('ANMFZ1', '1')
+        assert client.session.stats['retries'] == {'orders': 2}
+    finally:
+        simulator.simulator.error_rate = 0.0
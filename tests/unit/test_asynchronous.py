@@ -0,0 +1,50 @@
+import softix
+import pytest
+
+
+@pytest.fixture
+def asyncsoftixcore(softixcore):
+    client = softix.AsyncSoftixCore(max_workers=2, core=softixcore)
+    yield client
+    client.close()
+
+
+def test_methods_return_futures(asyncsoftixcore, auth_headers):
+    """
+    Verify calls are delegated to the wrapped SoftixCore.
+    """
+    future = asyncsoftixcore.performance_prices('seller-code', 'ETES2JN')
+    assert future.result() is None
+    url = 'https://api.etixdubai.com/performances/ETES2JN/prices'
+    asyncsoftixcore.session.get.assert_called_once_with(
+        url,
+        params={'channel': 'W', 'sellerCode': 'seller-code'},
+        headers=auth_headers
+    )
+
+
+def test_access_token_is_shared(asyncsoftixcore):
+    asyncsoftixcore.access_token = 'token'
+    assert asyncsoftixcore.core.access_token == 'token'
+
+
+def test_exceptions_are_raised_from_result(asyncsoftixcore):
+    asyncsoftixcore.session.get.side_effect = softix.exceptions.SoftixError
+    future = asyncsoftixcore.order('seller-code', '863-145')
+    with pytest.raises(softix.exceptions.SoftixError):
+        future.result()
+
+
+def test_methods_mirror_softixcore():
+    for name in softix.AsyncSoftixCore.methods:
+        assert hasattr(softix.SoftixCore, name)
+        method = getattr(softix.AsyncSoftixCore, name)
+        assert method.__doc__ == getattr(softix.SoftixCore, name).__doc__
+
+
+def test_close_shuts_down_core(softixcore):
+    client = softix.AsyncSoftixCore(max_workers=2, core=softixcore)
+    softixcore.executor
+    client.close()
+    assert softixcore._executor is None
+    assert softixcore.session.close.called
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import mock
+import pytest
+import softix
+
+
+def token_response(access_token, expires_in=3600):
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {
+        'access_token': access_token,
+        'expires_in': expires_in,
+    }
+    return response
+
+
+@pytest.fixture
+def provider(softixcore):
+    softixcore.session.post.return_value = token_response('first')
+    provider = softix.TokenProvider(softixcore, 'my-username', 'my-password')
+    softixcore.token_provider = provider
+    yield provider
+    provider.close()
+
+
+def test_token_is_cached(provider, softixcore):
+    assert provider.access_token == 'first'
+    assert provider.access_token == 'first'
+    assert softixcore.session.post.call_count == 1
+
+
+def test_stale_token_is_refreshed(provider, softixcore):
+    softixcore.session.post.return_value = token_response('first', 0)
+    assert provider.access_token == 'first'
+    softixcore.session.post.return_value = token_response('second')
+    assert provider.access_token == 'second'
+
+
+def test_margin_is_capped_for_short_tokens(provider, softixcore):
+    softixcore.session.post.return_value = token_response('first', 30)
+    assert provider.access_token == 'first'
+    softixcore.session.post.return_value = token_response('second')
+    assert provider.access_token == 'first'
+    assert softixcore.session.post.call_count == 1
+
+
+def test_token_is_used_by_requests(provider, softixcore):
+    softixcore.order('seller-code', '863-145')
+    headers = softixcore.session.get.call_args[1]['headers']
+    assert headers['Authorization'] == 'Bearer first'
+
+
+def test_unauthorized_request_is_retried_once(provider, softixcore):
+    provider.access_token
+    softixcore.session.post.return_value = token_response('second')
+    softixcore.session.get.side_effect = [
+        mock.Mock(status_code=401), mock.Mock(status_code=401)
+    ]
+    response = softixcore._get('https://api.etixdubai.com/orders/1')
+    assert response.status_code == 401
+    assert softixcore.session.get.call_count == 2
+    headers = softixcore.session.get.call_args[1]['headers']
+    assert headers['Authorization'] == 'Bearer second'
+
+
+def test_refresh_skipped_when_token_already_replaced(provider, softixcore):
+    provider.access_token
+    softixcore.session.post.return_value = token_response('second')
+    provider.refresh()
+    assert provider.refresh(stale_token='first').access_token == 'second'
+    assert softixcore.session.post.call_count == 2
+
+
+def test_concurrent_refreshes_are_coalesced(provider, softixcore):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_post(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return token_response('first')
+
+    softixcore.session.post.side_effect = slow_post
+    threads = [threading.Thread(target=provider.refresh) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert softixcore.session.post.call_count == 1
@@ -0,0 +1,112 @@
+import fnmatch
+import time
+
+import pytest
+import softix
+from softix import backends
+
+
+class FakeRedis(object):
+    """Local stand-in for the subset of redis.StrictRedis we use."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        value, expires_at = self.data.get(name, (None, 0))
+        return value if expires_at > time.time() else None
+
+    def setex(self, name, seconds, value):
+        self.data[name] = (value, time.time() + seconds)
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+    def scan_iter(self, match):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request, tmpdir):
+    if request.param == 'memory':
+        return backends.MemoryBackend()
+    if request.param == 'sqlite':
+        return backends.SQLiteBackend(str(tmpdir.join('cache.db')))
+    return backends.RedisBackend(FakeRedis())
+
+
+def test_round_trip(backend):
+    customer = softix.models.Customer({'ID': 1, 'Account': 2, 'AFile': 'tel'})
+    backend.set('customer:seller-code:1', customer, 60)
+    cached = backend.get('customer:seller-code:1')
+    assert cached == customer
+    assert isinstance(cached, softix.models.Customer)
+    assert cached.to_request() == customer.to_request()
+
+
+def test_missing_key(backend):
+    assert backend.get('order:seller-code:1') is None
+
+
+def test_expired_key(backend):
+    backend.set('order:seller-code:1', {'Id': 1}, 0)
+    time.sleep(0.01)
+    if isinstance(backend, backends.RedisBackend):
+        pytest.skip('Redis expires keys after at least one second')
+    assert backend.get('order:seller-code:1') is None
+
+
+def test_delete_and_clear(backend):
+    backend.set('order:seller-code:1', {'Id': 1}, 60)
+    backend.set('order:seller-code:2', {'Id': 2}, 60)
+    backend.delete('order:seller-code:1')
+    assert backend.get('order:seller-code:1') is None
+    backend.clear()
+    assert backend.get('order:seller-code:2') is None
+
+
+def test_sqlite_is_shared_between_instances(tmpdir):
+    path = str(tmpdir.join('cache.db'))
+    backends.SQLiteBackend(path).set('prices:seller-code:A', {'a': 1}, 60)
+    assert backends.SQLiteBackend(path).get('prices:seller-code:A') == {'a': 1}
+
+
+def test_memory_least_recently_used_is_evicted():
+    backend = backends.MemoryBackend(max_entries=2)
+    backend.set('A', 1, 60)
+    backend.set('B', 2, 60)
+    backend.get('A')
+    backend.set('C', 3, 60)
+    assert backend.get('A') == 1
+    assert backend.get('B') is None
+    assert backend.evictions == 1
+
+
+def test_memory_cap():
+    backend = backends.MemoryBackend(max_bytes=20)
+    backend.set('A', 'x' * 10, 60)
+    backend.set('B', 'y' * 10, 60)
+    assert len(backend) == 1
+    assert backend.size <= 20
+
+
+def test_lazy_documents_round_trip(backend):
+    order = softix.models.LazyOrder(b'{"Id": 1}')
+    backend.set('order:seller-code:1', order, 60)
+    cached = backend.get('order:seller-code:1')
+    assert isinstance(cached, softix.models.LazyOrder)
+    assert cached['Id'] == 1
+
+
+def test_shared_values_are_not_pickled(tmpdir):
+    backend = backends.SQLiteBackend(str(tmpdir.join('cache.db')))
+    backend.set('customer:seller-code:1',
+                softix.models.Customer({'ID': 1}), 60)
+    data = backend._connect().execute(
+        'SELECT value FROM softix_cache').fetchone()[0]
+    assert bytes(data) == b'Customer\n{"ID": 1}'
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        backends.CacheBackend()
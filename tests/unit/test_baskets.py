@@ -0,0 +1,114 @@
+import time
+
+import mock
+import pytest
+import softix
+from softix import baskets, exceptions
+
+
+@pytest.fixture
+def basket():
+    return {
+        'Id': '4281-35183081',
+        'Expiry': None,
+        'Offers': [
+            {'PerformanceCode': 'ETES2JN',
+             'Demand': [{'Prices': [{'Net': 54000}]}]},
+        ],
+    }
+
+
+@pytest.fixture
+def mirrored(softixcore, basket, json_response):
+    softixcore.baskets = baskets.BasketMirror()
+    softixcore.session.post.return_value = json_response(201, basket)
+    softixcore.create_basket('seller-code', 'ETES2JN', 'SGA', [], [])
+    return softixcore
+
+
+@pytest.mark.parametrize('expiry, expected', [
+    (None, None),
+    ('1970-01-01T00:01:40.5Z', 100),
+    ('1970-01-01T04:01:40+04:00', 100),
+    ('1970-01-01T00:00:40-0001', 100),
+    ('1970-01-01T00:01:40', None),
+    ('tomorrow', None),
+])
+def test_parse_expiry(expiry, expected):
+    assert baskets.parse_expiry(expiry) == expected
+
+
+def test_basket_served_from_mirror(mirrored, basket):
+    result = mirrored.basket('seller-code', '4281-35183081')
+    assert result == basket
+    assert result.total == 54000
+    assert not mirrored.session.get.called
+
+
+def test_add_offer_updates_mirror(mirrored, basket, json_response):
+    basket['Offers'].append(basket['Offers'][0])
+    mirrored.session.post.return_value = json_response(201, basket)
+    mirrored.add_offer('seller-code', '4281-35183081', 'ETES2JN', 'SGA',
+                       [], [])
+    assert mirrored.basket('seller-code', '4281-35183081').total == 108000
+    assert not mirrored.session.get.called
+
+
+def test_expired_basket_detected_locally(mirrored, basket):
+    mirrored.baskets.update('seller-code', dict(
+        basket, Expiry='2016-11-21T10:15:00Z'))
+    with pytest.raises(exceptions.BasketExpiredError):
+        mirrored.basket('seller-code', '4281-35183081')
+    assert not mirrored.session.get.called
+    assert len(mirrored.baskets) == 0
+
+
+def test_stale_basket_is_resynced(mirrored, basket, json_response):
+    mirrored.baskets.max_age = 0
+    mirrored.session.get.return_value = json_response(200, basket)
+    mirrored.basket('seller-code', '4281-35183081')
+    assert mirrored.session.get.call_count == 1
+
+
+def test_unknown_expiry_is_resynced_not_expired(cassette):
+    basket = cassette('SoftixCore_purchase_basket')
+    assert basket['Expiry'] is None
+    mirror = baskets.BasketMirror(hold=0)
+    mirror.update('seller-code', basket)
+    assert mirror.get('seller-code', '4281-35183081') is None
+    assert len(mirror) == 1
+
+
+def test_naive_expiry_is_not_guessed(basket):
+    mirror = baskets.BasketMirror()
+    mirror.update('seller-code', dict(basket, Expiry='2016-11-21T10:15:00'))
+    assert mirror.get('seller-code', '4281-35183081')['Id'] == '4281-35183081'
+
+
+def test_hold_is_kept_across_updates(basket):
+    mirror = baskets.BasketMirror(hold=60)
+    mirror.update('seller-code', basket)
+    held_at = mirror._baskets[('seller-code', '4281-35183081')][3]
+    time.sleep(0.01)
+    mirror.update('seller-code', basket)
+    assert mirror._baskets[('seller-code', '4281-35183081')][3] == held_at
+
+
+def test_abandoned_baskets_are_dropped(basket):
+    mirror = baskets.BasketMirror(hold=60, max_age=60, max_size=2)
+    for basket_id in ('1', '2', '3'):
+        mirror.update('seller-code', dict(basket, Id=basket_id))
+    assert list(mirror._baskets) == [('seller-code', '2'),
+                                     ('seller-code', '3')]
+    with mock.patch.object(baskets.time, 'time',
+                           return_value=time.time() + 61):
+        mirror.update('seller-code', dict(basket, Id='4'))
+    assert list(mirror._baskets) == [('seller-code', '4')]
+
+
+def test_purchase_uses_and_forgets_mirror(mirrored, json_response):
+    mirrored.session.post.return_value = json_response(201, {})
+    mirrored.purchase_basket('seller-code', '4281-35183081',
+                             customer=softix.models.Customer({}))
+    assert not mirrored.session.get.called
+    assert len(mirrored.baskets) == 0
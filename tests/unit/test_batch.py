@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+
+import mock
+import pytest
+import softix
+from concurrent import futures
+from softix import batch
+
+
+def test_run_batch_collects_errors():
+    def func(item):
+        if item == 2:
+            raise softix.exceptions.SoftixError('No seats available')
+        return item * 10
+
+    results = batch.run_batch(func, [1, 2, 3])
+    assert [result.result for result in results] == [10, None, 30]
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, softix.exceptions.SoftixError)
+
+
+@pytest.fixture(params=['own', 'shared'])
+def executor(request):
+    if request.param == 'own':
+        yield None
+        return
+    executor = futures.ThreadPoolExecutor(max_workers=8)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_run_batch_serializes_same_key(executor):
+    running = {}
+    overlaps = []
+    lock = threading.Lock()
+
+    def func(item):
+        group, _ = item
+        with lock:
+            if running.get(group):
+                overlaps.append(item)
+            running[group] = True
+        time.sleep(0.01)
+        with lock:
+            running[group] = False
+        return item
+
+    items = [(group, n) for n in range(3) for group in 'AB']
+    results = batch.run_batch(func, items, max_workers=4,
+                              key=lambda item: item[0], executor=executor)
+    assert not overlaps
+    assert [result.result for result in results] == items
+
+
+def test_add_offers(softixcore):
+    response = mock.Mock(status_code=201)
+    response.json.return_value = {'Id': '4904-34721586'}
+    softixcore.session.post.return_value = response
+    demands = [softix.Demand('Q', 1, 1)]
+    fees = [softix.Fee('5', 'W')]
+    offers = [
+        softix.Offer('ETES0000004EL', 'SGA', demands, fees),
+        softix.Offer('ETES0000004EL', 'SGB', demands, fees,
+                     softix.Seat('SGB', 'A', '1')),
+    ]
+    results = softixcore.add_offers('seller-code', '4904-34721586', offers)
+    assert all(result.ok for result in results)
+    assert softixcore.session.post.call_count == 2
+    payloads = [json.loads(call[1]['data'])
+                for call in softixcore.session.post.call_args_list]
+    assert sorted('Seats' in payload for payload in payloads) == [False, True]
+
+
+def test_create_baskets_resolves_customer_once(softixcore):
+    customer = mock.Mock(status_code=200)
+    customer.json.return_value = {'ID': 1, 'Account': 2, 'AFile': 'tel'}
+    softixcore.session.get.return_value = customer
+    offer = softix.Offer('ETES0000004EL', 'SGA', [softix.Demand('Q', 1, 1)],
+                         [])
+    results = softixcore.create_baskets('seller-code', [offer] * 3,
+                                        customer_id='1')
+    assert len(results) == 3
+    assert softixcore.session.get.call_count == 1
+    assert softixcore.session.post.call_count == 3
+
+
+def test_batches_share_the_client_pool(softixcore):
+    response = mock.Mock(status_code=201)
+    response.json.return_value = {'Id': '4904-34721586'}
+    softixcore.session.post.return_value = response
+    offers = [softix.Offer('ETES0000004EL', 'SGA',
+                           [softix.Demand('Q', 1, 1)], [])]
+    softixcore.add_offers('seller-code', '4904-34721586', offers)
+    executor = softixcore.executor
+    softixcore.add_offers('seller-code', '4904-34721586', offers)
+    assert softixcore.executor is executor
+    softixcore.close()
+    assert softixcore._executor is None
+    assert softixcore.session.close.called
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import mock
+import pytest
+import softix
+
+
+def prices_response():
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {'PriceCategories': []}
+    return response
+
+
+@pytest.fixture
+def cache():
+    return softix.ResponseCache()
+
+
+def test_hit_after_miss(cache):
+    fetch = mock.Mock(return_value={'a': 1})
+    key = ('seller-code', 'ETES2JN', 'prices')
+    assert cache.get_or_fetch(key, fetch) == {'a': 1}
+    assert cache.get_or_fetch(key, fetch) == {'a': 1}
+    assert fetch.call_count == 1
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+
+
+def test_entries_expire_per_endpoint():
+    cache = softix.ResponseCache(ttls={'availabilities': 0})
+    fetch = mock.Mock(return_value={})
+    cache.get_or_fetch(('seller-code', 'ETES2JN', 'availabilities'), fetch)
+    cache.get_or_fetch(('seller-code', 'ETES2JN', 'availabilities'), fetch)
+    cache.get_or_fetch(('seller-code', 'ETES2JN', 'prices'), fetch)
+    cache.get_or_fetch(('seller-code', 'ETES2JN', 'prices'), fetch)
+    assert fetch.call_count == 3
+
+
+def test_uses_given_backend():
+    backend = softix.backends.MemoryBackend()
+    cache = softix.ResponseCache(backend=backend)
+    cache.set(('seller-code', 'ETES2JN', 'prices'), {'a': 1})
+    assert backend.get('prices:seller-code:ETES2JN') == {'a': 1}
+
+
+def test_none_is_not_cached(cache):
+    fetch = mock.Mock(return_value=None)
+    cache.get_or_fetch(('seller-code', 'ETES2JN', 'prices'), fetch)
+    cache.get_or_fetch(('seller-code', 'ETES2JN', 'prices'), fetch)
+    assert fetch.call_count == 2
+
+
+def test_concurrent_misses_fetch_once(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {}
+
+    key = ('seller-code', 'ETES2JN', 'prices')
+    threads = [threading.Thread(target=cache.get_or_fetch, args=(key, fetch))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize('drop', ['invalidate', 'clear'])
+def test_fetch_in_flight_during_invalidation_is_not_stored(cache, drop):
+    key = ('seller-code', 'ETES2JN', 'prices')
+
+    def fetch():
+        if drop == 'invalidate':
+            cache.invalidate('seller-code', 'ETES2JN')
+        else:
+            cache.clear()
+        return {'stale': True}
+
+    assert cache.get_or_fetch(key, fetch) == {'stale': True}
+    fresh = mock.Mock(return_value={'stale': False})
+    assert cache.get_or_fetch(key, fresh) == {'stale': False}
+    assert cache.get_or_fetch(key, fresh) == {'stale': False}
+    assert fresh.call_count == 1
+
+
+def test_invalidation_keeps_no_state_for_idle_keys(cache):
+    for code in range(100):
+        cache.invalidate('seller-code', code)
+    cache.get_or_fetch(('seller-code', 'ETES2JN', 'prices'), dict)
+    assert cache._inflight == {}
+
+
+def test_performance_prices_are_cached(softixcore, cache):
+    softixcore.cache = cache
+    softixcore.session.get.return_value = prices_response()
+    softixcore.performance_prices('seller-code', 'ETES2JN')
+    softixcore.performance_prices('seller-code', 'ETES2JN')
+    assert softixcore.session.get.call_count == 1
+
+
+def test_create_basket_invalidates_performance(softixcore, cache):
+    softixcore.cache = cache
+    softixcore.session.get.return_value = prices_response()
+    softixcore.performance_availabilities('seller-code', 'ETES2JN')
+    softixcore.create_basket('seller-code', 'ETES2JN', 'SGA', [], [])
+    softixcore.performance_availabilities('seller-code', 'ETES2JN')
+    assert softixcore.session.get.call_count == 2
+
+
+def test_customer_is_cached(softixcore, cache):
+    softixcore.cache = cache
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {'ID': 1, 'Account': 2, 'AFile': 'tel'}
+    softixcore.session.get.return_value = response
+    softixcore.customer('seller-code', '1')
+    customer = softixcore.customer('seller-code', '1')
+    assert isinstance(customer, softix.models.Customer)
+    assert softixcore.session.get.call_count == 1
+
+
+def test_reverse_order_invalidates_order(softixcore, cache):
+    softixcore.cache = cache
+    cache.set(('seller-code', '863-145', 'order'), {'Id': '863-145'})
+    softixcore.reverse_order('seller-code', '863-145', [])
+    softixcore.order('seller-code', '863-145')
+    assert softixcore.session.get.call_count == 1
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+import softix
+from softix import checkout, exceptions
+
+
+def offer_response(offer_id, net):
+    return {'Id': offer_id, 'PerformanceCode': 'ETES2JN',
+            'Demand': [{'Prices': [{'Net': net}]}]}
+
+
+@pytest.fixture
+def offers():
+    demands = [softix.Demand('Q', 1, 1)]
+    fees = [softix.Fee('5', 'W')]
+    return [softix.Offer('ETES2JN', section, demands, fees)
+            for section in ('SGA', 'SGB', 'SGC')]
+
+
+@pytest.fixture
+def customer():
+    return {'ID': 1768618, 'Account': 1753759, 'AFile': 'tel'}
+
+
+def test_merge_baskets():
+    basket = checkout.merge_baskets([
+        {'Id': '1', 'Offers': [offer_response('1', 100)]},
+        {'Id': '1', 'Offers': [offer_response('1', 100),
+                               offer_response('3', 300)]},
+        {'Id': '1', 'Offers': [offer_response('1', 100),
+                               offer_response('2', 200)]},
+    ])
+    assert [offer['Id'] for offer in basket['Offers']] == ['1', '3', '2']
+    assert softix.models.Basket(basket).total == 600
+
+
+def test_checkout(softixcore, offers, customer, json_response):
+    def post(url, **kwargs):
+        if url.endswith('/purchase'):
+            return json_response(201, {'OrderId': '20161121,1'})
+        area = json.loads(kwargs['data'])['Area']
+        offer_id = str(ord(area[-1]) - ord('A') + 1)
+        return json_response(201, {'Id': '4281-1', 'Offers': [
+            offer_response('1', 100), offer_response(offer_id, 100)]})
+
+    softixcore.session.get.return_value = json_response(200, customer)
+    softixcore.session.post.side_effect = post
+    result = softixcore.checkout('seller-code', offers,
+                                 customer_id='1768618')
+    assert result.order == {'OrderId': '20161121,1'}
+    assert list(result.timings) == ['customer', 'create_basket',
+                                    'add_offers', 'purchase']
+    assert result.duration >= 0
+    assert softixcore.session.get.call_count == 1
+    purchase = json.loads(softixcore.session.post.call_args[1]['data'])
+    assert purchase['Payments'][0]['Amount'] == 300
+    assert purchase['customer'] == customer
+
+
+def test_failed_offer_aborts_checkout(softixcore, offers, customer,
+                                      json_response):
+    def post(url, **kwargs):
+        if json.loads(kwargs['data'])['Area'] == 'SGC':
+            return json_response(400, {'Message': 'Sold out'})
+        return json_response(201, {'Id': '4281-1', 'Offers': []})
+
+    softixcore.session.post.side_effect = post
+    with pytest.raises(exceptions.CheckoutError) as error:
+        softixcore.checkout('seller-code', offers, customer=customer)
+    assert error.value.stage == 'add_offers'
+    assert error.value.basket_id == '4281-1'
+    assert str(error.value) == 'Sold out'
+    assert isinstance(error.value.cause, exceptions.SoftixError)
+    assert str(error.value.cause) == 'Sold out'
+
+
+def test_failed_stage_keeps_cause_and_traceback(softixcore, offers,
+                                                customer):
+    softixcore.session.post.side_effect = ValueError('Connection reset')
+    with pytest.raises(exceptions.CheckoutError) as error:
+        softixcore.checkout('seller-code', offers, customer=customer)
+    assert error.value.stage == 'create_basket'
+    assert isinstance(error.value.cause, ValueError)
+    frames = [entry.name for entry in error.traceback]
+    assert 'create_basket' in frames
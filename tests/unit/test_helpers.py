@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+
+import mock
+import pytest
+from softix import exceptions, helpers
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_iter_json_array(chunk_size):
+    data = [{'OrderId': str(i), 'Net': i * 100} for i in range(20)] + [12345]
+    body = json.dumps(data).encode('utf-8')
+    chunks = [body[i:i + chunk_size]
+              for i in range(0, len(body), chunk_size)]
+    assert list(helpers.iter_json_array(chunks)) == data
+
+
+@pytest.mark.parametrize('body', [b'null', b' [ ] ', b''])
+def test_iter_json_array_empty(body):
+    assert list(helpers.iter_json_array([body])) == []
+
+
+def test_iter_json_array_is_lazy():
+    def chunks():
+        yield b'[{"a": 1}, '
+        raise AssertionError('read too far')
+
+    assert next(helpers.iter_json_array(chunks())) == {'a': 1}
+
+
+def test_concurrently_keeps_order():
+    assert helpers.concurrently(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+
+def test_concurrently_on_executor():
+    executor = mock.Mock()
+    executor.submit.side_effect = lambda call: mock.Mock(
+        result=mock.Mock(return_value=call()))
+    assert helpers.concurrently(lambda: 1, lambda: 2,
+                                executor=executor) == [1, 2]
+    assert executor.submit.call_count == 1
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flights = helpers.SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {'a': 1}
+
+    threads = [threading.Thread(target=flights.do, args=('key', fetch))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flights.calls < 5:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert flights.stats == {'calls': 5, 'collapsed': 4}
+    assert flights.do('key', lambda: 2) == 2
+
+
+def test_single_flight_shares_errors():
+    flights = helpers.SingleFlight()
+    with pytest.raises(ValueError):
+        flights.do('key', int, 'x')
+    assert flights.do('key', int, '1') == 1
+
+
+def test_interrupted_flight_fails_waiters():
+    flight = helpers.Flight()
+    with pytest.raises(KeyboardInterrupt):
+        flight.run(mock.Mock(side_effect=KeyboardInterrupt))
+    with pytest.raises(exceptions.SoftixError):
+        flight.wait(0)
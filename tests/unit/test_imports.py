@@ -0,0 +1,80 @@
+import json
+
+import mock
+import pytest
+from softix import imports
+
+
+@pytest.fixture
+def client():
+    client = mock.Mock()
+    ids = iter(range(1768618, 1768700))
+    client.create_customer.side_effect = lambda seller_code, **customer: {
+        'ID': next(ids), 'Account': 1753759, 'AFile': 'tel'}
+    return client
+
+
+@pytest.fixture
+def records(valid_customer):
+    return [
+        dict(valid_customer),
+        dict(valid_customer, email='other@unknown.com', phonenumber='1'),
+        dict(valid_customer, email='UNKNOWN@unknown.com ', phonenumber='2'),
+        dict(valid_customer, email='third@unknown.com'),
+        dict(valid_customer, email='nobody', phonenumber='3'),
+        dict(valid_customer, email='fourth@unknown.com', phonenumber='4',
+             nationality='in'),
+    ]
+
+
+def outcomes(path):
+    with open(path) as output:
+        return [json.loads(line) for line in output]
+
+
+def test_identity_keys(valid_customer):
+    assert imports.identity_keys(valid_customer) == imports.identity_keys(
+        dict(valid_customer, email=' Unknown@Unknown.com',
+             phonenumber='507-156-120'))
+    assert imports.identity_keys({}) == []
+
+
+def test_import(client, records, tmpdir):
+    output = str(tmpdir.join('customers.jsonl'))
+    counts = imports.CustomerImport(client, 'seller-code', output).run(records)
+    assert counts == {'created': 3, 'duplicate': 2, 'invalid': 1}
+    created = [outcome for outcome in outcomes(output)
+               if outcome['status'] == 'created']
+    assert sorted(outcome['record'] for outcome in created) == [0, 1, 5]
+    assert created[0]['customer']['ID'] >= 1768618
+    sent = client.create_customer.call_args_list[-1][1]
+    assert sent['nationality'] == 'IN'
+
+
+def test_import_resumes(client, records, tmpdir):
+    output = str(tmpdir.join('customers.jsonl'))
+    client.create_customer.side_effect = [
+        {'ID': 1}, ValueError('Service unavailable'), {'ID': 3}]
+    counts = imports.CustomerImport(client, 'seller-code', output).run(records)
+    assert counts['failed'] == 1
+
+    client.create_customer.side_effect = [{'ID': 2}]
+    counts = imports.CustomerImport(client, 'seller-code', output).run(records)
+    assert counts == {'created': 1}
+    assert client.create_customer.call_args[1]['phonenumber'] == '1'
+
+
+def test_import_customers_from_csv(client, valid_customer, tmpdir):
+    path = tmpdir.join('customers.csv')
+    fields = sorted(valid_customer)
+    path.write(','.join(fields) + '\n' +
+               ','.join(valid_customer[field] for field in fields) + '\n')
+    counts = imports.import_customers(client, 'seller-code', str(path),
+                                      str(tmpdir.join('out.jsonl')))
+    assert counts == {'created': 1}
+
+
+def test_read_jsonl(valid_customer, tmpdir):
+    path = tmpdir.join('customers.jsonl')
+    path.write(json.dumps(valid_customer) + '\n\n')
+    assert list(imports.read_records(str(path))) == [valid_customer]
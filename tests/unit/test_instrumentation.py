@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+import softix
+from softix import instrumentation
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+@pytest.fixture
+def collector(softixcore):
+    collector = instrumentation.HistogramCollector()
+    softixcore.instrumentation.register(collector)
+    softixcore.session.operation.side_effect = (
+        softix.sessions.Session().operation)
+    return collector
+
+
+def test_calls_are_collected(softixcore, collector, json_response):
+    softixcore.session.post.return_value = json_response(201, b'{"Id": "1"}')
+    softixcore.create_basket('seller-code', 'ETES2JN', 'SGA',
+                             [softix.Demand('Q', 1, 1)], [])
+    histogram = collector.histogram('create_basket')
+    assert histogram.count == 1
+    assert collector.histogram('create_basket', 'server').sum == 0.02
+    assert collector.histogram('create_basket', 'parse').count == 1
+    assert collector.requests[('create_basket', 201)] == 1
+    assert collector.request_bytes['create_basket'] > 0
+    assert collector.response_bytes['create_basket'] == 11
+
+
+def test_failed_calls_are_collected(softixcore, collector, json_response):
+    softixcore.session.get.return_value = json_response(
+        400, b'{"Message": "No basket found for the requested basket id"}')
+    with pytest.raises(softix.exceptions.SoftixError):
+        softixcore.basket('seller-code', '1')
+    assert collector.requests[('basket', 400)] == 1
+
+
+def test_disabled_instrumentation_leaves_responses_alone(softixcore,
+                                                        json_response):
+    response = json_response(200, b'{}')
+    softixcore.session.get.return_value = response
+    softixcore.order('seller-code', '1')
+    assert not hasattr(response, 'softix_call')
+
+
+def test_failing_hooks_do_not_fail_requests(softixcore, collector,
+                                            json_response):
+    def broken(call):
+        raise RuntimeError('metrics backend is down')
+    softixcore.instrumentation.hooks.insert(0, broken)
+    softixcore.session.get.return_value = json_response(200, b'{"Id": 1}')
+    assert softixcore.order('seller-code', '1') == {'Id': 1}
+    assert collector.requests[('order', 200)] == 1
+
+
+def test_operation_names():
+    session = softix.sessions.Session()
+    url = session.build_url('Baskets', '1', 'purchase')
+    assert session.operation('POST', url) == 'purchase_basket'
+    url = session.build_url('performances', 'ETES2JN', 'prices')
+    assert session.operation('GET', url) == 'performance_prices'
+
+
+def test_prometheus_text():
+    collector = instrumentation.HistogramCollector(buckets=(0.1, 1))
+    call = instrumentation.Call('order', 'GET', 'https://example/orders/1')
+    call.status_code = 200
+    call.timings = {'server': 0.05}
+    collector(call)
+    text = instrumentation.prometheus_text(collector)
+    assert ('softix_request_duration_seconds_bucket'
+            '{le="0.1",operation="order",phase="server"} 1') in text
+    assert ('softix_request_duration_seconds_bucket'
+            '{le="+Inf",operation="order",phase="server"} 1') in text
+    assert 'softix_requests_total{operation="order",status="200"} 1' in text
+
+
+def test_prometheus_text_counts_calls_without_response():
+    collector = instrumentation.HistogramCollector()
+    for status_code in (200, None):
+        call = instrumentation.Call('order', 'GET', 'https://example/orders/1')
+        call.status_code = status_code
+        collector(call)
+    text = instrumentation.prometheus_text(collector)
+    assert 'softix_requests_total{operation="order",status="0"} 1' in text
+    assert 'softix_requests_total{operation="order",status="200"} 1' in text
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_new_connections_are_timed():
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        session = softix.sessions.Session()
+        timings = instrumentation.connection_timings()
+        timings.clear()
+        session.get('http://127.0.0.1:{0}/'.format(server.server_address[1]))
+        session.close()
+        assert timings['connect'] >= 0
+    finally:
+        server.shutdown()
+        server.server_close()
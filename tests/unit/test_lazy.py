@@ -0,0 +1,54 @@
+import pickle
+
+import mock
+import pytest
+import softix
+from softix import lazy
+
+ORDER = (b'{"Id": "20161116,1023", "OrderItems": [{"OrderLineItems": ['
+         b'{"Price": {"Net": 8000}}, {"Price": {"Net": 8000}}]}]}')
+
+
+@pytest.fixture
+def lazysoftixcore(softixcore):
+    softixcore.lazy = True
+    return softixcore
+
+
+def test_parse_defers_decoding():
+    document = lazy.parse(ORDER)
+    assert document._data is None
+    assert document['Id'] == '20161116,1023'
+    assert dict(document)['Id'] == '20161116,1023'
+
+
+@pytest.mark.parametrize('content, expected', [
+    (b'[1, 2]', [1, 2]),
+    (b'null', None),
+])
+def test_parse_decodes_other_values(content, expected):
+    assert lazy.parse(content) == expected
+
+
+def test_lazy_model_keeps_properties():
+    order = softix.models.as_model(softix.models.Order, lazy.parse(ORDER))
+    assert isinstance(order, softix.models.LazyOrder)
+    assert order.total == 16000
+    assert len(order.line_items) == 2
+
+
+def test_pickle_keeps_raw_content_only():
+    order = softix.models.as_model(softix.models.Order, lazy.parse(ORDER))
+    order.total
+    restored = pickle.loads(pickle.dumps(order, pickle.HIGHEST_PROTOCOL))
+    assert restored._data is None
+    assert restored.total == 16000
+
+
+def test_lazy_responses(lazysoftixcore):
+    response = mock.Mock(status_code=200, content=ORDER)
+    lazysoftixcore.session.get.return_value = response
+    order = lazysoftixcore.order('seller-code', '20161116,1023')
+    assert isinstance(order, lazy.LazyJSON)
+    assert not response.json.called
+    assert order['Id'] == '20161116,1023'
@@ -1,11 +1,11 @@
+import json
+import threading
+import time
+
 import softix
 import pytest
 import mock
 
-@pytest.fixture
-def auth_headers():
-    return {'Content-Type': 'application/json', 'Authorization': 'Bearer '}
-
 def test_authenticate(softixcore):
     """
     Verify authentication is called correctly.
@@ -110,3 +110,156 @@ def test_validate_customer_invalid_nationality(valid_customer):
     customer['nationality'] = 'more_than_two_characters'
     with pytest.raises(softix.exceptions.InvalidCustomerField) as exception:
         softix.models.validate_customer(customer)
+
+
+@pytest.fixture
+def basket():
+    return {
+        'Id': '4281-35183081',
+        'Offers': [
+            {'PerformanceCode': 'ETES2JN',
+             'Demand': [{'Prices': [{'Net': 54000}]}]},
+        ],
+    }
+
+
+@pytest.fixture
+def customer():
+    return {'ID': 1768618, 'Account': 1753759, 'AFile': 'tel'}
+
+
+def test_purchase_basket_with_resolved_objects(softixcore, basket, customer,
+                                               json_response):
+    """
+    Verify nothing is looked up when basket and customer are given.
+    """
+    softixcore.session.post.return_value = json_response(201, {})
+    softixcore.purchase_basket('seller-code', '4281-35183081',
+                               customer=softix.models.Customer(customer),
+                               basket=basket)
+    assert not softixcore.session.get.called
+    data = json.loads(softixcore.session.post.call_args[1]['data'])
+    assert data['Payments'] == [{'Amount': 54000,
+                                 'MeansOfPayment': 'EXTERNAL'}]
+    assert data['customer'] == customer
+
+
+def test_purchase_basket_fetches_basket_and_customer(softixcore, basket,
+                                                     customer, json_response):
+    def get(url, **kwargs):
+        if '/customers/' in url:
+            return json_response(200, customer)
+        return json_response(200, basket)
+
+    softixcore.session.get.side_effect = get
+    softixcore.session.post.return_value = json_response(201, {})
+    softixcore.purchase_basket('seller-code', '4281-35183081',
+                               customer_id='1768618')
+    assert softixcore.session.get.call_count == 2
+    data = json.loads(softixcore.session.post.call_args[1]['data'])
+    assert data['customer'] == customer
+
+
+def test_create_basket_with_resolved_customer(softixcore, customer):
+    softixcore.create_basket('seller-code', 'ETES2JN', 'SGA', [], [],
+                             customer=customer)
+    assert not softixcore.session.get.called
+    data = json.loads(softixcore.session.post.call_args[1]['data'])
+    assert data['Customer'] == customer
+
+
+def test_request_models_are_immutable():
+    demand = softix.models.Demand('Q', 1, 1)
+    with pytest.raises(AttributeError):
+        demand.quantity = 2
+    assert demand == softix.models.Demand('Q', '1', '1')
+    assert len({demand, softix.models.Demand('Q', 1, 1)}) == 1
+
+
+def test_request_models_pickle():
+    import pickle
+    fee = softix.models.Fee('5', 'W')
+    assert pickle.loads(pickle.dumps(fee, pickle.HIGHEST_PROTOCOL)) == fee
+
+
+def test_dumps_splices_request_models():
+    demand = softix.models.Demand('Q', 1, 1)
+    encoded = softix.models.dumps(
+        {'Seller': 'seller-code'},
+        Demand=[demand, demand],
+        Seats=softix.models.Seat('SGA', 'GA', '154'),
+        Fees=[],
+    )
+    assert json.loads(encoded) == {
+        'Seller': 'seller-code',
+        'Demand': [demand.to_request(), demand.to_request()],
+        'Seats': {'Section': 'SGA', 'Row': 'GA', 'Seats': '154'},
+        'Fees': [],
+    }
+
+
+def test_dumps_without_plain_members():
+    fee = softix.models.Fee('5', 'W')
+    assert json.loads(softix.models.dumps({}, Fees=[fee])) == {
+        'Fees': [fee.to_request()]
+    }
+
+
+def test_identical_lookups_share_one_request(softixcore, json_response):
+    release = threading.Event()
+
+    def get(url, **kwargs):
+        release.wait(5)
+        return json_response(200, {'PriceCategories': []})
+
+    softixcore.flights = softix.helpers.SingleFlight()
+    softixcore.session.get.side_effect = get
+    threads = [threading.Thread(target=softixcore.performance_prices,
+                                args=('seller-code', 'ETES2JN'))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while softixcore.flights.calls < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert softixcore.session.get.call_count == 1
+    assert softixcore.flights.collapsed == 3
+
+
+def test_lookups_are_not_shared_by_default(softixcore, json_response):
+    softixcore.session.get.return_value = json_response(200, {})
+    softixcore.performance_prices('seller-code', 'ETES2JN')
+    assert softixcore.flights is None
+
+
+def test_basket_lookups_are_never_shared(softixcore, json_response):
+    softixcore.flights = mock.Mock(wraps=softix.helpers.SingleFlight())
+    softixcore.session.get.return_value = json_response(200, {'Id': '1'})
+    softixcore.basket('seller-code', '1')
+    softixcore.customer('seller-code', '1')
+    assert not softixcore.flights.do.called
+    softixcore.order('seller-code', '1')
+    assert softixcore.flights.do.call_count == 1
+
+
+def test_headers_are_prebuilt_per_token(softixcore):
+    headers = softixcore._headers('token-1')
+    assert softixcore._headers('token-1') is headers
+    refreshed = softixcore._headers('token-2')
+    assert refreshed['Authorization'] == 'Bearer token-2'
+    assert headers['Authorization'] == 'Bearer token-1'
+
+
+def test_build_url_is_deprecated():
+    client = softix.SoftixCore()
+    with pytest.warns(DeprecationWarning):
+        url = client.build_url('orders', '1')
+    assert url == client.session.url('order', '1')
+
+
+def test_request_models_are_slotted_and_abstract():
+    assert not hasattr(softix.Demand('A', 1, 1), '__dict__')
+    with pytest.raises(TypeError):
+        softix.models.RequestModel()
@@ -0,0 +1,139 @@
+import functools
+import json
+import pickle
+
+import mock
+import pytest
+import softix
+from concurrent import futures
+from softix import offload, reconciliation
+
+TRANSACTIONS = [
+    {'OrderId': '20161121,1', 'Id': 1, 'Net': 8000,
+     'DateTime': '2016-11-21T10:00:00'},
+    {'OrderId': '20161121,1', 'Id': 2, 'Net': 8000,
+     'DateTime': '2016-11-21T10:00:00'},
+    {'OrderId': '20161121,2', 'Id': 1, 'Net': 5000,
+     'DateTime': '2016-11-21T11:00:00'},
+]
+CONTENT = json.dumps(TRANSACTIONS).encode('utf-8')
+
+
+@pytest.fixture
+def pool():
+    executor = futures.ProcessPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+@pytest.mark.parametrize('value', [
+    TRANSACTIONS,
+    {'Offers': TRANSACTIONS, 'Id': 1},
+    [{'a': 1}, {'b': 1}],
+    [{'a': 1}, {'a': 1, 'b': 2}],
+    [{'a': [{'b': 1}, {'b': 2}]}, {'a': []}],
+    [1, 2],
+    None,
+])
+def test_pack_round_trip(value):
+    packed = offload.pack(value)
+    assert offload.unpack(pickle.loads(pickle.dumps(packed, 2))) == value
+
+
+def test_pack_shares_keys():
+    packed = offload.pack(TRANSACTIONS)
+    assert isinstance(packed, offload.Table)
+    assert set(packed.keys) == set(TRANSACTIONS[0])
+    assert len(packed.rows) == 3
+
+
+def test_transaction_columns():
+    order_ids, line_items, nets, timestamps = \
+        offload.transaction_columns(TRANSACTIONS)
+    assert order_ids == ['20161121,1', '20161121,1', '20161121,2']
+    assert line_items == [1, 2, 1]
+    assert nets == [8000, 8000, 5000]
+    assert timestamps[2] == '2016-11-21T11:00:00'
+
+
+def test_transaction_reducer_fields():
+    fields = ('OrderId', 'Id', 'Net', 'Id')
+    reducer = offload.transaction_reducer(fields)
+    assert isinstance(reducer, functools.partial)
+    assert reducer(TRANSACTIONS)[3] == [1, 2, 1]
+    assert offload.transaction_reducer() is offload.transaction_columns
+
+
+def test_small_or_unreduced_responses_decode_locally():
+    executor = mock.Mock()
+    decoder = offload.ProcessOffload(threshold=len(CONTENT) + 1,
+                                     executor=executor)
+    columns = decoder.decode(CONTENT, offload.transaction_columns)
+    assert columns[1] == [1, 2, 1]
+    decoder.threshold = 1
+    assert decoder.decode(CONTENT) == TRANSACTIONS
+    assert not executor.submit.called
+    assert (decoder.local, decoder.offloaded) == (2, 0)
+
+
+def test_large_responses_reduce_in_pool(pool):
+    with offload.ProcessOffload(threshold=1, executor=pool) as decoder:
+        columns = decoder.decode(CONTENT, offload.transaction_columns)
+        records = decoder.decode(CONTENT, list)
+    assert columns[2] == [8000, 8000, 5000]
+    assert records == TRANSACTIONS
+    assert (decoder.local, decoder.offloaded) == (0, 2)
+
+
+def test_submit_packs_results(pool):
+    packed = offload.ProcessOffload(executor=pool).submit(CONTENT).result()
+    assert isinstance(packed, offload.Table)
+    assert offload.unpack(packed) == TRANSACTIONS
+
+
+def test_close_keeps_shared_executor():
+    executor = mock.Mock()
+    offload.ProcessOffload(executor=executor).close()
+    assert not executor.shutdown.called
+
+
+def test_softixcore_offloads_responses(softixcore, pool):
+    softixcore.offload = offload.ProcessOffload(threshold=1, executor=pool)
+    response = mock.Mock(status_code=201, content=CONTENT)
+    softixcore.session.get.return_value = response
+    columns = softixcore.transaction_columns('seller-code', '2016-11-21',
+                                             '2016-11-22')
+    assert columns[0] == ['20161121,1', '20161121,1', '20161121,2']
+    assert not response.json.called
+    assert softixcore.offload.offloaded == 1
+
+
+def test_transaction_columns_without_offload(softixcore):
+    response = mock.Mock(status_code=201)
+    response.json.return_value = TRANSACTIONS
+    softixcore.session.get.return_value = response
+    columns = softixcore.transaction_columns('seller-code', '2016-11-21',
+                                             '2016-11-22')
+    assert columns[2] == [8000, 8000, 5000]
+    table = reconciliation.LineItems(*columns)
+    assert len(table) == 3
+
+
+def test_order_line_items(cassette):
+    order = cassette('SoftixCore_view_order')
+    order_ids, line_items, nets, _ = offload.order_line_items(order)
+    assert set(order_ids) == set([str(order['Id'])])
+    assert sum(nets) == softix.models.Order(order).total
+    table = reconciliation.LineItems.from_orders([order])
+    assert list(table.line_items) == line_items
+
+
+def test_softixcore_offloads_orders(softixcore, pool, cassette):
+    order = cassette('SoftixCore_view_order')
+    softixcore.offload = offload.ProcessOffload(threshold=1, executor=pool)
+    response = mock.Mock(status_code=200,
+                         content=json.dumps(order).encode('utf-8'))
+    softixcore.session.get.return_value = response
+    columns = softixcore.order_columns('seller-code', order['Id'])
+    assert columns == offload.order_line_items(order)
+    assert softixcore.offload.offloaded == 1
@@ -0,0 +1,122 @@
+import threading
+
+import mock
+import pytest
+from softix import polling
+
+
+def availabilities(*sold_out):
+    return {'PriceCategories': [
+        {'PriceCategoryCode': str(code), 'PriceCategoryId': code,
+         'Availability': {'SoldOut': code in sold_out,
+                          'StatusCode': 'SoldOut' if code in sold_out
+                          else 'Ok'}}
+        for code in (1, 2)]}
+
+
+def test_diff_keys_list_items_by_identity():
+    old = availabilities()
+    new = availabilities(2)
+    new['PriceCategories'].reverse()
+    assert polling.diff(old, new) == [
+        polling.Change(('PriceCategories', '2', 'Availability', 'SoldOut'),
+                       False, True),
+        polling.Change(('PriceCategories', '2', 'Availability',
+                        'StatusCode'), 'Ok', 'SoldOut'),
+    ]
+    assert polling.diff(old, availabilities()) == []
+
+
+def test_diff_added_and_removed():
+    assert polling.diff({'a': [1, 2]}, {'a': [1], 'b': 3}) == [
+        polling.Change(('a', 1), 2, None),
+        polling.Change(('b',), None, 3),
+    ]
+
+
+def test_sold_out_ratio():
+    assert polling.sold_out_ratio(availabilities(1)) == 0.5
+    assert polling.sold_out_ratio({}) == 0
+
+
+@pytest.fixture
+def client():
+    client = mock.Mock()
+    client.performance_availabilities.side_effect = [
+        availabilities(), availabilities(), availabilities(1),
+        availabilities(1, 2)]
+    return client
+
+
+def test_poll_notifies_subscribers(client):
+    poller = polling.AvailabilityPoller(client, 'seller-code')
+    notifications = []
+    poller.subscribe(lambda code, changes: notifications.append(
+        (code, len(changes))))
+    first = poller.poll('ETES2JN')
+    assert first[0].path == () and first[0].old is None
+    assert poller.poll('ETES2JN') == []
+    assert len(poller.poll('ETES2JN')) == 2
+    assert notifications == [('ETES2JN', 1), ('ETES2JN', 2)]
+
+
+def test_failing_subscriber_does_not_fail_poll(client):
+    poller = polling.AvailabilityPoller(client, 'seller-code')
+    poller.subscribe(mock.Mock(side_effect=ValueError('broken')))
+    with poller.changes(timeout=0) as notifications:
+        poller.poll('ETES2JN')
+        assert [code for code, _ in notifications] == ['ETES2JN']
+    assert poller.snapshots['ETES2JN'] == availabilities()
+
+
+def test_adaptive_interval():
+    poller = polling.AvailabilityPoller(mock.Mock(), 'seller-code',
+                                        ['ETES2JN'], min_interval=1,
+                                        max_interval=3, backoff=2)
+    assert poller.interval('ETES2JN', [], availabilities()) == 2
+    poller.intervals['ETES2JN'] = 2
+    assert poller.interval('ETES2JN', [], availabilities()) == 3
+    assert poller.interval('ETES2JN', [], availabilities(1)) == 1
+    assert poller.interval('ETES2JN', [], availabilities(1, 2)) == 3
+    assert poller.interval('ETES2JN', ['change'], availabilities()) == 1
+
+
+def test_background_polling_feeds_iterator(client):
+    poller = polling.AvailabilityPoller(client, 'seller-code', ['ETES2JN'],
+                                        min_interval=0.01, backoff=1,
+                                        max_workers=2)
+    received = []
+    with poller.changes(timeout=2) as notifications, poller:
+        for notification in notifications:
+            received.append(notification)
+            if len(received) == 3:
+                break
+    assert [len(changes) for _, changes in received] == [1, 2, 2]
+    assert poller.polls >= 4
+    assert poller._queues == []
+
+
+def test_readded_performance_is_scheduled_once():
+    client = mock.Mock()
+    client.performance_availabilities.return_value = availabilities()
+    poller = polling.AvailabilityPoller(client, 'seller-code', ['ETES2JN'])
+    stale = poller._schedule[0][2]
+    poller.remove('ETES2JN')
+    poller.add('ETES2JN')
+    due = [entry for entry in poller._schedule
+           if poller._generations.get(entry[1]) == entry[2]]
+    assert len(poller._schedule) == 2
+    assert len(due) == 1
+    poller._poll_and_reschedule('ETES2JN', stale)
+    assert len(poller._schedule) == 2
+
+
+def test_stop_ends_iterators(client):
+    poller = polling.AvailabilityPoller(client, 'seller-code').start()
+    received = []
+    thread = threading.Thread(
+        target=lambda: received.extend(poller.changes()))
+    thread.start()
+    poller.stop()
+    thread.join(2)
+    assert not thread.is_alive()
@@ -0,0 +1,109 @@
+import copy
+import json
+import os
+
+import mock
+import pytest
+import softix
+from softix import exceptions, quotes
+
+CASSETTE = os.path.join(os.path.dirname(__file__), os.pardir, 'cassettes',
+                        'SoftixCore_performance_prices.json')
+
+
+@pytest.fixture
+def prices():
+    with open(CASSETTE) as cassette:
+        interaction = json.load(cassette)['http_interactions'][0]
+    return json.loads(interaction['response']['body']['string'])
+
+
+@pytest.fixture
+def table(prices):
+    table = quotes.PriceTable()
+    assert table.update('ETES2JN', prices)
+    table.add_sections('ETES2JN', {'SGA': '1'})
+    return table
+
+
+def offer(section, *demands, **kwargs):
+    fees = kwargs.get('fees', [softix.Fee('5', 'W')])
+    return softix.Offer('ETES2JN', section, list(demands), fees)
+
+
+def test_quote(table):
+    quote = table.quote(offer('SGA', softix.Demand('A', 3, 3),
+                              softix.Demand('V', 1, 1)))
+    assert quote == (30000, 0)
+    assert quote.total == 30000
+    assert table.quote(offer('2', softix.Demand('A', 1, 1))).net == 10000
+
+
+def test_quote_ticket_fees(prices):
+    fee_type = prices['OfferPrices']['FeeTypes'][0]
+    web, eticket = fee_type['FeesDetailed']
+    web['FeeTotal'] = 250.0
+    prices['TicketPrices']['Prices'][0]['FeeTypes'] = [
+        dict(fee_type, FeesDetailed=[dict(web, FeeTotal=500.0),
+                                     dict(eticket, FeeTotal=700.0)]),
+        dict(fee_type, FeeType='2', FeesDetailed=[
+            dict(web, FeeCode='X', FeeTotal=100.0)]),
+        dict(fee_type, FeeType='3', Inside=True, FeesDetailed=[
+            dict(web, FeeTotal=200.0)]),
+    ]
+    table = quotes.PriceTable()
+    table.update('ETES2JN', prices)
+    quote = table.quote(offer('1', softix.Demand('A', 3, 3),
+                              softix.Demand('V', 1, 1)))
+    assert quote == (30000, 3 * 500 + 250)
+    assert table.quote(offer('2', softix.Demand('A', 2, 2))).fees == 250
+    ticket_only = [softix.Fee('2', 'X')]
+    assert table.quote(offer('1', softix.Demand('A', 2, 2),
+                             fees=ticket_only)).fees == 200
+    with pytest.raises(exceptions.QuoteError):
+        table.quote(offer('2', softix.Demand('A', 1, 1), fees=ticket_only))
+    with pytest.raises(exceptions.QuoteError):
+        table.quote(offer('1', softix.Demand('A', 1, 1),
+                          fees=[softix.Fee('3', 'W')]))
+
+
+def test_quote_unknown_price(table):
+    with pytest.raises(exceptions.QuoteError):
+        table.quote(offer('SGA', softix.Demand('K', 1, 1)))
+    with pytest.raises(exceptions.QuoteError):
+        table.quote(offer('SGA', softix.Demand('A', 1, 1),
+                          fees=[softix.Fee('1', 'X')]))
+
+
+def test_quote_many(table):
+    results = table.quote_many([offer('SGA', softix.Demand('A', 1, 1)),
+                                offer('SGZ', softix.Demand('A', 1, 1))])
+    assert results[0].result.total == 10000
+    assert isinstance(results[1].error, exceptions.QuoteError)
+
+
+def test_update_only_when_changed(table, prices):
+    assert not table.update('ETES2JN', copy.deepcopy(prices))
+    prices['TicketPrices']['Prices'][0]['PriceNet'] = 12000
+    del prices['TicketPrices']['Prices'][4]
+    assert table.update('ETES2JN', prices)
+    assert table.quote(offer('SGA', softix.Demand('A', 1, 1))).net == 12000
+    with pytest.raises(exceptions.QuoteError):
+        table.quote(offer('SGA', softix.Demand('V', 1, 1)))
+
+
+def test_refresh(table, prices):
+    client = mock.Mock()
+    client.performance_prices.return_value = prices
+    assert table.refresh(client, 'seller-code') == []
+    client.performance_prices.assert_called_once_with('seller-code',
+                                                      'ETES2JN')
+
+
+def test_learn_sections_from_basket(prices):
+    table = quotes.PriceTable()
+    table.update('ETES0000004EL', prices)
+    table.learn({'Offers': [{
+        'PerformanceCode': 'ETES0000004EL', 'PriceCategoryCode': '2',
+        'Seats': [{'Section': 'SGA', 'Row': 'GA', 'Seats': '-'}]}]})
+    assert table.price_category('ETES0000004EL', 'SGA') == '2'
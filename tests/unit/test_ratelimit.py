@@ -0,0 +1,104 @@
+import threading
+import time
+
+import mock
+import pytest
+import softix
+from softix import ratelimit
+
+
+def response(status_code, **headers):
+    return mock.Mock(status_code=status_code, headers=headers)
+
+
+def test_bucket_refills_at_rate():
+    bucket = ratelimit.TokenBucket(rate=10, burst=2)
+    now = bucket.updated
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == pytest.approx(0.1)
+    assert bucket.take(now + 0.11) == 0
+
+
+def test_sellers_have_their_own_bucket():
+    limiter = ratelimit.RateLimiter(rate=1)
+    assert limiter.acquire('seller-a') < 0.05
+    assert limiter.acquire('seller-b') < 0.05
+    assert limiter.acquire('seller-a') > 0.5
+
+
+def test_high_priority_calls_go_first():
+    limiter = ratelimit.RateLimiter(rate=20, burst=1)
+    limiter.acquire('seller-code')
+    order = []
+
+    def call(operation):
+        limiter.acquire('seller-code', operation)
+        order.append(operation)
+
+    threads = [threading.Thread(target=call, args=(operation,))
+               for operation in ('transaction_sync', 'performance_prices',
+                                 'purchase_basket')]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+    assert order[0] == 'purchase_basket'
+    stats = limiter.stats
+    assert stats['max_queue_depth'] == 3
+    assert stats['queue_depth'] == 0
+    assert stats['waits']['purchase_basket']['calls'] == 1
+
+
+def test_timed_out_wait_releases_its_ticket():
+    limiter = ratelimit.RateLimiter(rate=5, burst=1)
+    limiter.acquire('seller-code')
+    with pytest.raises(softix.exceptions.RateLimitTimeout):
+        limiter.acquire('seller-code', timeout=0.01)
+    assert limiter.queue_depth == 0
+    assert limiter.acquire('seller-code') < 0.3
+
+
+def test_throttling_halves_rate_and_recovers():
+    limiter = ratelimit.RateLimiter(rate=8, recovery=1)
+    limiter.record('seller-code', response(429))
+    limiter.record('seller-code', response(503))
+    assert limiter.stats['rates'] == {'seller-code': 2}
+    limiter.record('seller-code', response(200))
+    assert limiter.stats['rates'] == {'seller-code': 3}
+    assert limiter.throttles == 2
+
+
+def test_retry_after_pauses_seller():
+    limiter = ratelimit.RateLimiter()
+    limiter.record('seller-code', response(429, **{'Retry-After': '30'}))
+    bucket = limiter._buckets['seller-code']
+    assert bucket.take(time.time()) > 29
+
+
+@pytest.mark.parametrize('url, kwargs', [
+    ('https://api.etixdubai.com/orders/1',
+     {'params': {'sellerCode': 'AELAB1'}}),
+    ('https://api.etixdubai.com/customers?sellerCode=AELAB1', {}),
+    ('https://api.etixdubai.com/baskets',
+     {'data': '{"Channel": "W", "Seller": "AELAB1"}'}),
+])
+def test_session_finds_seller(url, kwargs):
+    session = softix.sessions.Session()
+    assert session.seller(url, **kwargs) == 'AELAB1'
+
+
+def test_session_acquires_per_attempt(fake_adapter):
+    limiter = mock.Mock(spec=ratelimit.RateLimiter)
+    session = softix.sessions.Session(
+        limiter=limiter, retry=softix.resilience.RetryPolicy(backoff=0))
+    session.mount('https://', fake_adapter([503, 200, 200]))
+    session.get(session.build_url('orders', '1'),
+                params={'sellerCode': 'AELAB1'})
+    assert limiter.acquire.call_args_list == [
+        mock.call('AELAB1', 'order'), mock.call('AELAB1', 'order')]
+    assert limiter.record.call_count == 2
+    session.post(session.build_url('oauth2', 'accesstoken'),
+                 data={'grant_type': 'client_credentials'})
+    assert limiter.acquire.call_count == 2
@@ -0,0 +1,73 @@
+import mock
+import pytest
+from softix import reconciliation
+
+
+def transaction(order_id, net):
+    return {'OrderId': order_id, 'Id': 1, 'Net': net,
+            'DateTime': '2016-11-21T10:00:00'}
+
+
+def order(order_id, *nets):
+    line_items = [{'Id': index, 'DateTime': '2016-11-21T10:00:00',
+                   'Price': {'Net': net}} for index, net in enumerate(nets)]
+    return {'Id': order_id, 'OrderItems': [{'OrderLineItems': line_items}]}
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(reconciliation, 'numpy', None)
+
+
+@pytest.fixture
+def transactions():
+    return [transaction('1', 8000), transaction('1', 8000),
+            transaction('2', 5000), transaction('3', 100)]
+
+
+def test_totals(backend, transactions):
+    table = reconciliation.LineItems.from_transactions(transactions)
+    order_ids, totals = table.totals()
+    assert list(order_ids) == ['1', '2', '3']
+    assert list(totals) == [16000, 5000, 100]
+
+
+def test_compare(backend, transactions):
+    result = reconciliation.compare(
+        reconciliation.LineItems.from_transactions(transactions),
+        reconciliation.LineItems.from_orders([order('1', 8000, 8000),
+                                              order('2', 4000)]))
+    assert result.matched == ['1']
+    assert result.mismatched == {'2': (5000, 4000)}
+    assert result.missing == ['3']
+
+
+def test_compare_without_orders(backend, transactions):
+    result = reconciliation.compare(
+        reconciliation.LineItems.from_transactions(transactions),
+        reconciliation.LineItems.from_orders([]))
+    assert result.missing == ['1', '2', '3']
+
+
+def test_reconcile_fetches_only_stale_orders(backend, transactions):
+    orders = {'2': order('2', 5000), '3': order('3', 100)}
+    client = mock.Mock()
+    client.order.side_effect = lambda seller_code, order_id: orders[order_id]
+    result = reconciliation.reconcile(
+        client, 'seller-code', transactions,
+        orders=[order('1', 8000, 8000), order('2', 4000)])
+    assert sorted(call[0][1] for call in client.order.call_args_list) == [
+        '2', '3']
+    assert result.matched == ['1', '2', '3']
+    assert not result.mismatched and not result.missing
+
+
+def test_reconcile_reports_fetch_errors(backend, transactions):
+    client = mock.Mock()
+    client.order.side_effect = ValueError('No order found')
+    result = reconciliation.reconcile(client, 'seller-code', transactions)
+    assert sorted(result.errors) == ['1', '2', '3']
+    assert result.missing == []
@@ -0,0 +1,94 @@
+import pytest
+import softix
+from softix import seatmap
+
+
+@pytest.fixture
+def availabilities(cassette):
+    return cassette('SoftixCore_performance_availabilities')
+
+
+@pytest.fixture
+def basket(cassette):
+    return cassette('SoftixCore_purchase_basket')
+
+
+@pytest.mark.parametrize('seats, expected', [
+    ('154', [154]),
+    ('186-188', [186, 187, 188]),
+    ('RGA/G186-188,Q189-191', [186, 187, 188, 189, 190, 191]),
+    ('RGA/Q154-', [154]),
+    ('-', []),
+])
+def test_parse_seats(seats, expected):
+    assert seatmap.parse_seats(seats) == expected
+
+
+def test_sold_out_categories(availabilities):
+    seats = seatmap.SeatMap.from_availabilities(availabilities)
+    assert seats.sold_out == set(['2', '3'])
+    assert len(seats) == 0
+
+
+def test_seats_of_recorded_basket(availabilities, basket):
+    seats = seatmap.SeatMap.from_availabilities(availabilities, [basket])
+    assert len(seats) == 6
+    assert seats.find(3, '1') == softix.Seat('SGA', 'GA', '186-188')
+    assert seats.find(6, '1', section='SGA') == softix.Seat('SGA', 'GA',
+                                                            '186-191')
+    assert seats.find(7, '1') is None
+    assert seats.find(1, '1', section='SGB') is None
+
+
+def test_sold_out_category_has_no_seats(availabilities, basket):
+    basket['Offers'][0]['PriceCategoryCode'] = '2'
+    seats = seatmap.SeatMap.from_availabilities(availabilities, [basket])
+    assert seats.find(1, '2') is None
+
+
+def test_find_tightest_run():
+    seats = seatmap.SeatMap()
+    seats.add('SGA', 'A', [1, 2, 3, 4, 6, 7], '1')
+    seats.add('SGA', 'B', range(1, 11), '1')
+    assert len(seats) == 16
+    assert seats.find(2, '1') == softix.Seat('SGA', 'A', '6-7')
+    assert seats.find(3, '1') == softix.Seat('SGA', 'A', '1-3')
+    assert seats.find(5, '1') == softix.Seat('SGA', 'B', '1-5')
+    assert seats.find(11, '1') is None
+
+
+def test_find_in_section():
+    seats = seatmap.SeatMap()
+    seats.add('SGA', 'A', [1, 2], '1')
+    seats.add('SGB', 'A', [1, 2, 3, 4], '1')
+    assert seats.find(2, '1') == softix.Seat('SGA', 'A', '1-2')
+    assert seats.find(2, '1', section='SGB') == softix.Seat('SGB', 'A', '1-2')
+    seats.consume('SGB', 'A', [1, 2, 3, 4])
+    assert seats.find(1, '1', section='SGB') is None
+
+
+def test_take_consumes_seats():
+    seats = seatmap.SeatMap()
+    seats.add('SGA', 'A', [1, 2, 3, 4, 6, 7], '1')
+    seats.add('SGA', 'B', range(1, 11), '1')
+    assert seats.take(4, '1') == softix.Seat('SGA', 'A', '1-4')
+    assert seats.take(4, '1') == softix.Seat('SGA', 'B', '1-4')
+    assert seats.find(3, '1') == softix.Seat('SGA', 'B', '5-7')
+    assert len(seats) == 8
+
+
+def test_runs_split_by_price_category():
+    seats = seatmap.SeatMap()
+    seats.add('SGA', 'A', [1, 2, 3], '1')
+    seats.add('SGA', 'A', [4, 5], '4')
+    assert seats.find(4, '1') is None
+    assert seats.find(2, '4') == softix.Seat('SGA', 'A', '4-5')
+
+
+def test_consume_basket(availabilities, basket, cassette):
+    seats = seatmap.SeatMap.from_availabilities(availabilities, [basket])
+    seats.add('SGA', 'GA', [154, 155], '1')
+    seats.consume_basket(cassette('SoftixCore_create_basket'))
+    assert seats.find(2, '1') == softix.Seat('SGA', 'GA', '186-187')
+    seats.consume_basket(basket)
+    assert seats.find(1, '1') == softix.Seat('SGA', 'GA', '155')
@@ -0,0 +1,117 @@
+import pytest
+import requests
+from requests.packages.urllib3.exceptions import (MaxRetryError,
+                                                  NewConnectionError)
+import softix
+from softix import resilience
+
+
+@pytest.fixture
+def make_session(fake_adapter):
+    def make(outcomes, **kwargs):
+        kwargs.setdefault('retry', resilience.RetryPolicy(backoff=0))
+        session = softix.sessions.Session(**kwargs)
+        adapter = fake_adapter(outcomes)
+        session.mount('https://', adapter)
+        return session, adapter
+    return make
+
+
+def test_default_timeout_per_endpoint(make_session):
+    session, adapter = make_session([200, 200])
+    session.get(session.build_url('orders', '1'))
+    session.post(session.build_url('Baskets', '1', 'purchase'))
+    assert adapter.requests[0][1]['timeout'] == (3.05, 30)
+    assert adapter.requests[1][1]['timeout'] == (3.05, 60)
+
+
+def test_get_is_retried(make_session):
+    session, adapter = make_session([503, requests.exceptions.ReadTimeout(),
+                                     200])
+    response = session.get(session.build_url('performances', 'X', 'prices'))
+    assert response.status_code == 200
+    assert session.stats['retries'] == {'prices': 2}
+
+
+def test_get_gives_up_after_max_retries(make_session):
+    session, adapter = make_session([503, 503, 503, 200])
+    response = session.get(session.build_url('orders', '1'))
+    assert response.status_code == 503
+    assert len(adapter.requests) == 3
+
+
+def test_purchase_is_not_retried_once_sent(make_session):
+    session, adapter = make_session([requests.exceptions.ReadTimeout(), 201])
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.post(session.build_url('Baskets', '1', 'purchase'))
+    assert len(adapter.requests) == 1
+
+
+def test_purchase_is_retried_when_never_sent(make_session):
+    session, adapter = make_session([requests.exceptions.ConnectTimeout(),
+                                     201])
+    response = session.post(session.build_url('Baskets', '1', 'purchase'))
+    assert response.status_code == 201
+
+
+def test_breaker_opens_and_recovers(make_session):
+    breaker = resilience.CircuitBreaker(failure_threshold=2,
+                                        recovery_timeout=0)
+    session, adapter = make_session(
+        [500, 500, 200], breaker=breaker,
+        retry=resilience.RetryPolicy(max_retries=0))
+    session.get(session.build_url('orders', '1'))
+    session.get(session.build_url('orders', '1'))
+    assert breaker.trips == 1
+    assert breaker.state == breaker.HALF_OPEN
+    session.get(session.build_url('orders', '1'))
+    assert session.stats['breaker'] == breaker.CLOSED
+
+
+def test_open_breaker_fails_fast(make_session):
+    breaker = resilience.CircuitBreaker(failure_threshold=1)
+    session, adapter = make_session(
+        [500], breaker=breaker, retry=resilience.RetryPolicy(max_retries=0))
+    session.get(session.build_url('orders', '1'))
+    with pytest.raises(softix.exceptions.CircuitOpenError):
+        session.get(session.build_url('orders', '1'))
+    assert len(adapter.requests) == 1
+
+
+def test_failed_trial_call_is_released(make_session):
+    breaker = resilience.CircuitBreaker(failure_threshold=1,
+                                        recovery_timeout=0)
+    session, adapter = make_session(
+        [500, ValueError('Unexpected'), 200], breaker=breaker,
+        retry=resilience.RetryPolicy(max_retries=0))
+    session.get(session.build_url('orders', '1'))
+    with pytest.raises(ValueError):
+        session.get(session.build_url('orders', '1'))
+    assert session.get(session.build_url('orders', '1')).status_code == 200
+    assert breaker.state == breaker.CLOSED
+
+
+def test_never_sent():
+    reason = NewConnectionError(None, 'Connection refused')
+    refused = requests.exceptions.ConnectionError(
+        MaxRetryError(None, '/', reason))
+    assert resilience.never_sent(refused)
+    assert resilience.never_sent(requests.exceptions.ConnectTimeout())
+    assert not resilience.never_sent(requests.exceptions.ConnectionError())
+    assert not resilience.never_sent(requests.exceptions.ReadTimeout())
+
+
+def test_backoff_is_bounded():
+    policy = resilience.RetryPolicy(backoff=1, max_backoff=3)
+    assert all(0 <= policy.delay(attempt) <= 3 for attempt in range(10))
+
+
+def test_url_templates_follow_base_url():
+    session = softix.sessions.Session()
+    assert session.url('purchase_basket', '4281-1') == (
+        'https://api.etixdubai.com/Baskets/4281-1/purchase')
+    assert session.url('customer', 1768618) == (
+        'https://api.etixdubai.com/customers/1768618')
+    session.base_url = 'http://127.0.0.1:8080/'
+    assert session.url('transaction_sync', '2016-11-01', '2016-11-02') == (
+        'http://127.0.0.1:8080/dcal/transync/2016-11-01/2016-11-02')
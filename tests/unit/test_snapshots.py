@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+from softix import snapshots, transactions
+
+from .test_transactions import FakeClient
+
+
+class TimestampedClient(FakeClient):
+
+    def _stream_transactions(self, seller_code, from_date, to_date):
+        self.windows.append((from_date, to_date))
+        return iter([{'OrderId': '{0},{1}'.format(from_date, n), 'N': n,
+                      'DateTime': '{0}T1{1}:00:00'.format(from_date, n)}
+                     for n in range(3)])
+
+
+@pytest.fixture
+def store(tmpdir):
+    return snapshots.SnapshotStore(str(tmpdir), block_size=2)
+
+
+def stream(client, store, from_date='2016-11-01', to_date='2016-11-03'):
+    return transactions.TransactionStream(client, 'seller-code', from_date,
+                                          to_date, window_days=7,
+                                          store=store)
+
+
+def test_fetched_days_are_stored(store):
+    client = TimestampedClient()
+    items = list(stream(client, store))
+    assert len(items) == 9
+    assert client.windows[0] == ('2016-11-01', '2016-11-01')
+    assert store.days('seller-code') == [datetime.date(2016, 11, 1),
+                                         datetime.date(2016, 11, 2),
+                                         datetime.date(2016, 11, 3)]
+
+    client = TimestampedClient()
+    assert list(stream(client, store, to_date='2016-11-04'))[:9] == items
+    assert client.windows == [('2016-11-04', '2016-11-04')]
+    assert store.missing('seller-code', '2016-11-01', '2016-11-05') == [
+        datetime.date(2016, 11, 5)]
+
+
+def test_failed_days_are_not_stored(store):
+    with pytest.raises(Exception):
+        list(stream(FakeClient(fail_on='2016-11-02'), store))
+    assert not store.has('seller-code', datetime.date(2016, 11, 2))
+
+
+def test_today_is_not_stored(store):
+    today = datetime.datetime.utcnow().date().strftime('%Y-%m-%d')
+    list(stream(TimestampedClient(), store, today, today))
+    assert store.days('seller-code') == []
+
+
+def test_find_and_between(store):
+    list(stream(TimestampedClient(), store))
+    assert store.find('seller-code', '2016-11-02,1') == [
+        {'OrderId': '2016-11-02,1', 'N': 1,
+         'DateTime': '2016-11-02T11:00:00'}]
+    found = store.between('seller-code', '2016-11-01T12:00:00',
+                          '2016-11-02T11:00:00')
+    assert [item['OrderId'] for item in found] == [
+        '2016-11-01,2', '2016-11-02,0', '2016-11-02,1']
+    stored = list(store.transactions('seller-code', '2016-11-02',
+                                     '2016-11-03'))
+    assert len(stored) == 6
+    store.close()
+
+
+def test_find_searches_the_given_days(store):
+    list(stream(TimestampedClient(), store))
+    assert store.find('seller-code', '2016-11-02,1', '2016-11-02',
+                      '2016-11-02')
+    assert store.find('seller-code', '2016-11-02,1', '2016-11-03') == []
+    assert [day for _, day in store._partitions] == [
+        datetime.date(2016, 11, 2), datetime.date(2016, 11, 3)]
+
+
+def test_open_partitions_are_bounded(tmpdir):
+    store = snapshots.SnapshotStore(str(tmpdir), block_size=2, max_open=1)
+    list(stream(TimestampedClient(), store))
+    first = store.partition('seller-code', datetime.date(2016, 11, 1))
+    assert len(list(first)) == 3
+    store.partition('seller-code', datetime.date(2016, 11, 2))
+    assert len(store._partitions) == 1
+    assert first._data is None
+    assert len(list(first)) == 3
+    with store:
+        assert len(store.between('seller-code', '2016-11-01T00:00:00',
+                                 '2016-11-03T23:00:00')) == 9
+    assert not store._partitions
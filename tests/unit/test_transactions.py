@@ -0,0 +1,115 @@
+import datetime
+import time
+
+import mock
+import pytest
+import softix
+from softix import transactions
+
+
+class FakeClient(object):
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.windows = []
+
+    def _stream_transactions(self, seller_code, from_date, to_date):
+        self.windows.append((from_date, to_date))
+        if from_date == self.fail_on:
+            raise softix.exceptions.SoftixError('Service unavailable')
+        return iter([{'From': from_date, 'To': to_date, 'N': n}
+                     for n in range(2)])
+
+
+def test_date_windows():
+    windows = list(transactions.date_windows(datetime.date(2016, 11, 1),
+                                             datetime.date(2016, 11, 7), 3))
+    assert windows == [
+        (datetime.date(2016, 11, 1), datetime.date(2016, 11, 3)),
+        (datetime.date(2016, 11, 4), datetime.date(2016, 11, 6)),
+        (datetime.date(2016, 11, 7), datetime.date(2016, 11, 7)),
+    ]
+
+
+def test_transactions_are_yielded_in_order():
+    stream = transactions.TransactionStream(
+        FakeClient(), 'seller-code', '2016-11-01', '2016-11-10', workers=3)
+    items = list(stream)
+    assert len(items) == 20
+    assert [item['From'] for item in items] == sorted(
+        item['From'] for item in items)
+
+
+def test_stream_can_be_iterated_again():
+    stream = transactions.TransactionStream(
+        FakeClient(), 'seller-code', '2016-11-01', '2016-11-02')
+    assert len(list(stream)) == 4
+    assert len(list(stream)) == 4
+
+
+def test_resume_from_checkpoint(tmpdir):
+    checkpoint = transactions.Checkpoint(str(tmpdir.join('sync.json')))
+    stream = transactions.TransactionStream(
+        FakeClient(fail_on='2016-11-03'), 'seller-code', '2016-11-01',
+        '2016-11-05', workers=1, checkpoint=checkpoint)
+    with pytest.raises(softix.exceptions.SoftixError):
+        list(stream)
+    start, end = datetime.date(2016, 11, 1), datetime.date(2016, 11, 5)
+    assert checkpoint.load('seller-code', start, end) == \
+        datetime.date(2016, 11, 2)
+    assert checkpoint.load('other-seller', start, end) is None
+
+    client = FakeClient()
+    stream = transactions.TransactionStream(
+        client, 'seller-code', '2016-11-01', '2016-11-05',
+        checkpoint=checkpoint)
+    assert len(list(stream)) == 6
+    assert client.windows[0] == ('2016-11-03', '2016-11-03')
+
+
+def test_checkpoint_of_another_range_is_ignored(tmpdir):
+    checkpoint = transactions.Checkpoint(str(tmpdir.join('sync.json')))
+    list(transactions.TransactionStream(
+        FakeClient(), 'seller-code', '2016-11-01', '2016-11-05',
+        checkpoint=checkpoint))
+    client = FakeClient()
+    stream = transactions.TransactionStream(
+        client, 'seller-code', '2016-10-01', '2016-11-03',
+        checkpoint=checkpoint)
+    assert len(list(stream)) == 68
+    assert client.windows[0] == ('2016-10-01', '2016-10-01')
+
+
+def test_windows_buffer_a_bounded_number_of_transactions():
+    produced = []
+
+    class LargeWindows(FakeClient):
+
+        def _stream_transactions(self, seller_code, from_date, to_date):
+            for n in range(100):
+                produced.append(n)
+                yield {'From': from_date, 'N': n}
+
+    stream = transactions.TransactionStream(
+        LargeWindows(), 'seller-code', '2016-11-01', '2016-11-10',
+        workers=3, queue_size=2)
+    iterator = iter(stream)
+    next(iterator)
+    time.sleep(0.2)
+    assert len(produced) <= 3 * (2 + 2)
+    iterator.close()
+    assert len(list(transactions.TransactionStream(
+        LargeWindows(), 'seller-code', '2016-11-01', '2016-11-03',
+        queue_size=2))) == 300
+
+
+def test_iter_transaction_sync_streams_response(softixcore):
+    response = mock.Mock(status_code=201)
+    response.iter_content.return_value = [b'[{"OrderId": "1"},', b' {}]']
+    softixcore.session.get.return_value = response
+    items = list(softixcore.iter_transaction_sync(
+        'seller-code', datetime.date(2016, 11, 1), datetime.date(2016, 11, 1)))
+    assert items == [{'OrderId': '1'}, {}]
+    url = 'https://api.etixdubai.com/dcal/transync/2016-11-01/2016-11-01'
+    assert softixcore.session.get.call_args[0] == (url,)
+    assert softixcore.session.get.call_args[1]['stream'] is True
@@ -0,0 +1,80 @@
+import pytest
+import softix
+from softix import exceptions, validation
+
+
+def test_reports_all_errors(valid_customer):
+    customer = dict(valid_customer, countrycode='ARE', email='unknown')
+    del customer['state']
+    with pytest.raises(exceptions.MissingRequiredCustomerField) as error:
+        validation.CUSTOMER.check(customer)
+    assert sorted(field for field, _ in error.value.errors) == [
+        'countrycode', 'email', 'state']
+    assert isinstance(error.value, exceptions.ValidationError)
+
+
+def test_invalid_fields_raise_invalid(valid_customer):
+    customer = dict(valid_customer, nationality='IND')
+    with pytest.raises(exceptions.InvalidCustomerField) as error:
+        validation.CUSTOMER.check(customer)
+    assert error.value.errors == [
+        ('nationality', 'nationality needs to be 2 characters')]
+
+
+def test_normalizes_in_place(valid_customer):
+    customer = dict(valid_customer, nationality='in', countrycode=' ae ',
+                    firstname=' ajilan')
+    assert validation.CUSTOMER.check(customer) is customer
+    assert customer['nationality'] == 'IN'
+    assert customer['countrycode'] == 'AE'
+    assert customer['firstname'] == 'ajilan'
+
+
+def test_validate_customer_does_not_normalize(valid_customer):
+    customer = dict(valid_customer, nationality='in')
+    softix.models.validate_customer(customer)
+    assert customer['nationality'] == 'in'
+
+
+def test_validate_many(valid_customer):
+    customers = [dict(valid_customer) for _ in range(3)]
+    customers[1]['email'] = 'nobody'
+    customers[2] = 'not a customer'
+    invalid = validation.CUSTOMER.validate_many(customers)
+    assert sorted(invalid) == [1, 2]
+    assert invalid[1] == [('email', 'email is not valid')]
+    assert len(invalid[2]) == 15
+
+
+@pytest.mark.parametrize('args', [('Q', 0, 1), ('Q', 'one', 1), ('', 1, 1)])
+def test_invalid_demands(args):
+    with pytest.raises(exceptions.ValidationError):
+        softix.Demand(*args)
+
+
+def test_request_models_are_normalized():
+    assert softix.Demand('Q', '2', '2').quantity == 2
+    assert softix.Fee(5, 'W').type == '5'
+    assert softix.Seat('SGA', 'A', 154).seats == '154'
+    with pytest.raises(exceptions.ValidationError):
+        softix.Seat('SGA', None, '154')
+    with pytest.raises(exceptions.ValidationError):
+        softix.Demand(None, 1, 1)
+
+
+def test_integer_customer_fields(valid_customer):
+    customer = dict(valid_customer, phonenumber=501234567, ID=1768618,
+                    Account=1753759)
+    assert validation.CUSTOMER.validate(customer) == []
+    assert customer['phonenumber'] == '501234567'
+    customer = dict(valid_customer, phonenumber=True)
+    assert validation.CUSTOMER.validate(customer) == [
+        ('phonenumber', 'phonenumber must be a string')]
+
+
+def test_create_customer_validates_before_sending(softixcore,
+                                                  valid_customer):
+    customer = dict(valid_customer, email='unknown')
+    with pytest.raises(exceptions.InvalidCustomerField):
+        softixcore.create_customer('seller-code', **customer)
+    assert not softixcore.session.post.called